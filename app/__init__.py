@@ -1,11 +1,18 @@
 # -*- coding: utf-8 -*-
 
+import logging
 import os
+import click
 from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from .models import db
 from .routes import app_routes
+from .commands import register_commands
+from .engine_options import engine_options_from_env, sync_database_url
+from .assets import init_assets
+from .metrics import init_metrics
+from .fragments import init_fragment_cache
+from .replica import init_replica, replica_binds
+from .versions import default_etag_salt
 
 def create_app():
     app = Flask(__name__)
@@ -22,16 +29,75 @@ def create_app():
     if not secret:
         raise ValueError("Erreur : La variable d'environnement SECRET_KEY n'est pas définie.")
 
+    # Journalisation : LOG_LEVEL (défaut INFO), sans effet si elle est déjà configurée (gunicorn, tests)
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper())
+
     # Configurer l'application avec les valeurs vérifiées
-    app.config['SQLALCHEMY_DATABASE_URI'] = db_uri
+    # Options calculées sur l'URL d'origine (?pgbouncer=true), moteur créé sans ce paramètre
+    app.config['SQLALCHEMY_DATABASE_URI'] = sync_database_url(db_uri)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options_from_env(db_uri)
     app.config['SECRET_KEY'] = secret
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Nombre de séances par page sur /remarks/<id> (pagination « Charger plus »)
+    app.config['REMARKS_PAGE_SIZE'] = int(os.environ.get('REMARKS_PAGE_SIZE', 50))
+    # Durée (secondes) pendant laquelle le résultat de /ping est réutilisé
+    app.config['PING_CACHE_TTL'] = float(os.environ.get('PING_CACHE_TTL', 10))
+    # Intervalle (secondes) de revérification de la version du catalogue en cache
+    app.config['CATALOGUE_RECHECK_SECONDS'] = float(os.environ.get('CATALOGUE_RECHECK_SECONDS', 300))
+    # Nombre de lignes écrites par transaction lors des imports en masse
+    app.config['IMPORT_BATCH_SIZE'] = int(os.environ.get('IMPORT_BATCH_SIZE', 5000))
+    # Nombre de lignes lues par paquet depuis le curseur serveur lors des exports
+    app.config['EXPORT_CHUNK_SIZE'] = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+    # Nombre de résultats par page de recherche dans les remarques
+    app.config['SEARCH_PAGE_SIZE'] = int(os.environ.get('SEARCH_PAGE_SIZE', 20))
+    # Sel des ETag : change à chaque déploiement pour invalider les pages gardées par les navigateurs,
+    # identique dans tous les workers (empreinte du code et des gabarits à défaut de variable)
+    app.config['ETAG_SALT'] = (os.environ.get('ETAG_SALT') or os.environ.get('RENDER_GIT_COMMIT')
+                               or default_etag_salt(app))
+    # Instrumentation (/metrics) et journal des requêtes lentes (0 = désactivé)
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'true').lower() in ('1', 'true', 'yes', 'on')
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['SLOW_REQUEST_MS'] = float(os.environ.get('SLOW_REQUEST_MS', 0))
+    # Cache des fragments rendus (grille des élèves, séances) : local | redis | off
+    app.config['FRAGMENT_CACHE'] = os.environ.get('FRAGMENT_CACHE', 'local').strip().lower()
+    app.config['FRAGMENT_CACHE_MAX_ENTRIES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_ENTRIES', 1000))
+    app.config['FRAGMENT_CACHE_MAX_BYTES'] = int(os.environ.get('FRAGMENT_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    app.config['FRAGMENT_CACHE_TTL'] = float(os.environ.get('FRAGMENT_CACHE_TTL', 600))
+    app.config['FRAGMENT_CACHE_REDIS_URL'] = os.environ.get('FRAGMENT_CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    # Bases SQLite des années scolaires détachées (`flask detach-school-year`, voir partitions.py)
+    app.config['SESSIONS_ARCHIVE_DIR'] = os.environ.get('SESSIONS_ARCHIVE_DIR') or app.instance_path
+    # Synchronisation hors ligne (/sync, voir sync.py) : taille maximale d'un lot, rétention du journal
+    app.config['SYNC_MAX_OPERATIONS'] = int(os.environ.get('SYNC_MAX_OPERATIONS', 500))
+    app.config['SYNC_RETENTION_DAYS'] = int(os.environ.get('SYNC_RETENTION_DAYS', 30))
+    # Réplique en lecture facultative : vues GET de Flask (voir replica.py) et API asynchrone (asgi.py)
+    read_url = os.environ.get('DATABASE_READ_URL')
+    app.config['SQLALCHEMY_BINDS'] = replica_binds(
+        read_url and sync_database_url(read_url), engine_options_from_env(read_url) if read_url else {}
+    )
+    # Durée (secondes) pendant laquelle un navigateur qui vient d'écrire lit le primaire
+    app.config['READ_AFTER_WRITE_SECONDS'] = float(os.environ.get('READ_AFTER_WRITE_SECONDS', 10))
+    app.config['API_DATABASE_URL'] = read_url or db_uri
 
     # Initialisation des extensions
     db.init_app(app)
-    migrate = Migrate(app, db)
+    # Flask-Migrate (et Alembic) ne servent qu'aux commandes `flask db ...` :
+    # ni importés ni initialisés quand gunicorn sert les requêtes (démarrage à froid)
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+        Migrate(app, db)
 
     # Enregistrer les blueprints
     app.register_blueprint(app_routes)
 
-    return app
\ No newline at end of file
+    # Commandes CLI (flask explain-queries, ...)
+    register_commands(app)
+    # Fichiers statiques empreintés (si `flask build-assets` a été exécuté)
+    init_assets(app)
+    # Latences, requêtes SQL et attente du pool par endpoint (/metrics)
+    init_metrics(app)
+    # Cache des fragments de gabarits versionnés par les jetons de versions.py
+    init_fragment_cache(app)
+    # Lectures des vues GET sur la réplique (DATABASE_READ_URL)
+    init_replica(app)
+
+    return app
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+from contextlib import asynccontextmanager
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Mount, Route
+from .models import ProgrammeSelection
+from .engine_options import async_database_url, async_engine_options_from_env
+from .partitions import requested_school_year
+from .queries import session_group_query, session_page_groups, session_page_result, student_summaries_query
+from .versions import roster_version_query, student_version_query
+
+
+# --- API JSON ASYNCHRONE EN LECTURE SEULE (ASGI) ---
+# Servie par Starlette avec un moteur SQLAlchemy asynchrone (asyncpg /
+# aiosqlite) sur les tables de app/models.py, pour les clients qui
+# interrogent l'application en boucle (application mobile, tableaux de bord)
+# sans immobiliser un worker gunicorn synchrone pendant les accès à la base.
+#
+#   GET /api/students?archived=false              élèves et compteurs de séances
+#   GET /api/students/<id>/remarks?after=&limit=&school_year=
+#                                                 séances d'un élève (pagination par curseur),
+#                                                 année scolaire en cours par défaut, school_year=all pour toutes
+#   GET /api/students/<id>/programme              sous-chapitres cochés d'un élève
+#
+# Les requêtes sont celles des pages Flask (queries.py, versions.py), avec les
+# mêmes jetons de version : chaque réponse porte un ETag faible et un 304 est
+# renvoyé, sans autre requête, tant que les données n'ont pas changé.
+# L'API lit DATABASE_READ_URL si elle est définie (réplique), sinon DATABASE_URL.
+# Point d'entrée : asgi.py (l'application Flask est montée sur le reste des URL).
+
+MAX_PAGE_SIZE = 200
+
+
+def _utc(value):
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _error(message, status_code):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def _version_headers(request, parts, last_modified):
+    """En-têtes de validation (ETag faible, Last-Modified) d'une version de ressource."""
+    raw = "|".join(str(part) for part in (request.app.state.etag_salt, request.url.path, *parts))
+    headers = {
+        "ETag": f'W/"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"',
+        "Cache-Control": "private, no-cache",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_utc(last_modified).replace(microsecond=0), usegmt=True)
+    return headers
+
+
+def _not_modified(request, headers, last_modified):
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or headers["ETag"].removeprefix('W/') in tags
+    since = request.headers.get("if-modified-since")
+    if since and last_modified is not None:
+        try:
+            return _utc(last_modified).replace(microsecond=0) <= parsedate_to_datetime(since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _student_id(request):
+    return request.path_params["student_id"]
+
+
+async def students(request):
+    """Élèves (actifs par défaut, archivés avec ?archived=true) et leurs compteurs de séances."""
+    archived = request.query_params.get("archived", "false").lower() in ("1", "true", "yes")
+    async with request.app.state.sessionmaker() as db_session:
+        count, generations, last_modified = (await db_session.execute(roster_version_query())).one()
+        headers = _version_headers(request, (archived, count, generations), last_modified)
+        if _not_modified(request, headers, last_modified):
+            return Response(status_code=304, headers=headers)
+        rows = (await db_session.execute(student_summaries_query(archived))).all()
+
+    return JSONResponse({
+        "students": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "recorded_count": row.recorded_count,
+                "unrecorded_count": row.unrecorded_count,
+            }
+            for row in rows
+        ],
+    }, headers=headers)
+
+
+async def student_remarks(request):
+    """Séances d'un élève, non enregistrées puis enregistrées, plus récentes en tête."""
+    student_id = _student_id(request)
+    try:
+        limit = min(max(int(request.query_params.get("limit", request.app.state.page_size)), 1), MAX_PAGE_SIZE)
+        groups = session_page_groups(request.query_params.get("after"))
+        school_year = requested_school_year(request.query_params.get("school_year"))
+    except ValueError as e:
+        return _error(str(e), 400)
+
+    async with request.app.state.sessionmaker() as db_session:
+        last_modified = (await db_session.execute(student_version_query(student_id))).scalar_one_or_none()
+        if last_modified is None:
+            return _error("Élève introuvable", 404)
+        headers = _version_headers(request, (student_id, last_modified, request.url.query, school_year),
+                                   last_modified)
+        if _not_modified(request, headers, last_modified):
+            return Response(status_code=304, headers=headers)
+
+        # Même parcours d'index que la page /remarks/<id> (une ligne de plus pour le curseur)
+        rows = []
+        for group, before_id in groups:
+            query = session_group_query(student_id, group, before_id=before_id, limit=limit + 1 - len(rows),
+                                        school_year=school_year)
+            rows.extend((await db_session.execute(query)).scalars().all())
+            if len(rows) > limit:
+                break
+    page, next_cursor = session_page_result(rows, limit)
+
+    return JSONResponse({
+        "student_id": student_id,
+        "remarks": [
+            {
+                "id": session.id,
+                "date": session.date.isoformat() if session.date else None,
+                "remark": session.remark,
+                "selected": session.selected,
+            }
+            for session in page
+        ],
+        "next_cursor": next_cursor,
+    }, headers=headers)
+
+
+async def student_programme(request):
+    """Identifiants des sous-chapitres du programme cochés pour un élève."""
+    student_id = _student_id(request)
+    async with request.app.state.sessionmaker() as db_session:
+        last_modified = (await db_session.execute(student_version_query(student_id))).scalar_one_or_none()
+        if last_modified is None:
+            return _error("Élève introuvable", 404)
+        headers = _version_headers(request, (student_id, last_modified), last_modified)
+        if _not_modified(request, headers, last_modified):
+            return Response(status_code=304, headers=headers)
+        subchapter_ids = (await db_session.execute(
+            select(ProgrammeSelection.subchapter_id)
+            .where(ProgrammeSelection.student_id == student_id)
+            .order_by(ProgrammeSelection.subchapter_id)
+        )).scalars().all()
+
+    return JSONResponse({"student_id": student_id, "subchapter_ids": subchapter_ids}, headers=headers)
+
+
+ROUTES = [
+    Route("/students", students),
+    Route("/students/{student_id:int}/remarks", student_remarks),
+    Route("/students/{student_id:int}/programme", student_programme),
+]
+
+
+def create_api(config):
+    """Crée l'application Starlette de l'API à partir de la configuration de l'application Flask."""
+    database_url = config.get('API_DATABASE_URL') or config['SQLALCHEMY_DATABASE_URI']
+    api = Starlette(routes=ROUTES)
+    api.state.engine = create_async_engine(
+        async_database_url(database_url), **async_engine_options_from_env(database_url)
+    )
+    # Lecture seule : rien à valider, les objets n'ont pas à être expirés
+    api.state.sessionmaker = async_sessionmaker(api.state.engine, expire_on_commit=False)
+    api.state.etag_salt = config['ETAG_SALT']
+    api.state.page_size = config['REMARKS_PAGE_SIZE']
+    return api
+
+
+def create_asgi_app(flask_app):
+    """Application ASGI complète : l'API sur /api, l'application Flask (WSGI) sur le reste."""
+    from asgiref.wsgi import WsgiToAsgi
+
+    api = create_api(flask_app.config)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await api.state.engine.dispose()
+
+    return Starlette(
+        routes=[Mount("/api", app=api), Mount("/", app=WsgiToAsgi(flask_app))],
+        lifespan=lifespan,
+    )
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, update
+from .models import db, Student, Session
+
+
+# --- ARCHIVAGE EN MASSE (FIN D'ANNÉE SCOLAIRE) ---
+# Les élèves actifs qui répondent à TOUS les critères donnés sont archivés en
+# un seul UPDATE ensembliste :
+#   student_ids    : liste explicite d'identifiants ;
+#   inactive_days  : aucune séance depuis N jours, d'après max(sessions.date)
+#                    (date de création pour un élève sans séance) ;
+#   created_before : élève créé avant cette date.
+# L'UPDATE modifie aussi students.updated_at (onupdate) : les ETag et les
+# fragments en cache de /students et des pages des élèves sont invalidés.
+# /students ne lit que les élèves actifs (index partiels), qui restent peu nombreux.
+
+PREVIEW_SIZE = 20
+
+
+def _last_activity():
+    """Sous-requête corrélée : date de la dernière séance de l'élève, sinon date de création."""
+    last_session = (
+        select(func.max(Session.date))
+        .where(Session.student_id == Student.id)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+    return func.coalesce(last_session, func.date(Student.created_at))
+
+
+def archive_criteria(student_ids=None, inactive_days=None, created_before=None, today=None):
+    """Conditions SQL des élèves actifs à archiver ; ValueError si aucun critère n'est donné."""
+    criteria = []
+    if student_ids:
+        criteria.append(Student.id.in_(sorted({int(student_id) for student_id in student_ids})))
+    if inactive_days is not None:
+        if inactive_days < 0:
+            raise ValueError("inactive_days doit être positif.")
+        cutoff = (today or date.today()) - timedelta(days=inactive_days)
+        criteria.append(_last_activity() < cutoff)
+    if created_before is not None:
+        criteria.append(Student.created_at < datetime.combine(created_before, datetime.min.time()))
+    if not criteria:
+        raise ValueError("Au moins un critère est requis : student_ids, inactive_days ou created_before.")
+    return [Student.is_archived.is_(False), *criteria]
+
+
+def preview_archive(criteria):
+    """Aperçu (sans écriture) : nombre d'élèves concernés et les premiers par ordre alphabétique."""
+    count = db.session.execute(select(func.count(Student.id)).where(*criteria)).scalar_one()
+    sample = db.session.execute(
+        select(Student.id, Student.name).where(*criteria).order_by(Student.name).limit(PREVIEW_SIZE)
+    ).all()
+    return {"count": count, "sample": [{"id": row.id, "name": row.name} for row in sample]}
+
+
+def archive_students(criteria):
+    """Archive en un seul UPDATE les élèves qui répondent aux critères ; retourne leur nombre."""
+    result = db.session.execute(
+        update(Student)
+        .where(*criteria)
+        .values(is_archived=True)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import shutil
+from flask import request, send_from_directory
+
+
+# --- CHAÎNE DE CONSTRUCTION DES FICHIERS STATIQUES ---
+# `flask build-assets` produit dans static/dist/ :
+#   - pour chaque image : des variantes AVIF/WebP aux largeurs IMAGE_WIDTHS et
+#     un JPEG progressif de repli, avec l'empreinte du contenu dans le nom ;
+#   - pour chaque feuille CSS : les url(...) réécrites vers les images
+#     empreintées, une surcharge image-set() (AVIF/WebP) par largeur d'écran
+#     pour chaque background-image, et des versions précompressées .gz / .br ;
+#   - manifest.json : nom source -> nom empreinté.
+# Au démarrage, init_assets() lit le manifeste : url_for('static', filename=...)
+# pointe alors vers la version empreintée, servie avec Cache-Control immutable
+# (un an) et, pour les CSS, en brotli/gzip selon Accept-Encoding. Sans
+# manifeste (développement), les fichiers sources sont servis tels quels.
+#
+# Dépendances de construction : Pillow (requis), brotli et le support AVIF de
+# Pillow (facultatifs : formats ignorés s'ils sont absents).
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+IMAGE_WIDTHS = (640, 1280, 1920)
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Largeur de variante utilisée selon l'écran (la plus grande par défaut) ;
+# 1280 px couvre aussi les téléphones à haute densité de pixels.
+BREAKPOINTS = (
+    (1280, "(max-width: 1280px)"),
+    (640, "(max-width: 640px) and (max-resolution: 1.5dppx)"),
+)
+IMAGE_FORMATS = (
+    ('avif', 'AVIF', 'image/avif', {'quality': 50}),
+    ('webp', 'WEBP', 'image/webp', {'quality': 75, 'method': 6}),
+)
+
+
+def _fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def _write_hashed(dist, stem, extension, data):
+    name = f"{stem}.{_fingerprint(data)}{extension}"
+    with open(os.path.join(dist, name), 'wb') as f:
+        f.write(data)
+    return name
+
+
+def _encode(image, fmt, **options):
+    from io import BytesIO
+    buffer = BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def _available_formats():
+    from PIL import features
+    formats = []
+    for extension, pil_format, mimetype, options in IMAGE_FORMATS:
+        if pil_format == 'AVIF' and not features.check('avif'):
+            try:
+                import pillow_avif  # noqa: F401  (greffon pour les Pillow sans AVIF natif)
+            except ImportError:
+                continue
+        formats.append((extension, pil_format, mimetype, options))
+    return formats
+
+
+def _build_image(source, name, dist, formats):
+    """Variantes d'une image. Retourne `(nom du repli JPEG, {largeur: [(url, type MIME)]})`."""
+    from PIL import Image
+
+    stem = os.path.splitext(name)[0]
+    with Image.open(os.path.join(source, name)) as original:
+        image = original.convert('RGB')
+    widths = sorted({min(width, image.width) for width in IMAGE_WIDTHS})
+
+    variants = {}
+    fallback = None
+    for width in widths:
+        resized = image if width == image.width else image.resize(
+            (width, round(image.height * width / image.width)), Image.LANCZOS
+        )
+        variants[width] = [
+            (_write_hashed(dist, f"{stem}-{width}w", f".{extension}", _encode(resized, pil_format, **options)),
+             mimetype)
+            for extension, pil_format, mimetype, options in formats
+        ]
+        if width == widths[-1]:
+            jpeg = _encode(resized, 'JPEG', quality=78, optimize=True, progressive=True)
+            fallback = _write_hashed(dist, f"{stem}-{width}w", '.jpg', jpeg)
+    # Le JPEG de repli termine chaque image-set (navigateurs sans AVIF ni WebP)
+    for width in widths:
+        variants[width].append((fallback, 'image/jpeg'))
+    return fallback, variants
+
+
+def _image_set(variants):
+    return "image-set({})".format(", ".join(f'url("{url}") type("{mimetype}")' for url, mimetype in variants))
+
+
+_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_URL = re.compile(r"""url\(\s*['"]?([^'")]+)['"]?\s*\)""")
+
+
+def _rewrite_css(css, manifest, images):
+    """Réécrit les url(...) et ajoute les surcharges responsives des background-image."""
+    def rewrite_rule(match):
+        selector, body = match.group(1), match.group(2)
+        body = _URL.sub(lambda m: f'url("{manifest.get(m.group(1), m.group(1))}")', body)
+        rule = f"{selector}{{{body}}}"
+        background = re.search(r"background-image\s*:\s*url\(\s*['\"]?([^'\")]+)", match.group(2))
+        if not background or background.group(1) not in images:
+            return rule
+        variants = images[background.group(1)]
+        widths = sorted(variants)
+        selector = selector.strip()
+        extra = [f"\n{selector} {{ background-image: {_image_set(variants[widths[-1]])}; }}"]
+        for width, media in BREAKPOINTS:
+            candidates = [w for w in widths if w >= width] or widths[-1:]
+            if candidates[0] < widths[-1]:
+                extra.append(f"\n@media {media} {{ {selector} {{ background-image: {_image_set(variants[candidates[0]])}; }} }}")
+        return rule + "".join(extra)
+
+    # Les commentaires pourraient contenir des accolades : on les retire
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    return _RULE.sub(rewrite_rule, css)
+
+
+def _precompress(dist, name):
+    with open(os.path.join(dist, name), 'rb') as f:
+        data = f.read()
+    with open(os.path.join(dist, name + '.gz'), 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(os.path.join(dist, name + '.br'), 'wb') as f:
+        f.write(brotli.compress(data, quality=11))
+
+
+def build_assets(static_folder):
+    """Reconstruit static/dist/ et son manifeste. Retourne le manifeste."""
+    dist = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist, ignore_errors=True)
+    os.makedirs(dist)
+
+    formats = _available_formats()
+    manifest = {}
+    images = {}
+    sources = sorted(
+        name for name in os.listdir(static_folder)
+        if os.path.isfile(os.path.join(static_folder, name))
+    )
+    for name in sources:
+        if name.lower().endswith(IMAGE_EXTENSIONS):
+            manifest[name], images[name] = _build_image(static_folder, name, dist, formats)
+
+    for name in sources:
+        if name in manifest:
+            continue
+        stem, extension = os.path.splitext(name)
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            data = f.read()
+        if extension == '.css':
+            data = _rewrite_css(data.decode('utf-8'), manifest, images).encode('utf-8')
+        manifest[name] = _write_hashed(dist, stem, extension, data)
+        if extension in COMPRESSIBLE_EXTENSIONS:
+            _precompress(dist, manifest[name])
+
+    with open(os.path.join(dist, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Manifeste de static/dist/, ou {} si les fichiers n'ont pas été construits."""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _accepted_encoding(dist, name):
+    accepted = request.accept_encodings
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if accepted[encoding] and os.path.exists(os.path.join(dist, name + suffix)):
+            return encoding, suffix
+    return None, ''
+
+
+def init_assets(app):
+    """Branche le manifeste sur url_for('static') et sert les fichiers empreintés."""
+    manifest = load_manifest(app.static_folder)
+    app.extensions['assets_manifest'] = manifest
+    if not manifest:
+        return
+    dist = os.path.join(app.static_folder, DIST_DIR)
+
+    @app.url_defaults
+    def fingerprinted_static_url(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = f"{DIST_DIR}/{manifest[values['filename']]}"
+
+    def static(filename):
+        if not filename.startswith(DIST_DIR + '/'):
+            return app.send_static_file(filename)
+        name = filename[len(DIST_DIR) + 1:]
+        encoding, suffix = None, ''
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            encoding, suffix = _accepted_encoding(dist, name)
+        response = send_from_directory(dist, name + suffix, mimetype=mimetypes.guess_type(name)[0],
+                                       max_age=IMMUTABLE_MAX_AGE)
+        if name.endswith(COMPRESSIBLE_EXTENSIONS):
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        # Le nom change avec le contenu : le navigateur n'a jamais à revalider
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import func, select
+from .models import db, Chapter, Subchapter
+
+
+# --- PROGRAMME DE MATHÉMATIQUES 2BAC (DONNÉES DE RÉFÉRENCE) ---
+# Sert à initialiser les tables chapters/subchapters (flask seed-catalogue).
+MATHS_2BAC_PROGRAMME = (
+    ("1. Limites et Continuité", ("Continuité en un point- continuité à droite - continuité à gauche", "Continuité sur un intervalle", "Image d’un intervalle", "Théorème des valeurs intermédiaires (T.V.I) et dichotomie", "Fonction réciproque", "Racine N-ième")),
+    ("2. Dérivabilité et Étude des Fonctions", ("Dérivabilité en un point", "Interprétation géométrique du nombre dérivé", "Dérivabilité sur un intervalle", "Calcul de la dérivée", "Dérivée et variations", "Extremums d’une fonction", "Concavité et dérivée seconde", "Les branches infinies", "Axe de symétrie - Centre de symétrie- Fonction paire – impaire", "Position relative d’une courbe et d’une droite")),
+    ("3. Fonctions Primitives", ("Les primitives", "Intégrale", "Intégration par parties", "Application – Aire et Volume")),
+    ("4. Fonction Logarithme", ("Définition et propriétés (Df et Equation/Inéquation)", "Limites usuelles", "La dérivée", "Logarithmes de base a")),
+    ("5. Fonction Exponentielle", ("Définition et propriétés (Df et Equation/Inéquation)", "Limites usuelles", "La dérivée", "Exponentielle de base a")),
+    ("6. Suites Numériques", ("Monotonie d’une suite numérique", "Suite majorée – Suite minorée – Suite bornée (Récurrence)", "Suite arithmétique", "Suite géométrique", "Limite d’une suite numérique (Convergence)")),
+    ("7. Nombres Complexes", ("Notion et propriétés", "Représentation géométrique", "Equations du second degré", "Forme trigonométrique", "Interprétation géométrique (Alignement, type du triangle, points circulaires)", "Notation exponentielle", "Transformations (Translation-Homothétie-Rotation)")),
+    ("8. Géométrie dans l’espace", ("Produit scalaire et propriétés", "Equation d’une droite et distance", "Equation cartésienne d’une sphère", "Produit vectoriel", "Positions relatives d’une droite et d’une sphère")),
+    ("9. Équations Différentielles", ("Equation Différentielle Linéaire du 1er ordre", "Equation Différentielle Linéaire du 2nd ordre")),
+    ("10. Probabilités et Statistiques", ("Introduction Cardinal - principe fondamental de dénombrement - Types de tirages", "Probabilité d’un événement - Probabilité conditionnelle", "Variables aléatoires - Loi Binomiale")),
+)
+
+
+# --- CACHE DU CATALOGUE (PAR PROCESSUS) ---
+# Le catalogue est chargé une fois par worker dans des structures immuables.
+# Sa version (nombre et plus grand identifiant des sous-chapitres) est
+# revérifiée au plus toutes les CATALOGUE_RECHECK_SECONDS secondes ; un
+# changement de version recharge le cache.
+
+CatalogueSubchapter = namedtuple('CatalogueSubchapter', 'id title')
+CatalogueChapter = namedtuple('CatalogueChapter', 'id title subchapters')
+Catalogue = namedtuple('Catalogue', 'version chapters subchapter_ids')
+
+_lock = threading.Lock()
+_cached = None
+_checked_at = 0.0
+
+
+def _current_version():
+    """Jeton de version du catalogue, lu par une requête agrégée très légère."""
+    count, max_id = db.session.execute(select(func.count(Subchapter.id), func.max(Subchapter.id))).one()
+    return count, max_id or 0
+
+
+def _load_catalogue(version):
+    chapters = db.session.execute(select(Chapter).order_by(Chapter.position)).scalars().all()
+    subchapters = db.session.execute(
+        select(Subchapter).order_by(Subchapter.chapter_id, Subchapter.position)
+    ).scalars().all()
+
+    by_chapter = {}
+    for subchapter in subchapters:
+        by_chapter.setdefault(subchapter.chapter_id, []).append(
+            CatalogueSubchapter(subchapter.id, subchapter.title)
+        )
+    return Catalogue(
+        version=version,
+        chapters=tuple(
+            CatalogueChapter(chapter.id, chapter.title, tuple(by_chapter.get(chapter.id, ())))
+            for chapter in chapters
+        ),
+        subchapter_ids=frozenset(subchapter.id for subchapter in subchapters),
+    )
+
+
+def get_catalogue():
+    """Retourne le catalogue en cache, rechargé si sa version a changé."""
+    global _cached, _checked_at
+    recheck = current_app.config.get('CATALOGUE_RECHECK_SECONDS', 300)
+    with _lock:
+        if _cached is not None and time.monotonic() - _checked_at < recheck:
+            return _cached
+        version = _current_version()
+        if _cached is None or _cached.version != version:
+            _cached = _load_catalogue(version)
+        _checked_at = time.monotonic()
+        return _cached
+
+
+def invalidate_catalogue():
+    """Force le rechargement du catalogue au prochain accès."""
+    global _cached
+    with _lock:
+        _cached = None
+
+
+def seed_catalogue():
+    """Insère le programme de référence si le catalogue est vide. Retourne True si inséré."""
+    if db.session.execute(select(func.count(Chapter.id))).scalar():
+        return False
+    for chapter_position, (chapter_title, subchapter_titles) in enumerate(MATHS_2BAC_PROGRAMME, start=1):
+        chapter = Chapter(position=chapter_position, title=chapter_title)
+        chapter.subchapters = [
+            Subchapter(position=position, title=title)
+            for position, title in enumerate(subchapter_titles, start=1)
+        ]
+        db.session.add(chapter)
+    db.session.flush()
+    invalidate_catalogue()
+    return True
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import text
+from .models import db, Student
+from .queries import student_summaries_query, session_group_query
+from .counters import counter_drift, refresh_session_counters
+from .catalogue import seed_catalogue
+from .importer import import_stream, import_records, parse_json_store
+from .utils import JsonStore
+from .search import rebuild_search_index
+from .assets import build_assets
+from .archiving import archive_criteria, archive_students, preview_archive
+from .partitions import (
+    DEFAULT_PARTITION, attach_school_year, detach_school_year, ensure_session_partitions, is_partitioned,
+    parse_school_year, school_year_label, session_partitions,
+)
+from .sync import prune_sync_operations
+
+
+# --- VÉRIFICATION DES PLANS D'EXÉCUTION ---
+
+def _explain(statement):
+    """Retourne le plan d'exécution (texte) d'une requête selon le dialecte."""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    if dialect.name == 'sqlite':
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return "\n".join(row[-1] for row in rows)
+    if dialect.name == 'postgresql':
+        # Sur de petites tables le planificateur préfère un parcours séquentiel :
+        # on le désactive pour vérifier que l'index est *utilisable*.
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = db.session.execute(text(f"EXPLAIN {sql}")).all()
+        return "\n".join(row[0] for row in rows)
+    raise click.ClickException(f"Dialecte non pris en charge : {dialect.name}")
+
+
+@click.command('explain-queries')
+@with_appcontext
+def explain_queries():
+    """Vérifie que les requêtes du tableau de bord et des remarques utilisent leurs index."""
+    # Chaque attente est un tuple d'index acceptables (l'un d'eux doit apparaître)
+    checks = [
+        ("Tableau de bord (/students)", student_summaries_query(archived=False),
+         [('ix_students_active_created_at', 'ix_students_active_name')]),
+        ("Remarques (/remarks/<id>)", session_group_query(1, False, before_id=1000, limit=51),
+         [('ix_sessions_student_selected_id',)]),
+    ]
+    failed = False
+    try:
+        for label, statement, expected in checks:
+            plan = _explain(statement)
+            missing = [" | ".join(names) for names in expected
+                       if not any(name in plan for name in names)]
+            click.echo(f"== {label}\n{plan}")
+            if missing:
+                failed = True
+                click.echo(f"❌ Index non utilisé(s) : {', '.join(missing)}\n")
+            else:
+                click.echo("✅ Index utilisés\n")
+    finally:
+        db.session.rollback()
+    if failed:
+        raise SystemExit(1)
+
+
+# --- RÉPARATION DES COMPTEURS DE SÉANCES ---
+
+@click.command('repair-counters')
+@click.option('--dry-run', is_flag=True, help="Affiche les écarts sans rien corriger.")
+@with_appcontext
+def repair_counters(dry_run):
+    """Recalcule en masse les compteurs de séances et signale les écarts."""
+    drift = counter_drift()
+    for row in drift:
+        click.echo(
+            f"Élève {row.id} ({row.name}) : enregistrées {row.recorded_count} -> {row.actual_recorded}, "
+            f"non enregistrées {row.unrecorded_count} -> {row.actual_unrecorded}"
+        )
+    click.echo(f"{len(drift)} élève(s) avec des compteurs divergents.")
+
+    if dry_run:
+        db.session.rollback()
+        return
+    updated = refresh_session_counters()
+    db.session.commit()
+    click.echo(f"✅ Compteurs recalculés pour {updated} élève(s).")
+
+
+# --- CATALOGUE DU PROGRAMME ---
+
+@click.command('seed-catalogue')
+@with_appcontext
+def seed_catalogue_command():
+    """Initialise les tables chapters/subchapters si elles sont vides."""
+    if seed_catalogue():
+        db.session.commit()
+        click.echo("✅ Catalogue du programme initialisé.")
+    else:
+        click.echo("Le catalogue contient déjà des chapitres : rien à faire.")
+
+
+# --- IMPORT EN MASSE ---
+
+@click.command('import-students')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'ndjson']),
+              help="Format du fichier (déduit de l'extension par défaut).")
+@click.option('--batch-size', type=int, help="Lignes par transaction (défaut : IMPORT_BATCH_SIZE).")
+@with_appcontext
+def import_students_command(path, fmt, batch_size):
+    """Importe des élèves et leurs séances depuis un fichier CSV ou NDJSON."""
+    fmt = fmt or path.rsplit('.', 1)[-1].lower()
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    with open(path, 'rb') as stream:
+        try:
+            report = import_stream(stream, fmt, batch_size=batch_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    click.echo(
+        f"✅ {report.students} élève(s) et {report.sessions} séance(s) importés en {report.batches} lot(s), "
+        f"{report.seconds} s ({report.rows_per_second} lignes/s)."
+    )
+
+
+@click.command('migrate-json-store')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False), default='data.json')
+@click.option('--batch-size', type=int, help="Lignes par transaction (défaut : IMPORT_BATCH_SIZE).")
+@click.option('--force', is_flag=True, help="Importe même si la base contient déjà des élèves.")
+@with_appcontext
+def migrate_json_store_command(path, batch_size, force):
+    """Migre en une fois le stockage JSON (data.json + journal) vers la base de données."""
+    if not force and db.session.execute(db.select(Student.id).limit(1)).first() is not None:
+        raise click.ClickException("La base contient déjà des élèves (utilisez --force pour importer quand même).")
+    # Lecture seule : un chemin erroné ou un fichier abîmé n'est jamais remplacé par un stockage vide
+    try:
+        data = JsonStore(path).load_snapshot()
+    except FileNotFoundError:
+        raise click.ClickException(f"{path} introuvable : rien n'a été importé.")
+    except ValueError as e:
+        raise click.ClickException(f"{e} Rien n'a été importé.")
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    try:
+        report = import_records(parse_json_store(data), batch_size=batch_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(
+        f"✅ {report.students} élève(s) et {report.sessions} séance(s) migrés depuis {path} "
+        f"en {report.batches} lot(s), {report.seconds} s."
+    )
+
+
+@click.command('reindex-search')
+@with_appcontext
+def reindex_search_command():
+    """Crée si besoin puis reconstruit l'index plein texte des remarques."""
+    rebuild_search_index()
+    db.session.commit()
+    click.echo("✅ Index de recherche des remarques reconstruit.")
+
+
+# --- ARCHIVAGE EN MASSE ---
+
+@click.command('archive-students')
+@click.option('--id', 'student_ids', type=int, multiple=True, help="Élève à archiver (option répétable).")
+@click.option('--inactive-days', type=click.IntRange(min=0), help="Aucune séance depuis N jours.")
+@click.option('--created-before', type=click.DateTime(formats=['%Y-%m-%d']), help="Créé avant cette date.")
+@click.option('--dry-run', is_flag=True, help="Affiche le nombre d'élèves concernés sans rien archiver.")
+@with_appcontext
+def archive_students_command(student_ids, inactive_days, created_before, dry_run):
+    """Archive en masse (un seul UPDATE) les élèves actifs qui répondent à tous les critères."""
+    try:
+        criteria = archive_criteria(student_ids=student_ids, inactive_days=inactive_days,
+                                    created_before=created_before.date() if created_before else None)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    report = preview_archive(criteria)
+    for student in report['sample']:
+        click.echo(f"Élève {student['id']} ({student['name']})")
+    if report['count'] > len(report['sample']):
+        click.echo(f"... et {report['count'] - len(report['sample'])} autre(s).")
+    click.echo(f"{report['count']} élève(s) actif(s) concerné(s).")
+
+    if dry_run:
+        db.session.rollback()
+        return
+    archived = archive_students(criteria)
+    db.session.commit()
+    click.echo(f"✅ {archived} élève(s) archivé(s).")
+
+
+# --- PARTITIONS DES SÉANCES PAR ANNÉE SCOLAIRE ---
+
+def _school_year_argument(ctx, param, value):
+    try:
+        return parse_school_year(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+@click.command('ensure-session-partitions')
+@click.option('--ahead', type=click.IntRange(min=0), default=1, show_default=True,
+              help="Années scolaires à préparer après l'année en cours.")
+@with_appcontext
+def ensure_session_partitions_command(ahead):
+    """Crée les partitions de l'année scolaire en cours et des suivantes (Postgres)."""
+    if not is_partitioned():
+        click.echo("La table sessions n'est pas partitionnée (SQLite ou migration non appliquée) : rien à faire.")
+        return
+    try:
+        created = ensure_session_partitions(ahead=ahead)
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    db.session.commit()
+    for name, bounds in session_partitions():
+        click.echo(f"{name:20s} {bounds}")
+    stray = db.session.execute(text(f"SELECT count(*) FROM {DEFAULT_PARTITION}")).scalar()
+    if stray:
+        click.echo(f"⚠️ {stray} séance(s) hors des années créées dans {DEFAULT_PARTITION}.")
+    click.echo(f"✅ {len(created)} partition(s) créée(s){' : ' + ', '.join(created) if created else ''}.")
+
+
+@click.command('detach-school-year')
+@click.argument('school_year', callback=_school_year_argument)
+@with_appcontext
+def detach_school_year_command(school_year):
+    """Retire une année scolaire terminée de sessions (partition détachée ou base d'archive SQLite)."""
+    try:
+        rows, students = detach_school_year(school_year, current_app.config['SESSIONS_ARCHIVE_DIR'])
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    click.echo(f"✅ Année {school_year_label(school_year)} détachée : {rows} séance(s), "
+               f"compteurs recalculés pour {students} élève(s).")
+
+
+@click.command('attach-school-year')
+@click.argument('school_year', callback=_school_year_argument)
+@with_appcontext
+def attach_school_year_command(school_year):
+    """Réintègre dans sessions une année scolaire détachée."""
+    try:
+        rows, students = attach_school_year(school_year, current_app.config['SESSIONS_ARCHIVE_DIR'])
+    except ValueError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    click.echo(f"✅ Année {school_year_label(school_year)} rattachée : {rows} séance(s), "
+               f"compteurs recalculés pour {students} élève(s).")
+
+
+# --- JOURNAL DE LA SYNCHRONISATION HORS LIGNE ---
+
+@click.command('prune-sync-operations')
+@click.option('--days', type=click.IntRange(min=1), help="Rétention en jours (défaut : SYNC_RETENTION_DAYS).")
+@with_appcontext
+def prune_sync_operations_command(days):
+    """Purge le journal des opérations /sync plus anciennes que la rétention."""
+    retention = days or current_app.config['SYNC_RETENTION_DAYS']
+    deleted = prune_sync_operations(retention)
+    db.session.commit()
+    click.echo(f"✅ {deleted} opération(s) de plus de {retention} jour(s) purgée(s).")
+
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Construit les fichiers statiques optimisés et empreintés (static/dist/)."""
+    manifest = build_assets(current_app.static_folder)
+    click.echo(f"✅ {len(manifest)} fichier(s) statique(s) construits dans static/dist/.")
+
+
+def register_commands(app):
+    """Enregistre les commandes CLI de l'application."""
+    app.cli.add_command(explain_queries)
+    app.cli.add_command(repair_counters)
+    app.cli.add_command(seed_catalogue_command)
+    app.cli.add_command(import_students_command)
+    app.cli.add_command(migrate_json_store_command)
+    app.cli.add_command(reindex_search_command)
+    app.cli.add_command(archive_students_command)
+    app.cli.add_command(ensure_session_partitions_command)
+    app.cli.add_command(detach_school_year_command)
+    app.cli.add_command(attach_school_year_command)
+    app.cli.add_command(prune_sync_operations_command)
+    app.cli.add_command(build_assets_command)
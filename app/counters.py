@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import func, select, update
+from .models import db, Student, Session
+
+
+# --- COMPTEURS DÉNORMALISÉS DES SÉANCES ---
+# students.recorded_count / unrecorded_count reflètent le nombre de séances
+# enregistrées (selected) et non enregistrées de chaque élève. Toute route qui
+# crée, supprime ou (dé)sélectionne des séances doit les ajuster dans la même
+# transaction. La suppression d'un élève emporte ses compteurs avec lui.
+
+def _actual_count(selected):
+    """Sous-requête corrélée : nombre réel de séances de l'élève courant."""
+    return (
+        select(func.count(Session.id))
+        .where(Session.student_id == Student.id, Session.selected == selected)
+        .correlate(Student)
+        .scalar_subquery()
+    )
+
+
+def bump_session_counters(student_id, recorded=0, unrecorded=0):
+    """Ajuste atomiquement les compteurs d'un élève (deltas positifs ou négatifs)."""
+    db.session.execute(
+        update(Student)
+        .where(Student.id == student_id)
+        .values(
+            recorded_count=Student.recorded_count + recorded,
+            unrecorded_count=Student.unrecorded_count + unrecorded,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_session_counters(student_ids=None, connection=None):
+    """Recalcule les compteurs depuis la table sessions, en un seul UPDATE.
+
+    Sans `student_ids`, tous les élèves sont recalculés. `connection` permet
+    d'exécuter l'UPDATE hors de db.session (base d'archive attachée, voir
+    partitions.py). Retourne le nombre de lignes mises à jour.
+    """
+    statement = update(Student).values(
+        recorded_count=_actual_count(True),
+        unrecorded_count=_actual_count(False),
+    )
+    if student_ids is not None:
+        statement = statement.where(Student.id.in_(list(student_ids)))
+    executor = connection if connection is not None else db.session
+    result = executor.execute(statement.execution_options(synchronize_session=False))
+    return result.rowcount
+
+
+def counter_drift():
+    """Liste les élèves dont les compteurs stockés divergent de la réalité."""
+    snapshot = select(
+        Student.id,
+        Student.name,
+        Student.recorded_count,
+        Student.unrecorded_count,
+        _actual_count(True).label('actual_recorded'),
+        _actual_count(False).label('actual_unrecorded'),
+    ).subquery()
+    return db.session.execute(
+        select(snapshot)
+        .where(
+            (snapshot.c.recorded_count != snapshot.c.actual_recorded)
+            | (snapshot.c.unrecorded_count != snapshot.c.actual_unrecorded)
+        )
+        .order_by(snapshot.c.id)
+    ).all()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+from collections import namedtuple
+from markupsafe import Markup
+from sqlalchemy import case, func, select
+from .models import db, Student, ProgrammeSelection
+from .catalogue import get_catalogue
+
+
+# --- COUVERTURE DU PROGRAMME (« BATTERIE ») POUR TOUTE LA CLASSE ---
+
+StudentCoverage = namedtuple('StudentCoverage', 'id name overall chapters')
+
+
+def _percent(done, total):
+    return round(100 * done / total) if total else 0
+
+
+def class_coverage():
+    """Couverture par chapitre et globale de tous les élèves non archivés.
+
+    Une seule requête agrégée, pivotée par chapitre, renvoie une ligne par
+    élève : le catalogue en cache fournit les sous-chapitres de chaque
+    chapitre, ce qui évite la jointure sur subchapters. Retourne
+    `(catalogue, [StudentCoverage])`, les pourcentages de `chapters` suivant
+    l'ordre de `catalogue.chapters`.
+    """
+    catalogue = get_catalogue()
+    per_chapter = [
+        func.count(case((ProgrammeSelection.subchapter_id.in_([sub.id for sub in chapter.subchapters]), 1)))
+        for chapter in catalogue.chapters
+    ]
+    query = (
+        select(Student.id, Student.name, *per_chapter)
+        .outerjoin(ProgrammeSelection, ProgrammeSelection.student_id == Student.id)
+        .where(Student.is_archived == db.false())
+        .group_by(Student.id, Student.name)
+    )
+
+    total = len(catalogue.subchapter_ids)
+    sizes = [len(chapter.subchapters) for chapter in catalogue.chapters]
+    coverage = []
+    for student_id, name, *done in db.session.execute(query).tuples():
+        coverage.append(StudentCoverage(
+            id=student_id,
+            name=name,
+            overall=_percent(sum(done), total),
+            chapters=tuple(_percent(count, size) for count, size in zip(done, sizes)),
+        ))
+    coverage.sort(key=lambda row: (-row.overall, row.name))
+    return catalogue, coverage
+
+
+# Les pourcentages ne prennent que 101 valeurs : chaque cellule de la carte de
+# chaleur est pré-rendue une fois, ce qui évite des dizaines de milliers
+# d'échappements Jinja sur une classe de plusieurs milliers d'élèves.
+_HEATMAP_CELLS = tuple(
+    f'<td data-value="{percent}" class="heat-{percent // 10}">{percent}%</td>' for percent in range(101)
+)
+
+
+def heatmap_cells(row):
+    """Cellules HTML (global puis chapitres) d'une ligne de la carte de chaleur."""
+    return Markup(_HEATMAP_CELLS[row.overall] + "".join(_HEATMAP_CELLS[percent] for percent in row.chapters))
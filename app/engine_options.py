@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import os
+import uuid
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
+
+
+# --- OPTIONS DU MOTEUR SQLALCHEMY (POOL DE CONNEXIONS) ---
+# Chaque worker gunicorn possède son propre pool : le nombre maximal de
+# connexions ouvertes vers la base vaut workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW).
+#
+# Variables d'environnement reconnues :
+#   DB_POOL_MODE            auto | queue | null (auto = null derrière un pooler en mode transaction)
+#   DB_POOL_SIZE            connexions gardées ouvertes par worker (défaut 5)
+#   DB_MAX_OVERFLOW         connexions supplémentaires temporaires (défaut 5)
+#   DB_POOL_TIMEOUT         attente max. d'une connexion libre, en secondes (défaut 10)
+#   DB_POOL_RECYCLE         durée de vie max. d'une connexion, en secondes (défaut 1800)
+#   DB_POOL_PRE_PING        vérifie la connexion avant usage (défaut true)
+#   DB_CONNECT_TIMEOUT      délai d'établissement de connexion, en secondes (défaut 10)
+#   DB_STATEMENT_TIMEOUT_MS durée max. d'une requête Postgres, 0 = illimitée (défaut 30000)
+
+# Port du pooler Supabase en mode transaction (le mode session utilise 5432)
+TRANSACTION_POOLER_PORT = 6543
+
+
+def _env_int(environ, name, default):
+    value = environ.get(name)
+    return default if value in (None, '') else int(value)
+
+
+def _env_bool(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def uses_transaction_pooler(url):
+    """Indique si l'URL vise un pooler en mode transaction (Supabase/pgbouncer)."""
+    return url.port == TRANSACTION_POOLER_PORT or url.query.get('pgbouncer') == 'true'
+
+
+def sync_database_url(db_uri):
+    """URL passée au moteur synchrone : sans `pgbouncer=true`, que psycopg2 refuse.
+
+    Le paramètre ne sert qu'à uses_transaction_pooler (lu sur l'URL d'origine).
+    """
+    url = make_url(db_uri)
+    if 'pgbouncer' not in url.query:
+        return db_uri
+    return url.difference_update_query(['pgbouncer']).render_as_string(hide_password=False)
+
+
+def engine_options_from_env(db_uri, environ=None):
+    """Construit SQLALCHEMY_ENGINE_OPTIONS à partir des variables d'environnement."""
+    environ = os.environ if environ is None else environ
+    url = make_url(db_uri)
+    connect_timeout = _env_int(environ, 'DB_CONNECT_TIMEOUT', 10)
+
+    if url.get_backend_name() == 'sqlite':
+        # SQLite : pas de serveur, seul le délai d'attente du verrou a un sens
+        return {"connect_args": {"timeout": connect_timeout}}
+
+    mode = environ.get('DB_POOL_MODE', 'auto').strip().lower()
+    if mode not in ('auto', 'queue', 'null'):
+        raise ValueError(f"Erreur : DB_POOL_MODE invalide ({mode!r}), attendu auto, queue ou null.")
+    transaction_pooler = uses_transaction_pooler(url)
+    if mode == 'auto':
+        mode = 'null' if transaction_pooler else 'queue'
+
+    connect_args = {}
+    options = {"connect_args": connect_args}
+    if url.get_backend_name() == 'postgresql':
+        connect_args["connect_timeout"] = connect_timeout
+        statement_timeout = _env_int(environ, 'DB_STATEMENT_TIMEOUT_MS', 30000)
+        if statement_timeout and not transaction_pooler:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+        elif statement_timeout:
+            # Un pooler en mode transaction refuse les paramètres de démarrage :
+            # le délai doit être défini sur le rôle (ALTER ROLE ... SET statement_timeout).
+            logging.getLogger(__name__).info(
+                "DB_STATEMENT_TIMEOUT_MS ignoré derrière un pooler en mode transaction."
+            )
+
+    if mode == 'null':
+        # Le pooler externe mutualise déjà les connexions : on n'en garde aucune
+        options["poolclass"] = NullPool
+        return options
+
+    options.update(
+        pool_size=_env_int(environ, 'DB_POOL_SIZE', 5),
+        max_overflow=_env_int(environ, 'DB_MAX_OVERFLOW', 5),
+        pool_timeout=_env_int(environ, 'DB_POOL_TIMEOUT', 10),
+        pool_recycle=_env_int(environ, 'DB_POOL_RECYCLE', 1800),
+        pool_pre_ping=_env_bool(environ, 'DB_POOL_PRE_PING', True),
+    )
+    return options
+
+
+# --- MOTEUR ASYNCHRONE (API ASGI) ---
+# Même base et mêmes réglages de pool, avec les pilotes asyncpg / aiosqlite.
+
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+
+def async_database_url(db_uri):
+    """Convertit une URL SQLAlchemy synchrone en URL du pilote asynchrone équivalent."""
+    url = make_url(db_uri)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Erreur : pas de pilote asynchrone pour la base {backend!r}.")
+    query = {key: value for key, value in url.query.items() if key not in ('pgbouncer', 'connect_timeout')}
+    if 'sslmode' in query:
+        # asyncpg attend `ssl` (mêmes valeurs : require, verify-full, ...)
+        query['ssl'] = query.pop('sslmode')
+    return url.set(drivername=ASYNC_DRIVERS[backend], query=query)
+
+
+def async_engine_options_from_env(db_uri, environ=None):
+    """Options de create_async_engine : celles du moteur synchrone, adaptées au pilote."""
+    environ = os.environ if environ is None else environ
+    options = engine_options_from_env(db_uri, environ)
+    url = make_url(db_uri)
+    if url.get_backend_name() != 'postgresql':
+        return options
+
+    connect_args = {"timeout": _env_int(environ, 'DB_CONNECT_TIMEOUT', 10)}
+    statement_timeout = options["connect_args"].get("options")
+    if statement_timeout:
+        connect_args["server_settings"] = {"statement_timeout": statement_timeout.rpartition('=')[2]}
+    if uses_transaction_pooler(url):
+        # Les requêtes préparées d'asyncpg ne survivent pas au changement de connexion du pooler
+        connect_args["statement_cache_size"] = 0
+        connect_args["prepared_statement_cache_size"] = 0
+        connect_args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    options["connect_args"] = connect_args
+    return options
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+from sqlalchemy import select
+from .models import db, Student, Session
+
+
+# --- EXPORT EN FLUX DES REMARQUES (CSV / NDJSON) ---
+# Les lignes sont lues par paquets via un curseur côté serveur (yield_per /
+# stream_results) et envoyées au fil de l'eau : la mémoire du worker reste
+# constante quelle que soit la taille de la table sessions.
+# Le CSV reprend les colonnes de l'import (app/importer.py) et peut donc être réimporté.
+
+EXPORT_COLUMNS = ('session_id', 'student_ref', 'name', 'school_name', 'birth_date', 'phone_number',
+                  'date', 'remark', 'selected')
+
+
+def export_query(student_id=None, start=None, end=None):
+    """Séances (avec leur élève) filtrées par élève et/ou intervalle de dates, dans l'ordre des id."""
+    query = (
+        select(
+            Session.id, Session.student_id, Student.name, Student.school_name, Student.birth_date,
+            Student.phone_number, Session.date, Session.remark, Session.selected,
+        )
+        .join(Student, Student.id == Session.student_id)
+        .order_by(Session.id)
+    )
+    if student_id is not None:
+        query = query.where(Session.student_id == student_id)
+    if start is not None:
+        query = query.where(Session.date >= start)
+    if end is not None:
+        query = query.where(Session.date <= end)
+    return query
+
+
+def _rows(query, chunk_size):
+    result = db.session.execute(query.execution_options(yield_per=chunk_size, stream_results=True))
+    try:
+        for partition in result.partitions():
+            yield partition
+    finally:
+        result.close()
+
+
+def _csv_chunks(query, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for partition in _rows(query, chunk_size):
+        for row in partition:
+            writer.writerow((row.id, row.student_id, row.name, row.school_name or '', row.birth_date or '',
+                             row.phone_number or '', row.date.isoformat(), row.remark or '',
+                             1 if row.selected else 0))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(query, chunk_size):
+    for partition in _rows(query, chunk_size):
+        yield "".join(
+            json.dumps({
+                'session_id': row.id, 'student_ref': row.student_id, 'name': row.name,
+                'school_name': row.school_name, 'birth_date': row.birth_date,
+                'phone_number': row.phone_number, 'date': row.date.isoformat(),
+                'remark': row.remark, 'selected': row.selected,
+            }, ensure_ascii=False) + "\n"
+            for row in partition
+        )
+
+
+EXPORTERS = {
+    'csv': (_csv_chunks, 'text/csv; charset=utf-8'),
+    'ndjson': (_ndjson_chunks, 'application/x-ndjson; charset=utf-8'),
+}
+
+
+def export_chunks(fmt, query, chunk_size=1000):
+    """Retourne `(générateur de morceaux de texte, Content-Type complet)` pour le format demandé."""
+    if fmt not in EXPORTERS:
+        raise ValueError(f"Format inconnu : {fmt!r} (attendu csv ou ndjson)")
+    generate, content_type = EXPORTERS[fmt]
+    return generate(query, chunk_size), content_type
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, render_template
+from markupsafe import Markup
+from .metrics import Counter, Gauge, registry
+
+
+# --- CACHE DES FRAGMENTS RENDUS (GRILLE DES ÉLÈVES, LISTE DES SÉANCES) ---
+# Un fragment est mis en cache sous une clé qui contient la version de la page
+# déjà lue par conditional_get pour l'ETag (versions.py) :
+#   grille des élèves   : nombre d'élèves + somme de students.generation
+#   séances d'un élève  : students.updated_at de l'élève
+# Chaque route d'écriture (ajout d'élève ou de séance, edit_remark,
+# delete_remark, update_info, /sync, archivage, suppression, import)
+# modifie la ligne de l'élève dans sa transaction : la version change, la
+# clé aussi, et seul le fragment concerné est recalculé. Ce numéro de
+# génération est lu dans la base : il est partagé par tous les workers sans
+# stockage supplémentaire, et les anciennes entrées sortent par LRU/TTL.
+#
+# Deux niveaux : un LRU en mémoire dans chaque worker (nombre d'entrées,
+# taille totale et durée de vie bornés), puis, en option, un cache partagé
+# entre workers (Redis). Les clés étant versionnées, leur contenu ne change
+# jamais : les deux niveaux ne peuvent pas se contredire. Les clés sont
+# préfixées par ETAG_SALT (nouveau gabarit à chaque déploiement) : à défaut
+# de variable, c'est l'empreinte du code et des gabarits, la même dans tous
+# les workers et toutes les instances d'un déploiement.
+#
+# Configuration :
+#   FRAGMENT_CACHE             local | redis | off (défaut local)
+#   FRAGMENT_CACHE_MAX_ENTRIES entrées du LRU local (défaut 1000)
+#   FRAGMENT_CACHE_MAX_BYTES   taille totale du LRU local (défaut 32 Mo)
+#   FRAGMENT_CACHE_TTL         durée de vie d'une entrée, en secondes (défaut 600)
+#   FRAGMENT_CACHE_REDIS_URL   URL du cache partagé (défaut REDIS_URL)
+
+FRAGMENT_REQUESTS = registry.register(Counter(
+    'fragment_cache_requests_total', "Lectures du cache de fragments (hit_local, hit_shared, miss).",
+    ('fragment', 'result')))
+
+
+class LocalFragmentCache:
+    """LRU en mémoire borné en nombre d'entrées, en taille totale et en durée de vie."""
+
+    def __init__(self, max_entries=1000, max_bytes=32 * 1024 * 1024, ttl=600):
+        self.max_entries, self.max_bytes, self.ttl = max_entries, max_bytes, ttl
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size}
+
+
+class RedisFragmentCache:
+    """Cache partagé entre workers (client redis importé seulement si ce niveau est configuré)."""
+
+    def __init__(self, url, ttl=600):
+        import redis
+
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key):
+        try:
+            value = self._client.get(key)
+        except Exception:  # noqa: BLE001 — le cache ne doit jamais faire échouer une page
+            return None
+        return value.decode('utf-8') if value is not None else None
+
+    def set(self, key, value):
+        try:
+            self._client.set(key, value.encode('utf-8'), ex=int(self.ttl))
+        except Exception:  # noqa: BLE001
+            pass
+
+
+class FragmentCache:
+    """Cache à deux niveaux des fragments de gabarits, interrogé par `cached_fragment`."""
+
+    def __init__(self, local, shared=None, namespace=''):
+        self.local, self.shared, self.namespace = local, shared, namespace
+
+    def key(self, name, version):
+        raw = "|".join(str(part) for part in (self.namespace, name, *version))
+        return f"fragment:{name}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+    def get(self, name, key):
+        value = self.local.get(key)
+        if value is not None:
+            FRAGMENT_REQUESTS.inc(name, 'hit_local')
+            return value
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                FRAGMENT_REQUESTS.inc(name, 'hit_shared')
+                self.local.set(key, value)
+                return value
+        FRAGMENT_REQUESTS.inc(name, 'miss')
+        return None
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value)
+
+
+def cached_fragment(name, template, build):
+    """Rend `template` avec les variables de `build()`, ou reprend le fragment du cache.
+
+    `build` retourne `(variables du gabarit, extra)` ; `extra` (valeur JSON,
+    par exemple un curseur de pagination) est conservé avec le fragment. La
+    version est celle posée par conditional_get dans `g.resource_version` :
+    sans elle, le fragment est rendu sans cache. Retourne `(Markup, extra)`.
+    """
+    cache = current_app.extensions.get('fragment_cache')
+    version = g.get('resource_version')
+    key = cache.key(name, version) if cache is not None and version is not None else None
+    if key is not None:
+        cached = cache.get(name, key)
+        if cached is not None:
+            entry = json.loads(cached)
+            return Markup(entry['html']), entry['extra']
+
+    variables, extra = build()
+    html = render_template(template, **variables)
+    if key is not None:
+        cache.set(key, json.dumps({"html": html, "extra": extra}))
+    return Markup(html), extra
+
+
+def _local_samples(cache):
+    def collect():
+        return [((name,), value) for name, value in cache.local.stats().items()]
+    return collect
+
+
+def init_fragment_cache(app):
+    """Crée le cache de fragments selon la configuration (app.extensions['fragment_cache'])."""
+    mode = app.config['FRAGMENT_CACHE']
+    if mode not in ('local', 'redis', 'off'):
+        raise ValueError(f"Erreur : FRAGMENT_CACHE invalide ({mode!r}), attendu local, redis ou off.")
+    if mode == 'off':
+        return
+    ttl = app.config['FRAGMENT_CACHE_TTL']
+    local = LocalFragmentCache(app.config['FRAGMENT_CACHE_MAX_ENTRIES'], app.config['FRAGMENT_CACHE_MAX_BYTES'], ttl)
+    shared = None
+    if mode == 'redis':
+        url = app.config['FRAGMENT_CACHE_REDIS_URL']
+        if not url:
+            raise ValueError("Erreur : FRAGMENT_CACHE=redis exige FRAGMENT_CACHE_REDIS_URL (ou REDIS_URL).")
+        shared = RedisFragmentCache(url, ttl)
+    # Le sel des ETag change à chaque déploiement : un gabarit modifié n'est jamais servi depuis l'ancien cache
+    cache = FragmentCache(local, shared, namespace=app.config['ETAG_SALT'])
+    app.extensions['fragment_cache'] = cache
+    registry.register(Gauge('fragment_cache_local', "Occupation du cache local de fragments.", ('measure',),
+                            _local_samples(cache)))
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from sqlalchemy import text
+from .models import db
+
+
+# --- VÉRIFICATION DE SANTÉ DE LA BASE (PING) ---
+# Le ping réutilise le pool de connexions de l'application au lieu d'ouvrir
+# une connexion dédiée, et son résultat est mis en cache pendant
+# PING_CACHE_TTL secondes : un pinger très fréquent ne consomme donc
+# qu'une requête SELECT 1 par période, par worker.
+
+class DatabaseHealth:
+    """Résultat de ping mis en cache et historique des latences (par processus)."""
+
+    def __init__(self, window=500):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+        self._result = None
+        self._checked_at = 0.0
+
+    def check(self, ttl):
+        """Retourne `(ok, rapport)` ; ne sonde la base que si le cache a expiré."""
+        with self._lock:
+            age = time.monotonic() - self._checked_at
+            cached = self._result is not None and age < ttl
+            if not cached:
+                self._result = self._probe()
+                self._checked_at = time.monotonic()
+                age = 0.0
+            ok, report = self._result
+
+        report = dict(report, cached=cached, age_seconds=round(age, 3))
+        report['latency_ms'] = self._latency_stats()
+        report['pool'] = pool_statistics(db.engine.pool)
+        return ok, report
+
+    def _probe(self):
+        checked_at = datetime.now(timezone.utc).isoformat()
+        started = time.perf_counter()
+        try:
+            with db.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+        except Exception as e:
+            return False, {"error": str(e), "checked_at": checked_at}
+        self._latencies.append((time.perf_counter() - started) * 1000)
+        return True, {"message": "Database ping successful", "checked_at": checked_at}
+
+    def _latency_stats(self):
+        samples = sorted(self._latencies)
+        if not samples:
+            return {"samples": 0}
+        return {
+            "samples": len(samples),
+            "last": round(self._latencies[-1], 3),
+            "p50": round(_percentile(samples, 50), 3),
+            "p95": round(_percentile(samples, 95), 3),
+            "p99": round(_percentile(samples, 99), 3),
+        }
+
+
+def _percentile(sorted_samples, percent):
+    """Percentile par rang le plus proche sur une liste triée."""
+    rank = max(0, -(-len(sorted_samples) * percent // 100) - 1)
+    return sorted_samples[int(rank)]
+
+
+def pool_statistics(pool):
+    """Statistiques du pool SQLAlchemy (les pools sans file d'attente en exposent moins)."""
+    stats = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        method = getattr(pool, name, None)
+        if callable(method):
+            stats[name.replace("checked", "checked_")] = method()
+    return stats
+
+
+database_health = DatabaseHealth()
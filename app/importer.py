@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import io
+import json
+import time
+from collections import namedtuple
+from datetime import date, datetime
+from sqlalchemy import insert
+from .models import db, Student, Session
+from .counters import refresh_session_counters
+
+
+# --- IMPORT EN MASSE D'ÉLÈVES ET D'HISTORIQUE DE SÉANCES ---
+# Formats acceptés (UTF-8) :
+#   CSV    : en-tête student_ref,name,school_name,birth_date,phone_number,date,remark,selected
+#            une ligne par séance ; une ligne sans remarque ni date ne crée que l'élève.
+#   NDJSON : un élève par ligne, {"ref", "name", ..., "sessions": [{"date", "remark", "selected"}]}
+#
+# L'entrée est lue en flux et chargée par lots : chaque lot (élèves nouveaux
+# puis séances) est écrit par INSERT multi-lignes — COPY sur Postgres — et
+# validé dans sa propre transaction. La mémoire reste bornée par la taille du
+# lot, plus la table de correspondance référence -> id des élèves importés.
+
+STUDENT_FIELDS = ('name', 'school_name', 'birth_date', 'phone_number')
+TRUE_VALUES = {'1', 'true', 'vrai', 'oui', 'yes', 'x'}
+DATE_FORMATS = ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d %H:%M:%S')
+
+ImportReport = namedtuple('ImportReport', 'students sessions batches seconds rows_per_second')
+
+
+def _parse_date(value, line):
+    if not value:
+        return date.today()
+    if isinstance(value, date):
+        return value
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Ligne {line} : date invalide {value!r}")
+
+
+def _parse_selected(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def _student_fields(record, line):
+    name = (record.get('name') or '').strip()
+    if not name:
+        raise ValueError(f"Ligne {line} : le nom de l'élève est obligatoire")
+    fields = {field: (record.get(field) or '').strip() or None for field in STUDENT_FIELDS}
+    fields['name'] = name
+    return fields
+
+
+def _session_fields(record, line):
+    return {
+        'remark': (record.get('remark') or '').strip() or None,
+        'date': _parse_date(record.get('date'), line),
+        'selected': _parse_selected(record.get('selected')),
+    }
+
+
+def parse_csv(stream):
+    """Lit un flux CSV binaire et produit `(réf, champs élève, séance ou None)`."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    for line, record in enumerate(reader, start=2):
+        ref = (record.get('student_ref') or record.get('name') or '').strip()
+        has_session = bool((record.get('remark') or '').strip() or (record.get('date') or '').strip())
+        yield ref, _student_fields(record, line), _session_fields(record, line) if has_session else None
+
+
+def parse_ndjson(stream):
+    """Lit un flux NDJSON binaire (un élève par ligne) et produit les mêmes tuples que parse_csv."""
+    for line, raw in enumerate(io.TextIOWrapper(stream, encoding='utf-8-sig'), start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Ligne {line} : JSON invalide ({e.msg})")
+        ref = str(record.get('ref') or record.get('name') or '').strip()
+        fields = _student_fields(record, line)
+        sessions = record.get('sessions') or []
+        if not sessions:
+            yield ref, fields, None
+        for session in sessions:
+            yield ref, fields, _session_fields(session, line)
+
+
+def parse_json_store(data):
+    """Parcourt le contenu du stockage JSON (app/utils.load_data) et produit les mêmes tuples.
+
+    Les séances d'un élève absent de "students" sont ignorées.
+    """
+    selected = {
+        str(student_id): {str(session_id) for session_id in session_ids or ()}
+        for student_id, session_ids in (data.get("selected_sessions") or {}).items()
+    }
+    sessions_by_student = {}
+    for session in data.get("sessions", []):
+        sessions_by_student.setdefault(str(session.get("student_id")), []).append(session)
+
+    for line, student in enumerate(data.get("students", []), start=1):
+        ref = str(student.get("id"))
+        fields = _student_fields(student, f"élève {ref}")
+        sessions = sessions_by_student.get(ref, [])
+        if not sessions:
+            yield ref, fields, None
+        for session in sessions:
+            record = dict(session, selected=str(session.get("id")) in selected.get(ref, ()))
+            yield ref, fields, _session_fields(record, f"séance {session.get('id')}")
+
+
+PARSERS = {'csv': parse_csv, 'ndjson': parse_ndjson}
+
+
+class _BatchLoader:
+    """Accumule élèves et séances, puis les écrit par lots d'une transaction chacun."""
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.student_ids = {}
+        self.pending_students = {}
+        self.pending_sessions = []
+        self.students = self.sessions = self.batches = 0
+        self.use_copy = db.session.get_bind().dialect.driver == 'psycopg2'
+
+    def add(self, ref, student, session):
+        if ref not in self.student_ids and ref not in self.pending_students:
+            self.pending_students[ref] = student
+        if session is not None:
+            self.pending_sessions.append((ref, session))
+        if len(self.pending_sessions) + len(self.pending_students) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending_students and not self.pending_sessions:
+            return
+        try:
+            self._write_students()
+            touched = self._write_sessions()
+            if touched:
+                refresh_session_counters(touched)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        self.batches += 1
+
+    def _write_students(self):
+        if not self.pending_students:
+            return
+        refs = list(self.pending_students)
+        # INSERT multi-lignes avec RETURNING, dans l'ordre des paramètres
+        ids = db.session.execute(
+            insert(Student).returning(Student.id, sort_by_parameter_order=True),
+            [self.pending_students[ref] for ref in refs],
+        ).scalars().all()
+        self.student_ids.update(zip(refs, ids))
+        self.students += len(refs)
+        self.pending_students = {}
+
+    def _write_sessions(self):
+        if not self.pending_sessions:
+            return set()
+        rows = [dict(session, student_id=self.student_ids[ref]) for ref, session in self.pending_sessions]
+        if self.use_copy:
+            self._copy_sessions(rows)
+        else:
+            db.session.execute(insert(Session), rows)
+        self.sessions += len(rows)
+        self.pending_sessions = []
+        return {row['student_id'] for row in rows}
+
+    def _copy_sessions(self, rows):
+        """COPY ... FROM STDIN (Postgres/psycopg2) dans la transaction de la session."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow((row['student_id'], row['remark'], row['date'].isoformat(), 't' if row['selected'] else 'f'))
+        buffer.seek(0)
+        cursor = db.session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                "COPY sessions (student_id, remark, date, selected) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+
+def import_stream(stream, fmt, batch_size=5000):
+    """Importe un flux CSV/NDJSON ; chaque lot est validé séparément. Retourne un ImportReport.
+
+    En cas d'erreur (ValueError avec le numéro de ligne), le lot en cours est
+    annulé ; les lots précédents restent enregistrés.
+    """
+    if fmt not in PARSERS:
+        raise ValueError(f"Format inconnu : {fmt!r} (attendu csv ou ndjson)")
+    return import_records(PARSERS[fmt](stream), batch_size)
+
+
+def import_records(records, batch_size=5000):
+    """Charge des tuples `(réf, champs élève, séance ou None)` par lots. Retourne un ImportReport."""
+    started = time.perf_counter()
+    loader = _BatchLoader(batch_size)
+    try:
+        for ref, student, session in records:
+            loader.add(ref, student, session)
+    except ValueError:
+        db.session.rollback()
+        raise
+    loader.flush()
+
+    seconds = time.perf_counter() - started
+    rows = loader.students + loader.sessions
+    return ImportReport(
+        students=loader.students,
+        sessions=loader.sessions,
+        batches=loader.batches,
+        seconds=round(seconds, 3),
+        rows_per_second=round(rows / seconds) if seconds else rows,
+    )
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+
+import logging
+import threading
+import time
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from .models import db
+from .health import pool_statistics
+
+
+# --- MÉTRIQUES PAR REQUÊTE (FORMAT TEXTE PROMETHEUS SUR /metrics) ---
+# Pour chaque endpoint : histogramme des latences, nombre de requêtes SQL par
+# requête HTTP (un N+1 se voit immédiatement), temps SQL cumulé et temps
+# d'attente d'une connexion du pool. L'attente du pool est mesurée entre
+# l'événement do_orm_execute (avant la première requête de la transaction) et
+# l'événement checkout du pool (connexion obtenue).
+#
+# Les valeurs sont tenues en mémoire, par processus : avec plusieurs workers
+# gunicorn, chaque extraction ne voit que le worker qui répond.
+#
+# Configuration :
+#   METRICS_ENABLED   active l'instrumentation et /metrics (défaut true)
+#   METRICS_TOKEN     si défini, /metrics exige « Authorization: Bearer <jeton> »
+#   SLOW_REQUEST_MS   journalise (avec leurs requêtes SQL) les requêtes plus lentes, 0 = désactivé
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur monotone, décliné par étiquettes."""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [(self.name, _labels(self.labelnames, labels), value) for labels, value in items]
+
+
+class Gauge(Counter):
+    """Valeur instantanée, fournie par une fonction au moment de l'extraction."""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), collect=None):
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def samples(self):
+        if self._collect is not None:
+            for labels, value in self._collect():
+                self.set(*labels, value=value)
+        return super().samples()
+
+
+class Histogram:
+    """Histogramme à seaux cumulés (_bucket, _sum, _count)."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self._lock:
+            series = self._values.setdefault(labels, [[0] * len(self.buckets), 0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count) in self._values.items())
+        samples = []
+        for labels, (counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, counts):
+                samples.append((f"{self.name}_bucket", _labels(self.labelnames, labels, [("le", _number(bound))]),
+                                bucket_count))
+            samples.append((f"{self.name}_bucket", _labels(self.labelnames, labels, [("le", "+Inf")]), count))
+            samples.append((f"{self.name}_sum", _labels(self.labelnames, labels), total))
+            samples.append((f"{self.name}_count", _labels(self.labelnames, labels), count))
+        return samples
+
+
+class Registry:
+    """Ensemble des métriques exposées sur /metrics."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    'http_request_duration_seconds', "Durée de traitement des requêtes HTTP.", ('endpoint', 'method')))
+REQUESTS = registry.register(Counter(
+    'http_requests_total', "Requêtes HTTP traitées.", ('endpoint', 'method', 'status')))
+SQL_PER_REQUEST = registry.register(Histogram(
+    'db_statements_per_request', "Nombre de requêtes SQL par requête HTTP.", ('endpoint',), STATEMENT_BUCKETS))
+SQL_STATEMENTS = registry.register(Counter(
+    'db_statements_total', "Requêtes SQL exécutées.", ('endpoint',)))
+SQL_SECONDS = registry.register(Counter(
+    'db_statement_seconds_total', "Temps cumulé passé dans les requêtes SQL.", ('endpoint',)))
+POOL_WAIT = registry.register(Histogram(
+    'db_pool_wait_seconds', "Attente d'une connexion du pool.", ('endpoint',), POOL_WAIT_BUCKETS))
+SLOW_REQUESTS = registry.register(Counter(
+    'http_slow_requests_total', "Requêtes plus lentes que SLOW_REQUEST_MS.", ('endpoint',)))
+
+
+def _pool_samples():
+    stats = pool_statistics(db.engine.pool)
+    return [((name,), value) for name, value in stats.items() if isinstance(value, int)]
+
+
+# --- COLLECTE ---
+
+_orm_execute = threading.local()
+
+
+def _endpoint():
+    # Les URL inconnues sont regroupées pour borner le nombre de séries
+    return request.endpoint or '<unmatched>'
+
+
+def _request_stats():
+    return g.get('_metrics') if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # La connexion est obtenue : un checkout ultérieur ne se rapporte plus à ce do_orm_execute
+    _orm_execute.started = None
+    conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _request_stats()
+    if stats is None:
+        return
+    stats['statements'] += 1
+    stats['sql_seconds'] += elapsed
+    if stats['trace'] is not None:
+        stats['trace'].append((elapsed, statement))
+
+
+def _do_orm_execute(orm_execute_state):
+    _orm_execute.started = time.perf_counter()
+
+
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    started = getattr(_orm_execute, 'started', None)
+    _orm_execute.started = None
+    stats = _request_stats()
+    if started is not None and stats is not None:
+        stats['pool_wait'] += time.perf_counter() - started
+
+
+def _before_request():
+    g._metrics = {
+        'started': time.perf_counter(),
+        'statements': 0,
+        'sql_seconds': 0.0,
+        'pool_wait': 0.0,
+        'trace': [] if current_app.config['SLOW_REQUEST_MS'] else None,
+    }
+
+
+def _after_request(response):
+    stats = g.pop('_metrics', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats['started']
+    endpoint = _endpoint()
+    REQUEST_LATENCY.observe(endpoint, request.method, value=elapsed)
+    REQUESTS.inc(endpoint, request.method, str(response.status_code))
+    SQL_PER_REQUEST.observe(endpoint, value=stats['statements'])
+    SQL_STATEMENTS.inc(endpoint, amount=stats['statements'])
+    SQL_SECONDS.inc(endpoint, amount=stats['sql_seconds'])
+    POOL_WAIT.observe(endpoint, value=stats['pool_wait'])
+
+    slow_ms = current_app.config['SLOW_REQUEST_MS']
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        SLOW_REQUESTS.inc(endpoint)
+        statements = "\n".join(
+            f"  {seconds * 1000:8.2f} ms  {' '.join(statement.split())[:500]}"
+            for seconds, statement in stats['trace']
+        )
+        logger.warning(
+            "Requête lente : %s %s (%s) %.1f ms, %d requête(s) SQL en %.1f ms, attente du pool %.1f ms\n%s",
+            request.method, request.full_path.rstrip('?'), endpoint, elapsed * 1000, stats['statements'],
+            stats['sql_seconds'] * 1000, stats['pool_wait'] * 1000, statements,
+        )
+    return response
+
+
+def metrics_view():
+    """Métriques du worker au format texte Prometheus."""
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return Response("Non autorisé\n", status=401, mimetype='text/plain')
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def init_metrics(app):
+    """Installe les hooks de mesure (requêtes HTTP, SQL, pool) et la route /metrics."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    registry.register(Gauge('db_pool_connections', "État du pool de connexions.", ('state',), _pool_samples))
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    # Primaire et, si elle est configurée, réplique en lecture (replica.py)
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(engine.pool, 'checkout', _checkout)
+    # db.session est global (contrairement aux moteurs, propres à chaque application) :
+    # un seul écouteur, quel que soit le nombre d'appels à create_app()
+    if not event.contains(db.session, 'do_orm_execute', _do_orm_execute):
+        event.listen(db.session, 'do_orm_execute', _do_orm_execute)
@@ -1,9 +1,32 @@
 # -*- coding: utf-8 -*-
 
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as FlaskSession
 from datetime import datetime, timezone, date # Importons 'date' explicitement pour plus de clarté
 
-db = SQLAlchemy()
+# Bind Flask-SQLAlchemy de la réplique en lecture (DATABASE_READ_URL, voir replica.py)
+REPLICA_BIND = 'replica'
+
+
+class RoutingSession(FlaskSession):
+    """Session de db.session : lit sur la réplique pendant les requêtes marquées en lecture seule."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Un flush (écriture) part toujours vers le primaire
+        if bind is None and not self._flushing and has_request_context() and g.get('db_target') == 'replica':
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+
+
+def _utcnow():
+    return datetime.now(timezone.utc)
+
 
 class Student(db.Model):
     __tablename__ = 'students'
@@ -15,11 +38,21 @@ class Student(db.Model):
     phone_number = db.Column(db.String(20), nullable=True)
     is_archived = db.Column(db.Boolean, default=False, nullable=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    # Date de dernière modification : sert de jeton de version aux pages (voir versions.py)
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow, server_default=db.func.now(),
+                           nullable=False)
+
+    # Compteurs dénormalisés des séances, maintenus par les routes d'écriture (voir counters.py)
+    recorded_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    unrecorded_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # Génération de la ligne, attribuée par déclencheur à chaque écriture (voir versions.py)
+    generation = db.Column(db.BigInteger, server_default='0', nullable=False, index=True)
 
     sessions = db.relationship('Session', backref='student', lazy=True, cascade="all, delete-orphan")
 
 
 class Session(db.Model):
+    # Postgres : table partitionnée par année scolaire, clé primaire (id, date) (voir partitions.py)
     __tablename__ = 'sessions'
 
     id = db.Column(db.Integer, primary_key=True)
@@ -30,13 +63,71 @@ class Session(db.Model):
     date = db.Column(db.Date, default=date.today, nullable=False)
     
     selected = db.Column(db.Boolean, default=False, nullable=False)
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow, server_default=db.func.now(),
+                           nullable=False)
+
+
+class Chapter(db.Model):
+    __tablename__ = 'chapters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255), nullable=False)
+
+    subchapters = db.relationship('Subchapter', backref='chapter', lazy=True, order_by='Subchapter.position')
+
+
+class Subchapter(db.Model):
+    __tablename__ = 'subchapters'
+
+    id = db.Column(db.Integer, primary_key=True)
+    chapter_id = db.Column(db.Integer, db.ForeignKey('chapters.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    title = db.Column(db.String(255), nullable=False)
 
 
 class ProgrammeSelection(db.Model):
     __tablename__ = "selections_maths_2bac"
-    
+    # Un sous-chapitre n'est sélectionné qu'une fois par élève (sauvegardes concurrentes idempotentes)
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'subchapter_id', name='uq_selections_maths_2bac_student_subchapter'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
-    chapter_name = db.Column(db.String(255), nullable=False)
+    subchapter_id = db.Column(db.Integer, db.ForeignKey('subchapters.id'), nullable=False)
+    updated_at = db.Column(db.DateTime, default=_utcnow, onupdate=_utcnow, server_default=db.func.now(),
+                           nullable=False)
+
+    student = db.relationship("Student", backref="programme_selections")
+    subchapter = db.relationship("Subchapter")
+
+
+class SyncOperation(db.Model):
+    """Opération hors ligne déjà appliquée par /sync (idempotence des rejeux, voir sync.py)."""
+    __tablename__ = 'sync_operations'
+
+    # Identifiant généré par le navigateur (UUID)
+    op_id = db.Column(db.String(64), primary_key=True)
+    op_type = db.Column(db.String(20), nullable=False)
+    # Pas de clé étrangère : le résultat reste rejouable après la suppression de l'élève
+    student_id = db.Column(db.Integer, nullable=True)
+    result = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=_utcnow, nullable=False, index=True)
+
 
-    student = db.relationship("Student", backref="programme_selections")
\ No newline at end of file
+# --- INDEX DES CHEMINS CHAUDS ---
+# Remarques d'un élève : filtre sur student_id, tri sur (selected, id desc)
+db.Index('ix_sessions_student_selected_id', Session.student_id, Session.selected, Session.id.desc())
+# Programme d'un élève : couvert par la contrainte unique (student_id, subchapter_id)
+# Catalogue : sous-chapitres d'un chapitre dans l'ordre d'affichage
+db.Index('ix_subchapters_chapter_position', Subchapter.chapter_id, Subchapter.position)
+# Listes d'élèves : index partiels limités aux élèves actifs / archivés
+db.Index('ix_students_active_created_at', Student.created_at, Student.id,
+         postgresql_where=Student.is_archived == db.false(), sqlite_where=Student.is_archived == db.false())
+db.Index('ix_students_active_name', Student.name,
+         postgresql_where=Student.is_archived == db.false(), sqlite_where=Student.is_archived == db.false())
+db.Index('ix_students_archived_name', Student.name,
+         postgresql_where=Student.is_archived == db.true(), sqlite_where=Student.is_archived == db.true())
+# Version de la liste des élèves (GET conditionnel de /students) : max(updated_at)
+db.Index('ix_students_updated_at', Student.updated_at)
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+import os
+from datetime import date
+from sqlalchemy import text
+from .models import db, Session
+from .counters import refresh_session_counters
+
+
+# --- PARTITIONNEMENT DES SÉANCES PAR ANNÉE SCOLAIRE ---
+# Postgres : depuis la migration a9d4e2b7c615, `sessions` est partitionnée par
+# intervalle sur `date`, une partition par année scolaire (1er septembre au
+# 31 août) : sessions_sy2024 couvre [2024-09-01, 2025-09-01). La partition
+# sessions_default reçoit les lignes hors des années créées, pour qu'une
+# insertion n'échoue jamais ; `flask ensure-session-partitions` (phase release
+# du Procfile) crée l'année en cours et les suivantes et y déplace ces lignes.
+# La clé primaire est (id, date) ; l'ORM continue d'identifier une séance par id.
+# Une requête filtrée sur une année (session_group_query(..., school_year=),
+# export par dates) ne lit que la partition de cette année. Les séances d'un
+# élève (page des remarques, « Charger plus », API) sont donc limitées par
+# défaut à l'année scolaire en cours ; ?school_year=all les affiche toutes
+# (une lecture par partition).
+#
+# Les années anciennes se détachent (`flask detach-school-year 2021`) : la
+# partition devient une table autonome (à sauvegarder avec pg_dump -t puis
+# supprimer, ou à rattacher avec `flask attach-school-year`). Ses lignes ne
+# sont plus visibles dans l'application.
+#
+# SQLite n'a pas de partitionnement : les mêmes commandes déplacent les
+# séances de l'année dans une base par année (SESSIONS_ARCHIVE_DIR,
+# sessions_2021-2022.db) attachée le temps du transfert.
+#
+# Dans tous les cas, les compteurs des élèves concernés sont recalculés dans
+# la même transaction (ce qui modifie updated_at : ETag et fragments invalidés).
+
+SCHOOL_YEAR_START_MONTH = 9
+DEFAULT_PARTITION = 'sessions_default'
+# Attente maximale du verrou exclusif de sessions pendant les opérations de partitionnement
+LOCK_TIMEOUT = '5s'
+COLUMNS = "id, student_id, remark, date, selected, updated_at"
+# Valeur de ?school_year= pour afficher toutes les années
+ALL_SCHOOL_YEARS = 'all'
+
+
+def school_year_of(day):
+    """Année scolaire (année de la rentrée) d'une date."""
+    return day.year if day.month >= SCHOOL_YEAR_START_MONTH else day.year - 1
+
+
+def school_year_bounds(year):
+    """Intervalle [début, fin) des dates de l'année scolaire `year`."""
+    return date(year, SCHOOL_YEAR_START_MONTH, 1), date(year + 1, SCHOOL_YEAR_START_MONTH, 1)
+
+
+def school_year_label(year):
+    return f"{year}-{year + 1}"
+
+
+def parse_school_year(value):
+    """Année scolaire depuis « 2024 » ou « 2024-2025 ». Lève ValueError si elle est invalide."""
+    first, _, second = str(value).strip().partition('-')
+    if not first.isdigit() or (second and second != str(int(first) + 1)) or not 1900 < int(first) < 3000:
+        raise ValueError(f"Année scolaire invalide : {value!r} (attendu 2024 ou 2024-2025)")
+    return int(first)
+
+
+def requested_school_year(value, today=None):
+    """Année scolaire d'un paramètre ?school_year= : l'année en cours si vide, None pour « all ».
+
+    Lève ValueError si la valeur est invalide.
+    """
+    value = (value or '').strip()
+    if not value:
+        return school_year_of(today or date.today())
+    if value.lower() == ALL_SCHOOL_YEARS:
+        return None
+    return parse_school_year(value)
+
+
+def school_years_between(first_day, last_day):
+    """Années scolaires couvertes par deux dates, la plus récente en tête."""
+    return list(range(school_year_of(last_day), school_year_of(first_day) - 1, -1))
+
+
+def partition_name(year):
+    return f"sessions_sy{year}"
+
+
+def _archive_path(archive_dir, year):
+    return os.path.join(archive_dir, f"sessions_{school_year_label(year)}.db")
+
+
+# --- POSTGRES : PARTITIONS NATIVES ---
+
+def is_partitioned():
+    """Vrai si la table sessions est partitionnée (Postgres après la migration)."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return False
+    kind = db.session.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('sessions')")).scalar()
+    return kind == 'p'
+
+
+def session_partitions():
+    """Partitions rattachées à sessions : liste de `(nom, bornes)` dans l'ordre des noms."""
+    return db.session.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = 'sessions'::regclass ORDER BY c.relname"
+    )).all()
+
+
+def _table_exists(name):
+    return db.session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None
+
+
+def _lock_timeout():
+    db.session.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+
+
+def _create_partition(year):
+    """Crée la partition d'une année et y déplace les lignes tombées dans la partition par défaut."""
+    start, end = school_year_bounds(year)
+    name = partition_name(year)
+    bounds = {"start": start, "end": end}
+    has_default = _table_exists(DEFAULT_PARTITION)
+    stray = has_default and db.session.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end)"
+    ), bounds).scalar()
+    # Postgres refuse une nouvelle partition si la partition par défaut contient déjà des lignes de l'intervalle
+    if stray:
+        db.session.execute(text(f"ALTER TABLE sessions DETACH PARTITION {DEFAULT_PARTITION}"))
+    db.session.execute(text(
+        f"CREATE TABLE {name} PARTITION OF sessions FOR VALUES FROM ('{start}') TO ('{end}')"
+    ))
+    if stray:
+        db.session.execute(text(
+            f"INSERT INTO sessions ({COLUMNS}) SELECT {COLUMNS} FROM {DEFAULT_PARTITION} "
+            "WHERE date >= :start AND date < :end"
+        ), bounds)
+        db.session.execute(text(f"DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end"), bounds)
+        db.session.execute(text(f"ALTER TABLE sessions ATTACH PARTITION {DEFAULT_PARTITION} DEFAULT"))
+
+
+def ensure_session_partitions(ahead=1, today=None):
+    """Crée les partitions de l'année scolaire en cours et des `ahead` suivantes ; retourne leurs noms.
+
+    Sans effet (liste vide) si la table n'est pas partitionnée (SQLite, base créée par create_all).
+    """
+    if not is_partitioned():
+        return []
+    current = school_year_of(today or date.today())
+    attached = {name for name, _ in session_partitions()}
+    created = []
+    _lock_timeout()
+    for year in range(current, current + ahead + 1):
+        name = partition_name(year)
+        if name in attached:
+            continue
+        if _table_exists(name):
+            raise ValueError(f"La table {name} existe déjà sans être rattachée (année détachée ?) : "
+                             f"utilisez `flask attach-school-year {year}`.")
+        _create_partition(year)
+        created.append(name)
+    return created
+
+
+def _refresh_counters_from(source, connection=None):
+    """Recalcule les compteurs des élèves qui ont des séances dans `source` (table ou base attachée)."""
+    executor = connection if connection is not None else db.session
+    student_ids = executor.execute(text(f"SELECT DISTINCT student_id FROM {source}")).scalars().all()
+    if student_ids:
+        refresh_session_counters(student_ids, connection=connection)
+    return len(student_ids)
+
+
+def _detach_partition(year):
+    name = partition_name(year)
+    if name not in {partition for partition, _ in session_partitions()}:
+        raise ValueError(f"Aucune partition rattachée pour l'année {school_year_label(year)} ({name}).")
+    _lock_timeout()
+    db.session.execute(text(f"ALTER TABLE sessions DETACH PARTITION {name}"))
+    # La clé étrangère copiée sur la partition empêcherait de supprimer un élève archivé
+    foreign_keys = db.session.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+    ), {"name": name}).scalars().all()
+    for constraint in foreign_keys:
+        db.session.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+    rows = db.session.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    return rows, _refresh_counters_from(name)
+
+
+def _attach_partition(year):
+    name = partition_name(year)
+    if not _table_exists(name):
+        raise ValueError(f"Aucune table {name} à rattacher.")
+    if name in {partition for partition, _ in session_partitions()}:
+        raise ValueError(f"La partition {name} est déjà rattachée.")
+    start, end = school_year_bounds(year)
+    # Les séances des élèves supprimés entre-temps sont abandonnées
+    db.session.execute(text(f"DELETE FROM {name} WHERE student_id NOT IN (SELECT id FROM students)"))
+    _lock_timeout()
+    db.session.execute(text(f"ALTER TABLE sessions ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    rows = db.session.execute(text(f"SELECT count(*) FROM {name}")).scalar()
+    return rows, _refresh_counters_from(name)
+
+
+# --- SQLITE : UNE BASE ATTACHÉE PAR ANNÉE ---
+
+ARCHIVE_DDL = (
+    "CREATE TABLE IF NOT EXISTS archive.sessions (id INTEGER PRIMARY KEY, student_id INTEGER NOT NULL, "
+    "remark TEXT, date DATE NOT NULL, selected BOOLEAN NOT NULL, updated_at DATETIME NOT NULL)"
+)
+
+
+def _move_sqlite_year(year, archive_dir, to_archive):
+    """Déplace les séances d'une année entre la base principale et sa base d'archive."""
+    path = _archive_path(archive_dir, year)
+    if not to_archive and not os.path.exists(path):
+        raise ValueError(f"Aucune archive pour l'année {school_year_label(year)} ({path}).")
+    os.makedirs(archive_dir, exist_ok=True)
+    start, end = (day.isoformat() for day in school_year_bounds(year))
+    with db.engine.connect() as connection:
+        # ATTACH / DETACH sont interdits dans une transaction ouverte
+        connection.exec_driver_sql("ATTACH DATABASE ? AS archive", (path,))
+        connection.commit()
+        try:
+            with connection.begin():
+                if to_archive:
+                    connection.exec_driver_sql(ARCHIVE_DDL)
+                    connection.execute(text(
+                        f"INSERT INTO archive.sessions ({COLUMNS}) SELECT {COLUMNS} FROM main.sessions "
+                        "WHERE date >= :start AND date < :end"
+                    ), {"start": start, "end": end})
+                    moved = connection.execute(text(
+                        "DELETE FROM main.sessions WHERE date >= :start AND date < :end"
+                    ), {"start": start, "end": end}).rowcount
+                else:
+                    # Les séances des élèves supprimés entre-temps sont abandonnées
+                    connection.exec_driver_sql(
+                        "DELETE FROM archive.sessions WHERE student_id NOT IN (SELECT id FROM main.students)"
+                    )
+                    moved = connection.exec_driver_sql(
+                        f"INSERT INTO main.sessions ({COLUMNS}) SELECT {COLUMNS} FROM archive.sessions"
+                    ).rowcount
+                students = _refresh_counters_from("archive.sessions", connection)
+                if not to_archive:
+                    connection.exec_driver_sql("DELETE FROM archive.sessions")
+        finally:
+            connection.exec_driver_sql("DETACH DATABASE archive")
+    return moved, students
+
+
+# --- OPÉRATIONS COMMUNES (COMMANDES CLI) ---
+
+def detach_school_year(year, archive_dir):
+    """Retire une année scolaire de sessions ; retourne `(séances, élèves concernés)`.
+
+    Postgres : la partition est détachée (table autonome). SQLite : les
+    séances sont déplacées dans la base d'archive de l'année. Aucune
+    transaction ne doit être en cours (la transaction est validée ici).
+    """
+    if year >= school_year_of(date.today()):
+        raise ValueError("Seules les années scolaires terminées peuvent être détachées.")
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return _move_sqlite_year(year, archive_dir, to_archive=True)
+    if not is_partitioned():
+        raise ValueError("La table sessions n'est pas partitionnée (migration a9d4e2b7c615 non appliquée ?).")
+    result = _detach_partition(year)
+    db.session.commit()
+    return result
+
+
+def attach_school_year(year, archive_dir):
+    """Réintègre une année détachée ; retourne `(séances, élèves concernés)`."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        return _move_sqlite_year(year, archive_dir, to_archive=False)
+    if not is_partitioned():
+        raise ValueError("La table sessions n'est pas partitionnée (migration a9d4e2b7c615 non appliquée ?).")
+    result = _attach_partition(year)
+    db.session.commit()
+    return result
+
+
+def school_year_filter(query, school_year):
+    """Restreint une requête sur Session à une année scolaire (élagage des partitions)."""
+    if school_year is None:
+        return query
+    start, end = school_year_bounds(school_year)
+    return query.where(Session.date >= start, Session.date < end)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import func
+from .models import db, Student, Session
+from .partitions import school_year_filter
+
+
+# --- COUCHE DE REQUÊTES : RÉSUMÉ DES ÉLÈVES ---
+
+def student_summaries_query(archived=False):
+    """Requête des élèves avec leurs compteurs de séances (colonnes dénormalisées).
+
+    Chaque ligne expose `id`, `name`, `recorded_count` et `unrecorded_count`,
+    triée par date de création (ordre d'affichage du tableau de bord).
+    """
+    return (
+        db.select(
+            Student.id,
+            Student.name,
+            Student.recorded_count,
+            Student.unrecorded_count,
+        )
+        .where(Student.is_archived == archived)
+        .order_by(Student.created_at.asc(), Student.id.asc())
+    )
+
+
+def student_summaries(archived=False):
+    """Retourne les élèves avec leurs compteurs de séances en une seule requête."""
+    return db.session.execute(student_summaries_query(archived)).all()
+
+
+# --- COUCHE DE REQUÊTES : SÉANCES D'UN ÉLÈVE ---
+
+def session_group_query(student_id, selected, before_id=None, limit=None, school_year=None):
+    """Séances d'un élève pour une valeur de `selected`, plus récentes en tête.
+
+    Correspond exactement à un parcours de l'index (student_id, selected, id desc),
+    limité à la partition de `school_year` si une année scolaire est donnée.
+    """
+    query = db.select(Session).where(Session.student_id == student_id, Session.selected == selected)
+    query = school_year_filter(query, school_year)
+    if before_id is not None:
+        query = query.where(Session.id < before_id)
+    query = query.order_by(Session.id.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def encode_session_cursor(session):
+    """Curseur opaque de pagination : position (selected, id) d'une séance."""
+    return f"{int(session.selected)}:{session.id}"
+
+
+def decode_session_cursor(cursor):
+    """Décode un curseur `selected:id`. Lève ValueError s'il est invalide."""
+    selected, _, session_id = cursor.partition(':')
+    if selected not in ('0', '1') or not session_id.isdigit():
+        raise ValueError(f"Curseur invalide : {cursor!r}")
+    return selected == '1', int(session_id)
+
+
+def session_page_groups(cursor=None):
+    """Parcours d'index d'une page : liste de `(selected, before_id)` à lire dans l'ordre.
+
+    Lève ValueError si le curseur est invalide.
+    """
+    if cursor is None:
+        selected, last_id = False, None
+    else:
+        selected, last_id = decode_session_cursor(cursor)
+    groups = (False, True) if not selected else (True,)
+    return [(group, last_id if group == selected else None) for group in groups]
+
+
+def session_page_result(rows, limit):
+    """Découpe les `limit + 1` lignes lues en `(séances, curseur_suivant)`."""
+    page = rows[:limit]
+    next_cursor = encode_session_cursor(page[-1]) if len(rows) > limit else None
+    return page, next_cursor
+
+
+def student_sessions_page(student_id, cursor=None, limit=50, school_year=None):
+    """Retourne une page de séances (pagination par clé sur `selected, id`).
+
+    La page est lue par au plus deux parcours de l'index
+    (student_id, selected, id desc) : la suite du groupe du curseur, puis,
+    si la page n'est pas pleine, le début des séances enregistrées.
+    `school_year` limite la page à une année scolaire.
+    Retourne `(séances, curseur_suivant)` ; le curseur vaut None en fin de liste.
+    """
+    # On lit une ligne de plus que demandé pour savoir s'il reste des séances
+    wanted = limit + 1
+    rows = []
+    for group, before_id in session_page_groups(cursor):
+        query = session_group_query(student_id, group, before_id=before_id, limit=wanted - len(rows),
+                                    school_year=school_year)
+        rows.extend(db.session.execute(query).scalars().all())
+        if len(rows) >= wanted:
+            break
+    return session_page_result(rows, limit)
+
+
+def student_session_span(student_id):
+    """Dates de la première et de la dernière séance d'un élève (None, None s'il n'en a pas)."""
+    return db.session.execute(
+        db.select(func.min(Session.date), func.max(Session.date)).where(Session.student_id == student_id)
+    ).one()
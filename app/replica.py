@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import time
+from flask import current_app, g, request, session
+from .models import REPLICA_BIND
+from .metrics import Counter, registry
+
+
+# --- RÉPLIQUE EN LECTURE (DATABASE_READ_URL) ---
+# Si DATABASE_READ_URL est définie, un second moteur (bind « replica » de
+# Flask-SQLAlchemy, mêmes options de pool que le primaire) sert les requêtes
+# GET/HEAD : /students, /remarks/<id>, /archived_students, /programme_maths/<id>...
+# db.session choisit le moteur à chaque requête SQL (RoutingSession, models.py).
+# Toutes les autres méthodes (formulaires, /import, /archive_students...)
+# restent sur le primaire, ainsi que les commandes CLI, /ping et tout flush de
+# db.session (une écriture depuis une vue GET ne part jamais vers la réplique).
+#
+# Lecture de ses propres écritures : après une requête d'écriture réussie, le
+# cookie de session (signé) porte une échéance READ_AFTER_WRITE_SECONDS ;
+# jusqu'à elle, les GET du même navigateur lisent le primaire. La redirection
+# qui suit un formulaire affiche donc toujours la donnée écrite, même si la
+# réplique a du retard. Les autres clients lisent la réplique, avec son retard.
+#
+# Test local : deux fichiers SQLite (la réplique est une copie du primaire)
+# ou deux bases Postgres, voir benchmarks/replica_check.py.
+
+READ_METHODS = ('GET', 'HEAD')
+PIN_KEY = '_primary_until'
+
+ROUTED_REQUESTS = registry.register(Counter(
+    'db_routed_requests_total', "Requêtes HTTP par base lue (replica, pinned, primary).", ('target',)))
+
+
+def _choose_database():
+    if request.method not in READ_METHODS:
+        g.db_target = 'primary'
+    elif session.get(PIN_KEY, 0) > time.time():
+        # Fenêtre de lecture sur le primaire après une écriture de ce navigateur
+        g.db_target = 'pinned'
+    else:
+        g.db_target = 'replica'
+    ROUTED_REQUESTS.inc(g.db_target)
+
+
+def _pin_after_write(response):
+    if g.get('db_target') == 'primary' and request.method != 'OPTIONS' and response.status_code < 400:
+        session[PIN_KEY] = time.time() + current_app.config['READ_AFTER_WRITE_SECONDS']
+    return response
+
+
+def replica_binds(read_url, engine_options):
+    """Valeur de SQLALCHEMY_BINDS : la réplique et ses options de moteur (vide sans DATABASE_READ_URL)."""
+    if not read_url:
+        return {}
+    return {REPLICA_BIND: {"url": read_url, **engine_options}}
+
+
+def init_replica(app):
+    """Active l'aiguillage des lectures si une réplique est configurée."""
+    if REPLICA_BIND not in app.config['SQLALCHEMY_BINDS']:
+        return
+    app.before_request(_choose_database)
+    app.after_request(_pin_after_write)
@@ -1,36 +1,33 @@
 # -*- coding: utf-8 -*-
 
-import os
 import logging
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
-from sqlalchemy.exc import SQLAlchemyError
+from flask import Blueprint, Response, current_app, render_template, request, redirect, url_for, flash, jsonify, stream_with_context
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from .models import db, Student, Session, ProgrammeSelection  # Import des modèles
-from datetime import datetime
-import psycopg2  # Nouvelle importation
+from .queries import student_summaries, student_sessions_page, student_session_span
+from .counters import bump_session_counters
+from .health import database_health
+from .selections import sync_programme_selections
+from .catalogue import get_catalogue
+from .coverage import class_coverage, heatmap_cells
+from .importer import import_stream
+from .exporter import export_query, export_chunks
+from .search import search_remarks, highlight
+from .versions import conditional_get, roster_version, remarks_version, programme_version, touch_student
+from .fragments import cached_fragment
+from .archiving import archive_criteria, archive_students, preview_archive
+from .partitions import ALL_SCHOOL_YEARS, requested_school_year, school_year_label, school_years_between
+from .sync import apply_operations
+from datetime import date, datetime
 
 app_routes = Blueprint('app_routes', __name__)
 
-# Configuration du logging
-logging.basicConfig(level=logging.DEBUG)
-
 # --- NOUVEL ENDPOINT POUR LE PING DE LA BASE DE DONNÉES ---
 @app_routes.route('/ping')
 def ping_database():
-    """Endpoint pour vérifier la connexion à la base de données."""
-    try:
-        DATABASE_URL = os.environ.get('DATABASE_URL')
-        if not DATABASE_URL:
-            # Gérer le cas où la variable d'environnement n'est pas définie
-            return jsonify({"error": "DATABASE_URL non définie"}), 500
-        
-        conn = psycopg2.connect(DATABASE_URL)
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1;")
-        cursor.close()
-        conn.close()
-        return jsonify({"message": "Database ping successful"}), 200
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """Endpoint pour vérifier la connexion à la base de données (via le pool, avec cache)."""
+    ok, report = database_health.check(current_app.config['PING_CACHE_TTL'])
+    return jsonify(report), 200 if ok else 500
 
 # --- ROUTES EXISTANTES ---
 
@@ -40,6 +37,7 @@ def home():
 
 # --- MODIFIÉ POUR L'ARCHIVAGE ---
 @app_routes.route('/students', methods=['GET', 'POST'])
+@conditional_get(roster_version)
 def students():
     if request.method == 'POST':
         name = request.form.get('name', "").strip()
@@ -58,14 +56,63 @@ def students():
 
         return redirect(url_for('app_routes.students'))
 
-    # ✅ MODIFICATION : Ne montrer que les élèves non-archivés
-    students = Student.query.filter_by(is_archived=False).order_by(Student.name).all()
+    # Élèves non-archivés et leurs compteurs de séances, en une seule requête groupée (ou depuis le cache)
+    student_grid, _ = cached_fragment(
+        'student_grid', '_student_grid.html', lambda: ({"students": student_summaries(archived=False)}, None)
+    )
+    return render_template('students.html', student_grid=student_grid)
+
+
+# --- IMPORT EN MASSE (CSV / NDJSON) ---
 
-    for student in students:
-        student.unrecorded_count = Session.query.filter_by(student_id=student.id, selected=False).count()
-        student.recorded_count = Session.query.filter_by(student_id=student.id, selected=True).count()
-    students = Student.query.filter_by(is_archived=False).order_by(Student.created_at.asc()).all()
-    return render_template('students.html', students=students)
+IMPORT_CONTENT_TYPES = {'text/csv': 'csv', 'application/x-ndjson': 'ndjson', 'application/ndjson': 'ndjson'}
+
+
+@app_routes.route('/import', methods=['POST'])
+def import_students():
+    """Importe des élèves et leurs séances depuis un fichier CSV/NDJSON (lu en flux).
+
+    Accepte un envoi multipart (champ `file`) ou le corps brut avec un
+    Content-Type text/csv ou application/x-ndjson.
+    """
+    upload = request.files.get('file')
+    if upload is not None:
+        stream = upload.stream
+        fmt = request.form.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    else:
+        stream = request.stream
+        fmt = request.args.get('format') or IMPORT_CONTENT_TYPES.get(request.mimetype)
+
+    try:
+        report = import_stream(stream, fmt, batch_size=current_app.config['IMPORT_BATCH_SIZE'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SQLAlchemyError as e:
+        return jsonify({"error": f"Erreur lors de l'import : {str(e)}"}), 500
+    return jsonify(report._asdict()), 200
+
+
+# --- EXPORT EN FLUX DES REMARQUES ---
+
+@app_routes.route('/export/remarks.<fmt>')
+def export_remarks(fmt):
+    """Exporte les séances en CSV/NDJSON, en flux (paramètres : student_id, start, end)."""
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        query = export_query(
+            student_id=request.args.get('student_id', type=int),
+            start=datetime.strptime(start, "%Y-%m-%d").date() if start else None,
+            end=datetime.strptime(end, "%Y-%m-%d").date() if end else None,
+        )
+        chunks, content_type = export_chunks(fmt, query, chunk_size=current_app.config['EXPORT_CHUNK_SIZE'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    filename = f"remarques.{fmt}"
+    # content_type (et non mimetype) : le jeu de caractères figure déjà dans EXPORTERS
+    return Response(stream_with_context(chunks), content_type=content_type,
+                    headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 
 # --- NOUVELLE LOGIQUE D'ARCHIVAGE CI-DESSOUS ---
@@ -111,9 +158,66 @@ def unarchive_student(student_id):
     return redirect(url_for('app_routes.archived_students'))
 
 
+@app_routes.route('/archive_students', methods=['POST'])
+def archive_students_bulk():
+    """Archive en masse les élèves actifs selon des critères (JSON ou formulaire).
+
+    Paramètres : student_ids (liste), inactive_days, created_before
+    (AAAA-MM-JJ), combinés par ET ; dry_run=true renvoie seulement l'aperçu.
+    """
+    params = request.get_json(silent=True) or request.form
+    try:
+        if params is request.form:
+            # Formulaire : champs répétés ou liste séparée par des virgules
+            student_ids = " ".join(request.form.getlist('student_ids')).replace(',', ' ').split()
+        else:
+            student_ids = params.get('student_ids')
+        inactive_days = params.get('inactive_days')
+        created_before = params.get('created_before')
+        criteria = archive_criteria(
+            student_ids=student_ids,
+            inactive_days=int(inactive_days) if inactive_days not in (None, '') else None,
+            created_before=datetime.strptime(created_before, "%Y-%m-%d").date() if created_before else None,
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+
+    dry_run = str(params.get('dry_run', '')).lower() in ('1', 'true', 'yes', 'on')
+    try:
+        report = preview_archive(criteria)
+        if dry_run:
+            return jsonify({"dry_run": True, **report}), 200
+        report["archived"] = archive_students(criteria)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify({"error": f"Erreur lors de l'archivage : {str(e)}"}), 500
+    return jsonify({"dry_run": False, **report}), 200
+
+
 # --- LE RESTE DE VOS ROUTES NE CHANGE PAS ---
 
+def _school_year_arg():
+    """Année scolaire demandée (?school_year=2024 ou 2024-2025) : l'année en cours par défaut, None pour « all »."""
+    return requested_school_year(request.args.get('school_year'))
+
+
+def _school_years(student_id):
+    """Années scolaires (plus récente en tête) où l'élève a des séances, pour le filtre par année."""
+    first_day, last_day = student_session_span(student_id)
+    if first_day is None:
+        return []
+    # Dates héritées stockées en texte (anciennes données SQLite)
+    first_day, last_day = (
+        day if isinstance(day, date) else date.fromisoformat(str(day)[:10]) for day in (first_day, last_day)
+    )
+    # L'année en cours (affichée par défaut) figure dans la liste même sans séance
+    last_day = max(last_day, date.today())
+    return [(year, school_year_label(year)) for year in school_years_between(first_day, last_day)]
+
+
 @app_routes.route('/remarks/<int:student_id>', methods=['GET', 'POST'])
+@conditional_get(remarks_version)
 def remarks(student_id):
     # J'utilise db.session.get qui est la méthode moderne pour récupérer par clé primaire
     student = db.session.get(Student, student_id) 
@@ -129,6 +233,7 @@ def remarks(student_id):
             new_session = Session(student_id=student.id, remark=remark, selected=False)
             try:
                 db.session.add(new_session)
+                bump_session_counters(student.id, unrecorded=1)
                 db.session.commit()
                 flash("Séance ajoutée avec succès.", "success")
             except SQLAlchemyError as e:
@@ -138,18 +243,28 @@ def remarks(student_id):
             flash("La remarque ne peut pas être vide.", "error")
         return redirect(url_for('app_routes.remarks', student_id=student.id))
 
-    student_sessions = Session.query.filter_by(student_id=student_id).order_by(Session.selected.asc(), Session.id.desc()).all()
+    try:
+        school_year = _school_year_arg()
+    except ValueError as e:
+        flash(str(e), "error")
+        return redirect(url_for('app_routes.remarks', student_id=student.id))
+
+    def build_session_list():
+        student_sessions, next_cursor = student_sessions_page(
+            student_id, limit=current_app.config['REMARKS_PAGE_SIZE'], school_year=school_year
+        )
+        _normalize_session_dates(student_sessions)
+        extra = {"next_cursor": next_cursor, "school_years": _school_years(student_id)}
+        return {
+            "student_id": student.id,
+            "sessions": student_sessions,
+            "school_year_label": school_year_label(school_year) if school_year is not None else None,
+            "all_school_years": ALL_SCHOOL_YEARS,
+        }, extra
+
+    # Première page des séances : rendue une fois par version de l'élève (et année affichée)
+    session_list, extra = cached_fragment('session_list', '_session_list.html', build_session_list)
 
-    for session in student_sessions:
-        if isinstance(session.date, str):
-            try:
-                session.date = datetime.strptime(session.date, "%Y-%m-%d %H:%M:%S").date()
-            except ValueError:
-                session.date = datetime.now().date() # Fallback
-    
-    selected_sessions = {s.id for s in student_sessions if s.selected}
-    unrecorded_count = sum(1 for s in student_sessions if not s.selected)
-    recorded_count = len(student_sessions) - unrecorded_count
     return render_template(
         "remarks.html",
         student_id=student.id,
@@ -157,19 +272,49 @@ def remarks(student_id):
         student_school=student.school_name or "",
         student_birth_date=student.birth_date or "",
         student_phone_number=student.phone_number or "",
-        sessions=student_sessions,
-        selected_sessions=selected_sessions,
-        unrecorded_count=unrecorded_count,
-        recorded_count=recorded_count,
+        session_list=session_list,
+        next_cursor=extra["next_cursor"],
+        school_year=school_year,
+        school_years=extra["school_years"],
+        all_school_years=ALL_SCHOOL_YEARS,
+        unrecorded_count=student.unrecorded_count,
+        recorded_count=student.recorded_count,
     )
 
 
+@app_routes.route('/remarks/<int:student_id>/sessions')
+def remarks_page(student_id):
+    """Fragment JSON « Charger plus » : page suivante des séances d'un élève."""
+    cursor = request.args.get('after')
+    try:
+        student_sessions, next_cursor = student_sessions_page(
+            student_id, cursor=cursor, limit=current_app.config['REMARKS_PAGE_SIZE'], school_year=_school_year_arg()
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    _normalize_session_dates(student_sessions)
+
+    html = render_template('_session_items.html', student_id=student_id, sessions=student_sessions)
+    return jsonify({"html": html, "next_cursor": next_cursor}), 200
+
+
+def _normalize_session_dates(sessions):
+    """Convertit les dates héritées stockées en texte (anciennes données)."""
+    for session in sessions:
+        if isinstance(session.date, str):
+            try:
+                session.date = datetime.strptime(session.date, "%Y-%m-%d %H:%M:%S").date()
+            except ValueError:
+                session.date = datetime.now().date() # Fallback
+
+
 @app_routes.route('/delete_student/<int:student_id>', methods=['POST'])
 def delete_student(student_id):
     student = db.session.get(Student, student_id)
     if student:
         try:
             # La configuration 'cascade' dans le modèle s'occupe de supprimer les sessions et sélections
+            # (les compteurs de séances disparaissent avec la ligne de l'élève)
             db.session.delete(student)
             db.session.commit()
             flash("Élève et données associées supprimés définitivement.", "success")
@@ -181,23 +326,85 @@ def delete_student(student_id):
 
 
 @app_routes.route('/programme_maths/<int:student_id>')
+@conditional_get(programme_version)
 def programme_maths(student_id):
-    programme = {
-        "1. Limites et Continuité": ["Continuité en un point- continuité à droite - continuité à gauche", "Continuité sur un intervalle", "Image d’un intervalle", "Théorème des valeurs intermédiaires (T.V.I) et dichotomie", "Fonction réciproque", "Racine N-ième"],
-        "2. Dérivabilité et Étude des Fonctions": ["Dérivabilité en un point", "Interprétation géométrique du nombre dérivé", "Dérivabilité sur un intervalle", "Calcul de la dérivée", "Dérivée et variations", "Extremums d’une fonction", "Concavité et dérivée seconde", "Les branches infinies", "Axe de symétrie - Centre de symétrie- Fonction paire – impaire", "Position relative d’une courbe et d’une droite"],
-        "3. Fonctions Primitives": ["Les primitives", "Intégrale", "Intégration par parties", "Application – Aire et Volume"],
-        "4. Fonction Logarithme": ["Définition et propriétés (Df et Equation/Inéquation)", "Limites usuelles", "La dérivée", "Logarithmes de base a"],
-        "5. Fonction Exponentielle": ["Définition et propriétés (Df et Equation/Inéquation)", "Limites usuelles", "La dérivée", "Exponentielle de base a"],
-        "6. Suites Numériques": ["Monotonie d’une suite numérique", "Suite majorée – Suite minorée – Suite bornée (Récurrence)", "Suite arithmétique", "Suite géométrique", "Limite d’une suite numérique (Convergence)"],
-        "7. Nombres Complexes": ["Notion et propriétés", "Représentation géométrique", "Equations du second degré", "Forme trigonométrique", "Interprétation géométrique (Alignement, type du triangle, points circulaires)", "Notation exponentielle", "Transformations (Translation-Homothétie-Rotation)"],
-        "8. Géométrie dans l’espace": ["Produit scalaire et propriétés", "Equation d’une droite et distance", "Equation cartésienne d’une sphère", "Produit vectoriel", "Positions relatives d’une droite et d’une sphère"],
-        "9. Équations Différentielles": ["Equation Différentielle Linéaire du 1er ordre", "Equation Différentielle Linéaire du 2nd ordre"],
-        "10. Probabilités et Statistiques": ["Introduction Cardinal - principe fondamental de dénombrement - Types de tirages", "Probabilité d’un événement - Probabilité conditionnelle", "Variables aléatoires - Loi Binomiale"]
-    }
-
-    selected_chapters = {selection.chapter_name for selection in ProgrammeSelection.query.filter_by(student_id=student_id).all()}
-
-    return render_template('programme.html', programme=programme, student_id=student_id, selected_chapters=selected_chapters)
+    # Le catalogue est servi depuis le cache du worker ; seules les sélections sont lues en base
+    catalogue = get_catalogue()
+    selected_subchapters = set(db.session.execute(
+        db.select(ProgrammeSelection.subchapter_id).where(ProgrammeSelection.student_id == student_id)
+    ).scalars())
+
+    return render_template('programme.html', catalogue=catalogue, student_id=student_id, selected_subchapters=selected_subchapters)
+
+
+@app_routes.route('/coverage')
+def coverage():
+    """Carte de chaleur de la couverture du programme pour toute la classe."""
+    catalogue, rows = class_coverage()
+    # Préfixe commun des liens vers /programme_maths/<id> (un seul url_for pour toute la classe)
+    programme_url_prefix = url_for('app_routes.programme_maths', student_id=0).rsplit('/', 1)[0]
+    return render_template('coverage.html', catalogue=catalogue, rows=rows,
+                           heatmap_cells=heatmap_cells, programme_url_prefix=programme_url_prefix)
+
+
+@app_routes.route('/coverage.json')
+def coverage_json():
+    """Couverture du programme (par chapitre et globale) au format JSON."""
+    catalogue, rows = class_coverage()
+    return jsonify({
+        "chapters": [{"id": chapter.id, "title": chapter.title} for chapter in catalogue.chapters],
+        "students": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "overall": row.overall,
+                "chapters": dict(zip((chapter.id for chapter in catalogue.chapters), row.chapters)),
+            }
+            for row in rows
+        ],
+    }), 200
+
+
+# --- RECHERCHE DANS LES REMARQUES ---
+
+def _search_args():
+    query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    return query, page
+
+
+@app_routes.route('/search')
+def search():
+    """Recherche plein texte dans toutes les remarques (classée et paginée)."""
+    query, page = _search_args()
+    hits, has_next = search_remarks(query, page, current_app.config['SEARCH_PAGE_SIZE']) if query else ([], False)
+    return render_template('search.html', query=query, page=page, hits=hits, has_next=has_next,
+                           highlight=highlight)
+
+
+@app_routes.route('/search.json')
+def search_json():
+    """Résultats de recherche au format JSON (paramètres : q, page)."""
+    query, page = _search_args()
+    hits, has_next = search_remarks(query, page, current_app.config['SEARCH_PAGE_SIZE'])
+    return jsonify({
+        "query": query,
+        "page": page,
+        "has_next": has_next,
+        "results": [
+            {
+                "session_id": hit.session_id,
+                "student_id": hit.student_id,
+                "name": hit.name,
+                "is_archived": hit.is_archived,
+                "date": hit.date.isoformat() if hit.date else None,
+                "selected": hit.selected,
+                "remark": hit.remark,
+                "rank": round(float(hit.rank), 4),
+            }
+            for hit in hits
+        ],
+    }), 200
 
 
 @app_routes.route('/save_programme_selections', methods=['POST'])
@@ -207,19 +414,28 @@ def save_programme_selections():
 
     data = request.get_json()
     student_id = data.get('student_id')
-    selected_chapters = data.get('selections', [])
+    selections = data.get('selections', [])
 
     if not student_id:
         return jsonify({"error": "L'ID de l'élève est requis"}), 400
 
     try:
-        ProgrammeSelection.query.filter_by(student_id=student_id).delete()
-        if selected_chapters:
-            for chapter in selected_chapters:
-                new_selection = ProgrammeSelection(student_id=student_id, chapter_name=chapter)
-                db.session.add(new_selection)
+        subchapter_ids = {int(subchapter_id) for subchapter_id in selections}
+    except (TypeError, ValueError):
+        return jsonify({"error": "Les sélections doivent être des identifiants de sous-chapitres"}), 400
+    unknown = subchapter_ids - get_catalogue().subchapter_ids
+    if unknown:
+        return jsonify({"error": f"Sous-chapitres inconnus : {sorted(unknown)}"}), 400
+
+    try:
+        # Seul le différentiel avec les sélections stockées est écrit
+        added, removed = sync_programme_selections(student_id, subchapter_ids)
         db.session.commit()
-        return jsonify({"message": "Sélections enregistrées avec succès!"}), 200
+        return jsonify({
+            "message": "Sélections enregistrées avec succès!",
+            "added": len(added),
+            "removed": len(removed),
+        }), 200
 
     except SQLAlchemyError as e:
         db.session.rollback()
@@ -234,6 +450,7 @@ def edit_remark(student_id, session_id):
         if new_remark:
             try:
                 session_to_edit.remark = new_remark
+                touch_student(session_to_edit.student_id)
                 db.session.commit()
                 flash("La remarque a été mise à jour avec succès.", "success")
             except SQLAlchemyError as e:
@@ -251,6 +468,10 @@ def delete_remark(student_id, session_id):
     session_to_delete = db.session.get(Session, session_id)
     if session_to_delete:
         try:
+            if session_to_delete.selected:
+                bump_session_counters(session_to_delete.student_id, recorded=-1)
+            else:
+                bump_session_counters(session_to_delete.student_id, unrecorded=-1)
             db.session.delete(session_to_delete)
             db.session.commit()
             flash("Séance supprimée avec succès.", "success")
@@ -282,15 +503,44 @@ def update_info(student_id):
     return redirect(url_for('app_routes.remarks', student_id=student_id))
 
 
-@app_routes.route('/save_selection/<int:student_id>', methods=['POST'])
-def save_selection(student_id):
-    selected_sessions = request.form.getlist('selected_sessions')
-    try:
-        Session.query.filter(Session.student_id == student_id).update({"selected": False})
-        if selected_sessions:
-            Session.query.filter(Session.id.in_(selected_sessions)).update({"selected": True}, synchronize_session=False)
-        db.session.commit()
-        return jsonify({"message": "Sélection mise à jour avec succès"}), 200
-    except SQLAlchemyError as e:
-        db.session.rollback()
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+# --- SYNCHRONISATION HORS LIGNE PAR LOTS ---
+
+@app_routes.route('/sync', methods=['POST'])
+def sync_operations():
+    """Applique un lot ordonné d'opérations hors ligne en une transaction (voir sync.py).
+
+    Corps JSON attendu : {"operations": [{"op_id", "type", ...}]} ; la réponse
+    donne un résultat par opération et les compteurs des élèves concernés.
+    """
+    if not request.is_json:
+        return jsonify({"error": "Le Content-Type doit être application/json"}), 415
+    payload = request.get_json(silent=True)
+    operations = payload.get('operations') if isinstance(payload, dict) else None
+    if not isinstance(operations, list):
+        return jsonify({"error": "Le corps doit contenir une liste « operations »"}), 400
+    limit = current_app.config['SYNC_MAX_OPERATIONS']
+    if len(operations) > limit:
+        return jsonify({"error": f"Au plus {limit} opérations par lot"}), 413
+
+    for attempt in range(2):
+        try:
+            results, counters = apply_operations(operations)
+            db.session.commit()
+            break
+        except IntegrityError as e:
+            # Même lot rejoué en parallèle (op_id déjà journalisé) ou élève supprimé entre-temps :
+            # le second essai relit le journal et l'état courant
+            db.session.rollback()
+            if attempt:
+                return jsonify({"error": f"Erreur lors de la synchronisation : {str(e)}"}), 409
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            return jsonify({"error": f"Erreur lors de la synchronisation : {str(e)}"}), 500
+    return jsonify({"results": results, "students": counters}), 200
+
+
+@app_routes.route('/sw.js')
+def service_worker():
+    """Service worker (portée /) : pages consultables hors ligne et reprise de la file /sync."""
+    return Response(render_template('sw.js'), mimetype='application/javascript',
+                    headers={'Cache-Control': 'no-cache'})
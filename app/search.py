@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+import re
+from collections import namedtuple
+from markupsafe import Markup, escape
+from sqlalchemy import Float, event, text
+from .models import db, Student, Session
+
+
+# --- RECHERCHE PLEIN TEXTE DANS LES REMARQUES ---
+# Postgres : colonne générée sessions.remark_tsv (tsvector, configuration
+#            'french' sur le texte sans accents) + index GIN ix_sessions_remark_tsv ;
+#            classement par ts_rank_cd.
+# SQLite   : table FTS5 sessions_fts à contenu externe (tokenizer unicode61,
+#            remove_diacritics 2) ; classement par bm25.
+# Dans les deux cas l'index est tenu à jour par la base elle-même (colonne
+# générée / déclencheurs) : les routes de création, modification et suppression
+# des remarques, l'import en masse et les suppressions en cascade sont couverts.
+# Les objets sont créés par la migration, par db.create_all() (événement
+# after_create ci-dessous) ou par `flask reindex-search`.
+
+# Lettres accentuées du français et leur équivalent sans accent (même table
+# côté SQL, via translate(), et côté Python pour normaliser la requête)
+ACCENTED = "àâäáãåçéèêëíìîïñóòôöõúùûüýÿÀÂÄÁÃÅÇÉÈÊËÍÌÎÏÑÓÒÔÖÕÚÙÛÜÝŸ"
+UNACCENTED = "aaaaaaceeeeiiiinooooouuuuyyAAAAAACEEEEIIIINOOOOOUUUUYY"
+_UNACCENT = str.maketrans(ACCENTED, UNACCENTED)
+
+SEARCH_DDL = {
+    'postgresql': [
+        "ALTER TABLE sessions ADD COLUMN IF NOT EXISTS remark_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('french'::regconfig, "
+        f"translate(coalesce(remark, ''), '{ACCENTED}', '{UNACCENTED}'))) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_sessions_remark_tsv ON sessions USING gin (remark_tsv)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS sessions_fts USING fts5(remark, content='sessions', "
+        "content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS sessions_fts_ai AFTER INSERT ON sessions BEGIN "
+        "INSERT INTO sessions_fts(rowid, remark) VALUES (new.id, new.remark); END",
+        "CREATE TRIGGER IF NOT EXISTS sessions_fts_ad AFTER DELETE ON sessions BEGIN "
+        "INSERT INTO sessions_fts(sessions_fts, rowid, remark) VALUES ('delete', old.id, old.remark); END",
+        "CREATE TRIGGER IF NOT EXISTS sessions_fts_au AFTER UPDATE OF remark ON sessions BEGIN "
+        "INSERT INTO sessions_fts(sessions_fts, rowid, remark) VALUES ('delete', old.id, old.remark); "
+        "INSERT INTO sessions_fts(rowid, remark) VALUES (new.id, new.remark); END",
+    ],
+}
+
+SearchHit = namedtuple('SearchHit', 'session_id student_id name is_archived date selected remark rank')
+
+
+def install_search_index(connection):
+    """Crée (si besoin) les objets de recherche pour le dialecte de la connexion."""
+    for statement in SEARCH_DDL.get(connection.dialect.name, ()):
+        connection.execute(text(statement))
+
+
+@event.listens_for(Session.__table__, 'after_create')
+def _create_search_index(table, connection, **kw):
+    install_search_index(connection)
+
+
+@event.listens_for(Session.__table__, 'after_drop')
+def _drop_search_index(table, connection, **kw):
+    # La colonne Postgres disparaît avec la table ; la table FTS5 SQLite non
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text("DROP TABLE IF EXISTS sessions_fts"))
+
+
+def rebuild_search_index():
+    """Reconstruit l'index plein texte à partir de la table sessions."""
+    dialect = db.session.get_bind().dialect.name
+    install_search_index(db.session.connection())
+    if dialect == 'sqlite':
+        db.session.execute(text("INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')"))
+        db.session.execute(text("INSERT INTO sessions_fts(sessions_fts) VALUES ('optimize')"))
+    elif dialect == 'postgresql':
+        db.session.execute(text("REINDEX INDEX ix_sessions_remark_tsv"))
+
+
+def normalize(value):
+    """Texte en minuscules et sans accents (pour la requête et la mise en évidence)."""
+    return value.translate(_UNACCENT).lower()
+
+
+def _terms(query):
+    return re.findall(r"\w+", normalize(query))
+
+
+# Le classement et la pagination portent sur l'index seul ; les jointures
+# (séance, élève) ne concernent que les lignes de la page demandée.
+_SEARCH_SQL = {
+    'postgresql': """
+        SELECT s.id, s.student_id, st.name, st.is_archived, s.date, s.selected, s.remark, top.rank
+        FROM (
+            SELECT s.id, ts_rank_cd(s.remark_tsv, q.query) AS rank
+            FROM sessions s, websearch_to_tsquery('french'::regconfig, :query) AS q(query)
+            WHERE s.remark_tsv @@ q.query
+            ORDER BY rank DESC, s.id DESC
+            LIMIT :limit OFFSET :offset
+        ) AS top
+        JOIN sessions s ON s.id = top.id
+        JOIN students st ON st.id = s.student_id
+        ORDER BY top.rank DESC, s.id DESC
+    """,
+    'sqlite': """
+        SELECT s.id, s.student_id, st.name, st.is_archived, s.date, s.selected, s.remark, -top.rank
+        FROM (
+            SELECT rowid, rank FROM sessions_fts
+            WHERE sessions_fts MATCH :query
+            ORDER BY rank
+            LIMIT :limit OFFSET :offset
+        ) AS top
+        JOIN sessions s ON s.id = top.rowid
+        JOIN students st ON st.id = s.student_id
+        ORDER BY top.rank
+    """,
+}
+
+
+def search_remarks(query, page=1, per_page=20):
+    """Remarques correspondant à `query`, par pertinence décroissante. Retourne `(résultats, page suivante ?)`."""
+    terms = _terms(query)
+    if not terms:
+        return [], False
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in _SEARCH_SQL:
+        raise RuntimeError(f"Recherche plein texte non prise en charge pour {dialect}")
+
+    if dialect == 'sqlite':
+        # Chaque mot est cherché comme préfixe (pas de racinisation dans unicode61)
+        match = " ".join(f'"{term}"*' for term in terms)
+    else:
+        # websearch_to_tsquery accepte "expressions exactes" et -exclusions
+        match = normalize(query)
+    statement = text(_SEARCH_SQL[dialect]).columns(
+        Session.id, Session.student_id, Student.name, Student.is_archived, Session.date,
+        Session.selected, Session.remark, rank=Float,
+    )
+    rows = db.session.execute(
+        statement,
+        {"query": match, "limit": per_page + 1, "offset": (page - 1) * per_page},
+    ).all()
+    return [SearchHit(*row) for row in rows[:per_page]], len(rows) > per_page
+
+
+def highlight(remark, query):
+    """Remarque échappée avec les mots recherchés entourés de <mark>."""
+    stems = [term[:max(3, len(term) - 2)] for term in _terms(query)]
+    parts = []
+    for piece in re.split(r"(\w+)", remark or ""):
+        if piece and stems and normalize(piece).startswith(tuple(stems)):
+            parts.append(Markup("<mark>%s</mark>") % piece)
+        else:
+            parts.append(escape(piece))
+    return Markup("").join(parts)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import db, ProgrammeSelection
+from .versions import touch_student
+
+
+# --- ÉCRITURE ENSEMBLISTE DES SÉLECTIONS DU PROGRAMME ---
+
+def _insert_ignoring_duplicates(table):
+    """INSERT qui ignore les doublons (student_id, subchapter_id) déjà présents."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table).on_conflict_do_nothing()
+    if dialect == 'sqlite':
+        return sqlite.insert(table).on_conflict_do_nothing()
+    return insert(table)
+
+
+def sync_programme_selections(student_id, subchapter_ids):
+    """Aligne les sélections stockées d'un élève sur `subchapter_ids` en appliquant le différentiel.
+
+    Un seul DELETE ... IN pour les sous-chapitres décochés et un seul INSERT
+    multi-lignes pour les nouveaux ; la contrainte d'unicité rend deux
+    sauvegardes concurrentes idempotentes. Retourne `(ajoutés, retirés)`.
+    """
+    wanted = set(subchapter_ids)
+    stored = set(db.session.execute(
+        select(ProgrammeSelection.subchapter_id).where(ProgrammeSelection.student_id == student_id)
+    ).scalars())
+
+    to_remove = stored - wanted
+    to_add = wanted - stored
+    if to_remove:
+        db.session.execute(
+            delete(ProgrammeSelection)
+            .where(ProgrammeSelection.student_id == student_id,
+                   ProgrammeSelection.subchapter_id.in_(sorted(to_remove)))
+            .execution_options(synchronize_session=False)
+        )
+    if to_add:
+        db.session.execute(
+            _insert_ignoring_duplicates(ProgrammeSelection.__table__).values(
+                [{"student_id": student_id, "subchapter_id": subchapter_id} for subchapter_id in sorted(to_add)]
+            )
+        )
+    if to_add or to_remove:
+        touch_student(student_id)
+    return to_add, to_remove
+
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import delete, insert, select, update
+from .models import db, Student, Session, SyncOperation
+from .counters import refresh_session_counters
+
+
+# --- SYNCHRONISATION HORS LIGNE PAR LOTS (/sync) ---
+# La page des remarques met en file (localStorage) les modifications faites
+# sans réseau, les fusionne, puis les envoie à /sync en un seul lot ordonné :
+#
+#   {"operations": [{"op_id": "<uuid>", "type": "add_remark", "student_id": 3, "remark": "..."}, ...]}
+#
+# Types d'opérations (les séances sont désignées par session_id, ou par
+# session_op = op_id de l'add_remark qui les a créées, dans ce lot ou un lot précédent) :
+#   add_remark    student_id, remark, date (AAAA-MM-JJ, facultative), selected (facultatif)
+#   edit_remark   session_id | session_op, remark
+#   delete_remark session_id | session_op
+#   set_selected  session_id | session_op, selected
+#   update_info   student_id, school_name / birth_date / phone_number (au moins un)
+#
+# Le lot est d'abord rejoué en mémoire, dans l'ordre, pour obtenir l'état
+# final ; il est ensuite écrit dans une seule transaction par un petit nombre
+# d'instructions ensemblistes : un INSERT multi-lignes des nouvelles séances,
+# un UPDATE par lot de clés primaires pour les modifications, un DELETE ... IN,
+# un UPDATE des compteurs (et de updated_at) des élèves touchés, et un INSERT
+# du journal sync_operations.
+#
+# Idempotence : chaque opération appliquée (ou dont la cible n'existe plus)
+# est journalisée sous son op_id avec son résultat. Un lot renvoyé après une
+# coupure réseau reçoit les résultats enregistrés (« replayed ») sans rien
+# réappliquer. Une opération invalide est refusée (« rejected ») sans bloquer
+# les autres ni être journalisée. Le journal est purgé par
+# `flask prune-sync-operations` (SYNC_RETENTION_DAYS).
+
+OPERATION_TYPES = ('add_remark', 'edit_remark', 'delete_remark', 'set_selected', 'update_info')
+SESSION_OPERATION_TYPES = ('edit_remark', 'delete_remark', 'set_selected')
+INFO_FIELDS = ('school_name', 'birth_date', 'phone_number')
+MAX_OP_ID_LENGTH = 64
+
+
+def _integer(value, field):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{field} doit être un entier")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{field} doit être un entier")
+
+
+def _remark(raw):
+    remark = raw.get('remark')
+    if not isinstance(remark, str) or not remark.strip():
+        raise ValueError("La remarque ne peut pas être vide")
+    return remark.strip()
+
+
+def parse_operation(raw):
+    """Valide une opération du lot et la normalise ; lève ValueError si elle est invalide."""
+    if not isinstance(raw, dict):
+        raise ValueError("Une opération doit être un objet JSON")
+    op_id = raw.get('op_id')
+    if not isinstance(op_id, str) or not 0 < len(op_id) <= MAX_OP_ID_LENGTH:
+        raise ValueError(f"op_id doit être une chaîne de 1 à {MAX_OP_ID_LENGTH} caractères")
+    op_type = raw.get('type')
+    if op_type not in OPERATION_TYPES:
+        raise ValueError(f"Type d'opération inconnu : {op_type!r}")
+
+    operation = {"op_id": op_id, "type": op_type}
+    if raw.get('student_id') is not None:
+        operation['student_id'] = _integer(raw['student_id'], 'student_id')
+    elif op_type in ('add_remark', 'update_info'):
+        raise ValueError("student_id est obligatoire")
+
+    if op_type in SESSION_OPERATION_TYPES:
+        if (raw.get('session_id') is None) == (raw.get('session_op') is None):
+            raise ValueError("Indiquer soit session_id, soit session_op")
+        if raw.get('session_id') is not None:
+            operation['session_id'] = _integer(raw['session_id'], 'session_id')
+        elif isinstance(raw['session_op'], str):
+            operation['session_op'] = raw['session_op']
+        else:
+            raise ValueError("session_op doit être l'op_id d'un add_remark")
+
+    if op_type in ('add_remark', 'edit_remark'):
+        operation['remark'] = _remark(raw)
+    if op_type == 'add_remark':
+        try:
+            operation['date'] = date.fromisoformat(str(raw['date'])[:10]) if raw.get('date') else date.today()
+        except ValueError:
+            raise ValueError(f"Date invalide : {raw['date']!r}")
+    if op_type in ('add_remark', 'set_selected'):
+        selected = raw.get('selected', False if op_type == 'add_remark' else None)
+        if not isinstance(selected, bool):
+            raise ValueError("selected doit être un booléen")
+        operation['selected'] = selected
+    if op_type == 'update_info':
+        fields = {field: raw[field] for field in INFO_FIELDS if field in raw}
+        if not fields or not all(isinstance(value, str) for value in fields.values()):
+            raise ValueError(f"update_info attend au moins un champ texte parmi {', '.join(INFO_FIELDS)}")
+        operation['fields'] = {field: value.strip() for field, value in fields.items()}
+    return operation
+
+
+def _stored_results(op_ids):
+    """Résultats déjà journalisés, par op_id."""
+    if not op_ids:
+        return {}
+    return dict(db.session.execute(
+        select(SyncOperation.op_id, SyncOperation.result).where(SyncOperation.op_id.in_(sorted(op_ids)))
+    ).tuples().all())
+
+
+def _bulk_update(model, changes):
+    """UPDATE par clé primaire, une exécution groupée par ensemble de colonnes modifiées."""
+    groups = {}
+    for row_id, values in changes.items():
+        groups.setdefault(tuple(sorted(values)), []).append({"id": row_id, **values})
+    for rows in groups.values():
+        db.session.execute(update(model), rows)
+
+
+def apply_operations(raw_operations):
+    """Applique un lot ordonné d'opérations hors ligne (sans valider la transaction).
+
+    Retourne `(résultats par opération, compteurs des élèves concernés)`.
+    """
+    results = [None] * len(raw_operations)
+    operations, seen = [], set()
+    for index, raw in enumerate(raw_operations):
+        try:
+            operation = parse_operation(raw)
+            if operation['op_id'] in seen:
+                raise ValueError("op_id en double dans le lot")
+        except ValueError as e:
+            op_id = raw.get('op_id') if isinstance(raw, dict) else None
+            results[index] = {"op_id": op_id, "status": "rejected", "error": str(e)}
+            continue
+        seen.add(operation['op_id'])
+        operations.append((index, operation))
+
+    # Opérations déjà appliquées (rejeu d'un lot) et séances créées par un lot précédent
+    stored = _stored_results(seen | {op['session_op'] for _, op in operations if 'session_op' in op})
+    pending = []
+    for index, operation in operations:
+        if operation['op_id'] in stored:
+            results[index] = {**stored[operation['op_id']], "replayed": True}
+        else:
+            pending.append((index, operation))
+
+    # État actuel des élèves et des séances visés, en deux requêtes
+    student_ids = {op['student_id'] for _, op in pending if op['type'] in ('add_remark', 'update_info')}
+    existing_students = set(db.session.execute(
+        select(Student.id).where(Student.id.in_(sorted(student_ids)))
+    ).scalars()) if student_ids else set()
+    session_ids = {op['session_id'] for _, op in pending if 'session_id' in op}
+    session_ids |= {
+        stored[op['session_op']]['session_id'] for _, op in pending
+        if op.get('session_op') in stored and stored[op['session_op']].get('session_id')
+    }
+    session_students = dict(db.session.execute(
+        select(Session.id, Session.student_id).where(Session.id.in_(sorted(session_ids)))
+    ).tuples().all()) if session_ids else {}
+
+    # Rejeu en mémoire, dans l'ordre du lot
+    new_sessions = {}           # op_id de l'add_remark -> ligne à insérer (None si supprimée ensuite)
+    session_changes = {}        # id de séance existante -> colonnes modifiées
+    deleted = set()
+    info_changes = {}           # id d'élève -> colonnes modifiées
+    touched_students = set()
+    new_session_results = []    # (résultat, op_id de l'add_remark) : session_id connu après l'INSERT
+    journal = []
+    for index, operation in pending:
+        op_type, op_id = operation['type'], operation['op_id']
+        result = {"op_id": op_id, "status": "applied"}
+        if op_type in ('add_remark', 'update_info'):
+            student_id = operation['student_id']
+            if student_id not in existing_students:
+                result = {"op_id": op_id, "status": "not_found", "error": "Élève introuvable"}
+            elif op_type == 'add_remark':
+                new_sessions[op_id] = {"student_id": student_id, "remark": operation['remark'],
+                                       "date": operation['date'], "selected": operation['selected']}
+                new_session_results.append((result, op_id))
+                touched_students.add(student_id)
+            else:
+                info_changes.setdefault(student_id, {}).update(operation['fields'])
+        else:
+            target_op = operation.get('session_op')
+            if target_op in new_sessions:
+                row = new_sessions[target_op]
+                if row is None:
+                    result = {"op_id": op_id, "status": "not_found", "error": "Séance introuvable"}
+                elif op_type == 'delete_remark':
+                    new_sessions[target_op] = None
+                else:
+                    row['remark' if op_type == 'edit_remark' else 'selected'] = operation[
+                        'remark' if op_type == 'edit_remark' else 'selected']
+                    new_session_results.append((result, target_op))
+                student_id = row and row['student_id']
+            else:
+                session_id = operation.get('session_id') or stored.get(target_op, {}).get('session_id')
+                student_id = session_students.get(session_id)
+                if student_id is None or session_id in deleted:
+                    result = {"op_id": op_id, "status": "not_found", "error": "Séance introuvable"}
+                else:
+                    result["session_id"] = session_id
+                    if op_type == 'delete_remark':
+                        deleted.add(session_id)
+                        session_changes.pop(session_id, None)
+                    else:
+                        column = 'remark' if op_type == 'edit_remark' else 'selected'
+                        session_changes.setdefault(session_id, {})[column] = operation[column]
+                    touched_students.add(student_id)
+        results[index] = result
+        journal.append({"op_id": op_id, "op_type": op_type,
+                        "student_id": operation.get('student_id', student_id), "result": result})
+
+    # Écriture ensembliste de l'état final
+    inserted = [(op_id, row) for op_id, row in new_sessions.items() if row is not None]
+    if inserted:
+        new_ids = db.session.execute(
+            insert(Session).returning(Session.id, sort_by_parameter_order=True), [row for _, row in inserted]
+        ).scalars().all()
+        created = {op_id: new_id for (op_id, _), new_id in zip(inserted, new_ids)}
+        for result, op_id in new_session_results:
+            result["session_id"] = created.get(op_id)
+    if session_changes:
+        _bulk_update(Session, session_changes)
+    if deleted:
+        db.session.execute(
+            delete(Session).where(Session.id.in_(sorted(deleted))).execution_options(synchronize_session=False)
+        )
+    if info_changes:
+        _bulk_update(Student, info_changes)
+    if touched_students:
+        # Compteurs exacts et updated_at (ETag des pages) des élèves modifiés, en un seul UPDATE
+        refresh_session_counters(touched_students)
+    if journal:
+        db.session.execute(insert(SyncOperation), journal)
+
+    counted = {op['student_id'] for _, op in operations if 'student_id' in op} | touched_students
+    counters = {
+        str(student_id): {"recorded_count": recorded, "unrecorded_count": unrecorded}
+        for student_id, recorded, unrecorded in db.session.execute(
+            select(Student.id, Student.recorded_count, Student.unrecorded_count)
+            .where(Student.id.in_(sorted(counted)))
+        ).tuples()
+    } if counted else {}
+    return results, counters
+
+
+def prune_sync_operations(retention_days):
+    """Supprime le journal des opérations plus anciennes que `retention_days` ; retourne leur nombre."""
+    cutoff = datetime.now(timezone.utc) - timedelta(days=retention_days)
+    result = db.session.execute(
+        delete(SyncOperation).where(SyncOperation.created_at < cutoff).execution_options(synchronize_session=False)
+    )
+    return result.rowcount
@@ -0,0 +1,45 @@
+// Service worker de l'application (portée /), servi par la route /sw.js.
+//  - /students et /remarks/<id> : réseau d'abord, la dernière version reçue
+//    est gardée en cache pour ouvrir ces pages sans réseau ;
+//  - événement « sync » (Background Sync, quand le navigateur le permet) :
+//    demande aux pages ouvertes de vider leur file de modifications vers /sync.
+const PAGES_CACHE = 'pages-v1';
+const OFFLINE_PAGES = /^\/(students|remarks\/\d+)$/;
+const SYNC_TAG = 'remarks-sync';
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key !== PAGES_CACHE).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin || !OFFLINE_PAGES.test(url.pathname)) {
+        return;
+    }
+    event.respondWith(
+        fetch(event.request)
+            .then(response => {
+                if (response.ok) {
+                    const copy = response.clone();
+                    caches.open(PAGES_CACHE).then(cache => cache.put(event.request, copy));
+                }
+                return response;
+            })
+            .catch(() => caches.match(event.request).then(cached => cached || Response.error()))
+    );
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag === SYNC_TAG) {
+        event.waitUntil(
+            self.clients.matchAll({ type: 'window' })
+                .then(clients => clients.forEach(client => client.postMessage('flush-sync-queue')))
+        );
+    }
+});
@@ -1,72 +1,335 @@
 import json
 import os
+import threading
 from datetime import datetime
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
 # Use the project directory on Render (writable)
 DATA_PATH = os.path.join(os.getcwd(), "data.json")
 
+# --- STOCKAGE JSON (DÉPLOIEMENTS HORS LIGNE / DÉMO) ---
+# data.json est un instantané ; chaque mutation est ajoutée en une ligne au
+# journal data.json.journal (O(1)) au lieu de réécrire tout le fichier.
+# Toutes les JSON_STORE_COMPACT_EVERY entrées, le journal est fusionné dans un
+# nouvel instantané écrit dans un fichier temporaire puis renommé (os.replace,
+# atomique), et le journal est vidé. Un verrou de fichier (data.json.lock)
+# sérialise les écritures entre les workers ; chaque processus garde l'état en
+# mémoire, indexé par élève, et ne relit que les nouvelles lignes du journal.
+#
+# L'instantané garde le format historique ("students", "sessions",
+# "selected_sessions") plus une clé "_meta" : numéro de la dernière entrée du
+# journal incluse (seq) et prochain identifiant de séance (monotone, jamais réutilisé).
+
+COMPACT_EVERY = int(os.environ.get("JSON_STORE_COMPACT_EVERY", 1000))
+# fsync après chaque ajout au journal (durable, plus lent) ; 0 pour désactiver
+FSYNC = os.environ.get("JSON_STORE_FSYNC", "1") != "0"
+
+
+def _empty_data():
+    return {"students": [], "sessions": [], "selected_sessions": {}}
+
+
+class _FileLock:
+    """Verrou exclusif inter-processus (fcntl sous Unix, msvcrt sous Windows)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            self._file = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:  # LK_LOCK abandonne après ~10 s : on réessaie
+                        continue
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+class JsonStore:
+    """Instantané + journal en ajout seul, avec index en mémoire par élève."""
+
+    def __init__(self, path):
+        self.path = path
+        self.journal_path = path + ".journal"
+        self.lock = _FileLock(path + ".lock")
+        self._snapshot_stat = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    # --- État en mémoire ---
+
+    def _reset(self, data):
+        meta = data.get("_meta") or {}
+        self.students = {student["id"]: student for student in data.get("students", [])}
+        self.sessions = {}
+        self.sessions_by_student = {}
+        for session in data.get("sessions", []):
+            self._index_session(session)
+        self.selected_sessions = dict(data.get("selected_sessions") or {})
+        self.seq = meta.get("seq", 0)
+        self.next_session_id = meta.get("next_session_id") or max(self.sessions, default=0) + 1
+
+    def _index_session(self, session):
+        self.sessions[session["id"]] = session
+        self.sessions_by_student.setdefault(session["student_id"], {})[session["id"]] = session
+
+    def _apply(self, entry):
+        op = entry["op"]
+        if op == "add_student":
+            self.students[entry["student"]["id"]] = entry["student"]
+        elif op == "add_session":
+            session = entry["session"]
+            self._index_session(session)
+            self.next_session_id = max(self.next_session_id, session["id"] + 1)
+        elif op == "remove_session":
+            session = self.sessions.pop(entry["id"], None)
+            if session is not None:
+                self.sessions_by_student.get(session["student_id"], {}).pop(session["id"], None)
+        elif op == "remove_student":
+            self.students.pop(entry["id"], None)
+            for session_id in self.sessions_by_student.pop(entry["id"], {}):
+                self.sessions.pop(session_id, None)
+            self.selected_sessions.pop(str(entry["id"]), None)
+        elif op == "select":
+            self.selected_sessions[str(entry["student_id"])] = entry["selected"]
+        self.seq = entry["seq"]
+
+    def snapshot(self):
+        return {
+            "students": list(self.students.values()),
+            "sessions": list(self.sessions.values()),
+            "selected_sessions": self.selected_sessions,
+            "_meta": {"seq": self.seq, "next_session_id": self.next_session_id},
+        }
+
+    # --- Synchronisation avec le disque (appelée sous verrou) ---
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _refresh(self):
+        """Recharge l'instantané s'il a changé, puis applique les nouvelles lignes du journal."""
+        stat = self._stat(self.path)
+        if stat is None:
+            print("📁 data.json not found, creating a new one...")
+            self._reset(_empty_data())
+            self._write_snapshot()
+            stat = self._stat(self.path)
+        if stat != self._snapshot_stat:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._reset(json.load(f))
+            except json.JSONDecodeError:
+                print("⚠️ data.json was corrupted, resetting it.")
+                self._reset(_empty_data())
+                self._write_snapshot()
+            self._snapshot_stat = self._stat(self.path)
+            self._journal_offset = 0
+            self._journal_entries = 0
+        self._replay_journal()
+
+    def _replay_journal(self):
+        if not os.path.exists(self.journal_path):
+            self._journal_offset = self._journal_entries = 0
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Ligne incomplète (écriture interrompue) : on la supprime
+                    f.close()
+                    os.truncate(self.journal_path, self._journal_offset)
+                    break
+                entry = json.loads(line)
+                if entry["seq"] > self.seq:
+                    self._apply(entry)
+                self._journal_offset += len(line)
+                self._journal_entries += 1
+
+    def _write_snapshot(self):
+        """Écrit l'instantané dans un fichier temporaire puis le renomme (atomique)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._snapshot_stat = self._stat(self.path)
+
+    def _compact(self):
+        self._write_snapshot()
+        with open(self.journal_path, "wb"):
+            pass
+        self._journal_offset = self._journal_entries = 0
+
+    # --- Opérations publiques ---
+
+    def load_snapshot(self):
+        """Lecture seule (migration) : instantané plus lignes complètes du journal, sans rien écrire.
+
+        Contrairement à read(), un fichier absent ou illisible n'est jamais
+        remplacé : lève FileNotFoundError ou ValueError.
+        """
+        with open(self.path, "r", encoding="utf-8") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{self.path} est illisible (JSON invalide, ligne {e.lineno}).")
+        if not isinstance(data, dict):
+            raise ValueError(f"{self.path} n'est pas un instantané du stockage JSON.")
+        self._reset(data)
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as f:
+                for number, line in enumerate(f, start=1):
+                    if not line.endswith(b"\n"):
+                        break  # écriture interrompue : ignorée, le journal reste intact
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        raise ValueError(f"{self.journal_path} est illisible (ligne {number}).")
+                    if entry["seq"] > self.seq:
+                        self._apply(entry)
+        return self.snapshot()
+
+    def read(self, fn):
+        with self.lock:
+            self._refresh()
+            return fn(self)
+
+    def append(self, entry):
+        """Applique une mutation en mémoire et l'ajoute au journal (une ligne)."""
+        with self.lock:
+            self._refresh()
+            entry = dict(entry, seq=self.seq + 1)
+            line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+            with open(self.journal_path, "ab") as f:
+                f.write(line)
+                f.flush()
+                if FSYNC:
+                    os.fsync(f.fileno())
+            self._apply(entry)
+            self._journal_offset += len(line)
+            self._journal_entries += 1
+            if self._journal_entries >= COMPACT_EVERY:
+                self._compact()
+            return entry
+
+    def replace(self, data):
+        """Remplace tout le contenu (instantané neuf, journal vidé)."""
+        with self.lock:
+            self._refresh()
+            seq, next_session_id = self.seq, self.next_session_id
+            data = dict(_empty_data(), **data)
+            data.pop("_meta", None)
+            self._reset(data)
+            # seq et identifiants restent monotones : une entrée du journal déjà
+            # écrite ne peut pas être rejouée sur le nouveau contenu
+            self.seq = seq
+            self.next_session_id = max(self.next_session_id, next_session_id)
+            self._compact()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Instance du magasin pour DATA_PATH (une par processus)."""
+    global _store
+    with _store_lock:
+        if _store is None or _store.path != DATA_PATH:
+            _store = JsonStore(DATA_PATH)
+        return _store
+
+
 def load_data():
     """Load data from JSON or create an empty one if missing"""
-    if not os.path.exists(DATA_PATH):  # Ensure the file exists
-        print("📁 data.json not found, creating a new one...")
-        save_data({"students": [], "sessions": [], "selected_sessions": {}})
-
-    try:
-        with open(DATA_PATH, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        print("⚠️ data.json was corrupted, resetting it.")
-        save_data({"students": [], "sessions": [], "selected_sessions": {}})
-        return {"students": [], "sessions": [], "selected_sessions": {}}
+    return get_store().read(lambda store: {
+        "students": [dict(student) for student in store.students.values()],
+        "sessions": [dict(session) for session in store.sessions.values()],
+        "selected_sessions": dict(store.selected_sessions),
+    })
 
 def save_data(data):
     """Save data to JSON file in a writable directory"""
-    with open(DATA_PATH, 'w') as f:
-        json.dump(data, f, indent=4)
+    get_store().replace(data)
 
 
-def add_student(name, new_id):
-    data = load_data()
+def get_student(student_id):
+    """Élève par identifiant (index en mémoire), ou None."""
+    return get_store().read(lambda store: store.students.get(student_id))
+
 
+def get_student_sessions(student_id):
+    """Séances d'un élève, sans parcourir toutes les séances."""
+    return get_store().read(lambda store: list(store.sessions_by_student.get(student_id, {}).values()))
+
+
+def add_student(name, new_id):
     # Créer un nouvel élève avec l'ID unique
     new_student = {
         "id": new_id,
         "name": name,
         "phone_number": "",
     }
-    
-    # Ajouter l'élève à la liste
-    data["students"].append(new_student)
-    
-    # Sauvegarder les données mises à jour dans le fichier
-    save_data(data)
+    get_store().append({"op": "add_student", "student": new_student})
 
 
 
 def add_session(remark, student_id):
     """Ajouter une session avec une remarque pour un élève donné"""
-    data = load_data()
-    session_id = len(data["sessions"]) + 1
-    date = datetime.now().strftime("%d.%m.%Y")
-    data["sessions"].append({"id": session_id, "student_id": student_id, "remark": remark, "date": date})
-    save_data(data)
+    store = get_store()
+    with store.lock:
+        # Identifiant monotone, réservé sous verrou : pas de collision entre workers
+        store._refresh()
+        session = {
+            "id": store.next_session_id,
+            "student_id": student_id,
+            "remark": remark,
+            "date": datetime.now().strftime("%d.%m.%Y"),
+        }
+        store.append({"op": "add_session", "session": session})
+    return session["id"]
 
 def remove_session(session_id):
     """Supprimer une session par son ID"""
-    data = load_data()
-    data["sessions"] = [s for s in data["sessions"] if s["id"] != session_id]
-    save_data(data)
+    get_store().append({"op": "remove_session", "id": session_id})
 
 def remove_student(student_id):
     """Supprime un élève et toutes ses remarques."""
-    data = load_data()
-    data["students"] = [s for s in data["students"] if s["id"] != student_id]
-    data["sessions"] = [s for s in data["sessions"] if s["student_id"] != student_id]
-    save_data(data)
+    get_store().append({"op": "remove_student", "id": student_id})
 
 def save_selected_sessions(student_id, selected_sessions):
-    data = load_data()
-    data["selected_sessions"][str(student_id)] = selected_sessions
-    save_data(data)
-
-
+    get_store().append({"op": "select", "student_id": student_id, "selected": selected_sessions})
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, g, make_response, request
+from sqlalchemy import event, func, select, text, update
+from .models import db, Student
+from .assets import DIST_DIR, MANIFEST_NAME
+from .catalogue import get_catalogue
+from .partitions import requested_school_year
+
+
+# --- VERSIONS DES PAGES ET GET CONDITIONNEL (ETag / Last-Modified) ---
+# Chaque page dérive un jeton de version d'une requête très légère :
+#   /students               : nombre d'élèves + somme de students.generation (ci-dessous)
+#   /remarks/<id>           : students.updated_at de l'élève (+ année scolaire affichée)
+#   /programme_maths/<id>   : students.updated_at de l'élève + version du catalogue
+# Toute écriture visible sur ces pages doit donc modifier la ligne de l'élève :
+# les compteurs de séances (counters.py) le font déjà ; les autres écritures
+# (texte d'une remarque, programme) appellent touch_student. Si le jeton
+# correspond à If-None-Match (ou If-Modified-Since), la vue répond 304 sans
+# exécuter ses requêtes ni rendre son gabarit. Le même jeton versionne les
+# fragments mis en cache par fragments.py.
+
+
+# --- GÉNÉRATION DE LA LISTE DES ÉLÈVES ---
+# max(students.updated_at) ne suffit pas comme version de /students : la date
+# est prise en Python avant la validation, et deux écritures concurrentes sur
+# deux élèves peuvent valider dans l'ordre inverse de leurs dates (le max ne
+# bouge pas, l'ETag et le fragment restent périmés).
+#
+# Chaque écriture sur une ligne de students (ORM, UPDATE ensemblistes, import,
+# /sync, archivage, compteurs) lui attribue donc, par déclencheur, une
+# génération plus grande que toutes celles déjà validées pour cette ligne :
+#   Postgres : nextval(students_generation_seq) dans un déclencheur BEFORE ROW,
+#              exécuté après le verrou de la ligne (pas de ligne partagée :
+#              les écritures sur des élèves différents ne s'attendent pas) ;
+#   SQLite   : max(generation) + 1 (les écritures y sont déjà sérialisées).
+# La version est (nombre d'élèves, somme des générations) : une modification
+# augmente strictement la somme, un ajout ou une suppression change le
+# nombre, quel que soit l'ordre de validation. max(updated_at) ne sert plus
+# qu'à Last-Modified (If-None-Match, envoyé par les navigateurs, est prioritaire).
+
+STUDENT_GENERATION_DDL = {
+    'postgresql': [
+        "CREATE SEQUENCE IF NOT EXISTS students_generation_seq",
+        "CREATE OR REPLACE FUNCTION next_student_generation() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN NEW.generation := nextval('students_generation_seq'); RETURN NEW; END $$",
+        "DROP TRIGGER IF EXISTS students_generation ON students",
+        "CREATE TRIGGER students_generation BEFORE INSERT OR UPDATE ON students "
+        "FOR EACH ROW EXECUTE FUNCTION next_student_generation()",
+    ],
+    'sqlite': [
+        "CREATE TRIGGER IF NOT EXISTS students_generation_ai AFTER INSERT ON students BEGIN "
+        "UPDATE students SET generation = (SELECT coalesce(max(generation), 0) + 1 FROM students) "
+        "WHERE id = NEW.id; END",
+        # WHEN : la mise à jour faite par le déclencheur ne le relance pas (recursive_triggers)
+        "CREATE TRIGGER IF NOT EXISTS students_generation_au AFTER UPDATE ON students "
+        "WHEN NEW.generation IS OLD.generation BEGIN "
+        "UPDATE students SET generation = (SELECT coalesce(max(generation), 0) + 1 FROM students) "
+        "WHERE id = NEW.id; END",
+    ],
+}
+
+
+def install_student_generation(connection):
+    """Crée les déclencheurs de students.generation pour le dialecte de la connexion."""
+    for statement in STUDENT_GENERATION_DDL.get(connection.dialect.name, ()):
+        connection.execute(text(statement))
+
+
+@event.listens_for(Student.__table__, 'after_create')
+def _create_student_generation(target, connection, **kw):
+    install_student_generation(connection)
+
+
+def _utc(value):
+    """Les colonnes DateTime sont naïves : on les considère en UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def touch_student(student_id):
+    """Marque l'élève comme modifié (invalide les pages qui dépendent de lui)."""
+    db.session.execute(
+        update(Student)
+        .where(Student.id == student_id)
+        .values(updated_at=datetime.now(timezone.utc))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def roster_version_query():
+    """Requête du jeton de version de la liste des élèves (nombre, somme des générations, dernière modification)."""
+    return select(
+        func.count(Student.id), func.coalesce(func.sum(Student.generation), 0), func.max(Student.updated_at)
+    )
+
+
+def student_version_query(student_id):
+    """Requête de la dernière modification d'un élève."""
+    return select(Student.updated_at).where(Student.id == student_id)
+
+
+def roster_version():
+    """Version de la liste des élèves : `(parties du jeton, dernière modification)`."""
+    count, generations, last_modified = db.session.execute(roster_version_query()).one()
+    return (count, generations), last_modified
+
+
+def student_version(student_id):
+    """Version des pages d'un élève, ou None si l'élève n'existe pas."""
+    last_modified = db.session.execute(student_version_query(student_id)).scalar_one_or_none()
+    if last_modified is None:
+        return None
+    return (student_id, last_modified), last_modified
+
+
+def remarks_version(student_id):
+    """Version de la page des remarques : celle de l'élève plus l'année scolaire affichée."""
+    current = student_version(student_id)
+    if current is None:
+        return None
+    parts, last_modified = current
+    value = request.args.get('school_year', '')
+    try:
+        # Année résolue (l'année en cours par défaut) : la version change à la rentrée
+        school_year = requested_school_year(value)
+    except ValueError:
+        school_year = value  # la vue redirige avec un message d'erreur
+    return (*parts, school_year), last_modified
+
+
+def programme_version(student_id):
+    """Version de la page programme : celle de l'élève plus celle du catalogue."""
+    current = student_version(student_id)
+    if current is None:
+        return None
+    parts, last_modified = current
+    return (*parts, *get_catalogue().version), last_modified
+
+
+def default_etag_salt(app):
+    """Empreinte du code de l'application, de ses gabarits et du manifeste des fichiers statiques.
+
+    Déterministe : tous les workers (et toutes les instances d'un même
+    déploiement) calculent le même sel ; il change dès qu'un de ces fichiers change.
+    """
+    digest = hashlib.sha1()
+    paths = [os.path.join(app.root_path, name) for name in os.listdir(app.root_path) if name.endswith('.py')]
+    for directory, _, names in os.walk(os.path.join(app.root_path, app.template_folder)):
+        paths.extend(os.path.join(directory, name) for name in names)
+    paths.append(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME))
+    for path in sorted(paths):
+        if os.path.isfile(path):
+            digest.update(os.path.relpath(path, app.root_path).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _etag(parts):
+    raw = "|".join(str(part) for part in (current_app.config['ETAG_SALT'], request.endpoint, *parts))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified is not None:
+        return _utc(last_modified).replace(microsecond=0) <= request.if_modified_since
+    return False
+
+
+def conditional_get(version):
+    """Décorateur de vue : ETag/Last-Modified à partir de `version(**view_args)`, 304 si inchangé.
+
+    `version` retourne `(parties du jeton, dernière modification)` ou None
+    (pas de GET conditionnel, par exemple pour un élève introuvable).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            current = version(*args, **kwargs)
+            if current is None:
+                return view(*args, **kwargs)
+            parts, last_modified = current
+            # Reprise par le cache de fragments (fragments.py) comme numéro de génération
+            g.resource_version = parts
+            etag = _etag(parts)
+            if _not_modified(etag, last_modified):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = _utc(last_modified)
+            # Le navigateur garde la page mais la revalide à chaque affichage
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
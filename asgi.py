@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+# Point d'entrée ASGI : API JSON asynchrone sur /api, application Flask sur le reste.
+#
+#   uvicorn asgi:app --port 8080
+#   gunicorn asgi:app -k uvicorn.workers.UvicornWorker
+#
+# Les pages Flask y tournent dans un pool de threads (adaptateur WSGI d'asgiref) ;
+# `gunicorn run:app` reste utilisable pour servir l'application Flask seule.
+from dotenv import load_dotenv
+
+# Variables d'environnement du fichier .env (développement local), avant la création de l'application
+load_dotenv()
+
+from app import create_app  # noqa: E402
+from app.api import create_asgi_app  # noqa: E402
+
+flask_app = create_app()
+app = create_asgi_app(flask_app)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""Montée en concurrence : API JSON asynchrone (/api) contre les routes Flask synchrones.
+
+Chaque pile tourne dans son propre serveur, avec un seul processus :
+  - synchrone  : gunicorn (gunicorn.conf.py du dépôt), --threads threads ;
+  - asynchrone : uvicorn, application de asgi.py (l'API et Flask montée à côté).
+Pour chaque ressource interrogée en boucle par les clients, les deux
+équivalents sont sollicités par --concurrency clients HTTP simultanés
+(connexions persistantes) pendant --duration secondes :
+
+    élèves     /students                  /api/students
+    séances    /remarks/<id>/sessions     /api/students/<id>/remarks
+    programme  /programme_maths/<id>      /api/students/<id>/programme
+
+L'écart dépend surtout de la latence de la base : mesurer aussi contre un
+Postgres distant (--database-url) plutôt que seulement en local.
+
+    python -m benchmarks.api_bench
+    python -m benchmarks.api_bench --database-url postgresql://localhost/bench --concurrency 1 16 64
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import make_app, percentile, seed, seed_programme, sqlite_url
+
+RESOURCES = {
+    "students": ("/students", "/api/students"),
+    "remarks": ("/remarks/{id}/sessions", "/api/students/{id}/remarks"),
+    "programme": ("/programme_maths/{id}", "/api/students/{id}/programme"),
+}
+
+
+def asgi_factory():
+    """Application de asgi.py, sans lecture du fichier .env (uvicorn --factory)."""
+    from app import create_app
+    from app.api import create_asgi_app
+
+    return create_asgi_app(create_app())
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (code {process.returncode})")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Le serveur n'écoute pas sur le port {port}")
+
+
+def start_server(stack, environ, threads):
+    port = _free_port()
+    env = {**os.environ, **environ, "PORT": str(port)}
+    if stack == "sync":
+        env.update(WEB_CONCURRENCY="1", GUNICORN_THREADS=str(threads))
+        command = [sys.executable, "-m", "gunicorn", "app:create_app()"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "--factory", "benchmarks.api_bench:asgi_factory",
+                   "--port", str(port), "--log-level", "warning", "--no-access-log"]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    _wait_until_ready(port, process)
+    return process, port
+
+
+def load(port, path, student_ids, concurrency, duration):
+    """`concurrency` clients HTTP/1.1 en boucle sur `path` pendant `duration` secondes."""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(client_id):
+        rng = random.Random(client_id)
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request("GET", path.format(id=rng.choice(student_ids)))
+                response = connection.getresponse()
+                response.read()
+                failed += response.status >= 400
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                continue
+            local.append(time.perf_counter() - started)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("api_bench.db"))
+    parser.add_argument("--students", type=int, default=500)
+    parser.add_argument("--sessions-per-student", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=5.0, help="secondes par mesure")
+    parser.add_argument("--threads", type=int, default=4, help="threads du worker gunicorn synchrone")
+    parser.add_argument("--resources", nargs="*", default=list(RESOURCES), choices=list(RESOURCES))
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, reset=True)
+    student_ids = seed(app, students=args.students, sessions_per_student=args.sessions_per_student)
+    seed_programme(app, student_ids)
+    with app.app_context():
+        from app.models import db, Student
+        student_ids = db.session.execute(
+            db.select(Student.id).where(Student.is_archived.is_(False))
+        ).scalars().all()
+        db.engine.dispose()
+
+    environ = {"DATABASE_URL": args.database_url, "SECRET_KEY": "benchmark", "METRICS_ENABLED": "false"}
+    report = {}
+    for stack, index in (("sync", 0), ("async", 1)):
+        process, port = start_server(stack, environ, args.threads)
+        try:
+            for resource in args.resources:
+                path = RESOURCES[resource][index]
+                load(port, path, student_ids, 1, 1.0)  # chauffe (connexions, catalogue)
+                for concurrency in args.concurrency:
+                    result = load(port, path, student_ids, concurrency, args.duration)
+                    report.setdefault(resource, {}).setdefault(str(concurrency), {})[stack] = result
+                    print(f"{stack:5s} {resource:10s} x{concurrency:<4d} {result['rps']:8.1f} req/s  "
+                          f"p50 {result['p50_ms']:8.2f} ms  p99 {result['p99_ms']:8.2f} ms  "
+                          f"erreurs {result['errors']}", file=sys.stderr)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    print(json.dumps({
+        "database": args.database_url.split(":", 1)[0],
+        "sync_threads": args.threads,
+        "paths": {resource: dict(zip(("sync", "async"), RESOURCES[resource])) for resource in args.resources},
+        "results": report,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Outils partagés par les scripts de benchmark (application, données, statistiques)."""
+
+import os
+import random
+import tempfile
+from datetime import date, timedelta
+
+
+def sqlite_url(name="benchmark.db"):
+    """URL d'une base SQLite jetable dans le répertoire temporaire."""
+    return "sqlite:///" + os.path.join(tempfile.gettempdir(), name)
+
+
+def make_app(database_url, reset=True, **environ):
+    """Crée l'application sur `database_url` (variables d'environnement additionnelles en option)."""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.update({key: str(value) for key, value in environ.items()})
+
+    from app import create_app
+    from app.models import db
+
+    app = create_app()
+    with app.app_context():
+        if reset:
+            db.drop_all()
+        db.create_all()
+    return app
+
+
+def insert_in_chunks(model, rows, chunk_size=10000):
+    """INSERT multi-lignes par paquets (une liste vide n'émet aucune requête)."""
+    from app.models import db
+
+    for start in range(0, len(rows), chunk_size):
+        db.session.execute(db.insert(model), rows[start:start + chunk_size])
+
+
+def seed(app, students=200, sessions_per_student=20, seed_value=42):
+    """Insère des élèves et des séances synthétiques, puis recalcule les compteurs."""
+    from app.models import db, Student, Session
+    from app.counters import refresh_session_counters
+
+    rng = random.Random(seed_value)
+    today = date.today()
+    with app.app_context():
+        db.session.execute(
+            db.insert(Student),
+            [{"name": f"Élève {i:05d}", "is_archived": rng.random() < 0.1} for i in range(students)],
+        )
+        student_ids = db.session.execute(db.select(Student.id)).scalars().all()
+        rows = [
+            {
+                "student_id": student_id,
+                "remark": f"Séance {n} : exercices de révision",
+                "date": today - timedelta(days=rng.randint(0, 700)),
+                "selected": rng.random() < 0.7,
+            }
+            for student_id in student_ids
+            for n in range(sessions_per_student)
+        ]
+        insert_in_chunks(Session, rows)
+        refresh_session_counters()
+        db.session.commit()
+        return student_ids
+
+
+def seed_programme(app, student_ids, density=0.4, seed_value=7):
+    """Initialise le catalogue puis coche au hasard une fraction `density` des sous-chapitres."""
+    from app.models import db, ProgrammeSelection
+    from app.catalogue import get_catalogue, seed_catalogue
+
+    rng = random.Random(seed_value)
+    with app.app_context():
+        seed_catalogue()
+        db.session.commit()
+        subchapter_ids = sorted(get_catalogue().subchapter_ids)
+        rows = [
+            {"student_id": student_id, "subchapter_id": subchapter_id}
+            for student_id in student_ids
+            for subchapter_id in subchapter_ids
+            if rng.random() < density
+        ]
+        insert_in_chunks(ProgrammeSelection, rows)
+        db.session.commit()
+        return len(rows)
+
+
+def percentile(sorted_samples, percent):
+    """Percentile par rang le plus proche sur une liste triée."""
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, -(-len(sorted_samples) * percent // 100) - 1)
+    return sorted_samples[int(rank)]
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Benchmark de la couverture du programme pour toute la classe (/coverage).
+
+    python -m benchmarks.coverage_bench --students 3000
+    python -m benchmarks.coverage_bench --database-url postgresql://localhost/bench
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.common import make_app, percentile, seed, seed_programme, sqlite_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("coverage_bench.db"))
+    parser.add_argument("--students", type=int, default=3000)
+    parser.add_argument("--density", type=float, default=0.4, help="fraction de sous-chapitres cochés")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, reset=True)
+    student_ids = seed(app, students=args.students, sessions_per_student=0)
+    selections = seed_programme(app, student_ids, density=args.density)
+
+    from app.coverage import class_coverage
+    from app.models import db
+
+    query_times, page_times, json_times = [], [], []
+    with app.app_context():
+        class_coverage()  # chauffe le cache du catalogue
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            catalogue, rows = class_coverage()
+            query_times.append(time.perf_counter() - started)
+            db.session.remove()
+
+    client = app.test_client()
+    for url, times in (("/coverage", page_times), ("/coverage.json", json_times)):
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = client.get(url)
+            times.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+
+    def summary(samples):
+        samples.sort()
+        return {"p50_ms": round(percentile(samples, 50) * 1000, 1),
+                "p95_ms": round(percentile(samples, 95) * 1000, 1)}
+
+    print(json.dumps({
+        "students": len(rows),
+        "selections": selections,
+        "class_coverage": summary(query_times),
+        "GET /coverage": summary(page_times),
+        "GET /coverage.json": summary(json_times),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Générateur de données synthétiques reproductibles (élèves, séances, programme).
+
+Les volumes sont réglables ; à graine égale, deux bases générées sont
+identiques (mêmes noms, remarques, sélections ; dates relatives au jour de
+génération), ce qui rend les mesures de benchmarks/suite.py comparables
+d'une exécution à l'autre.
+
+    python -m benchmarks.dataset --students 5000 --sessions 1000000 --selections 100000
+    python -m benchmarks.dataset --database-url postgresql://localhost/bench
+"""
+
+import argparse
+import json
+import random
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from benchmarks.common import insert_in_chunks, make_app, sqlite_url
+
+SCHOOLS = ("Lycée Ibn Sina", "Lycée Al Khawarizmi", "Lycée Descartes", "Lycée Victor Hugo", None)
+APPRECIATIONS = (
+    "Bonne compréhension", "Difficultés avec", "À revoir :", "Exercices réussis sur", "Erreurs de calcul en",
+    "Méthode maîtrisée pour", "Confusion persistante dans", "Progrès nets en",
+)
+
+Volumes = namedtuple('Volumes', 'students sessions selections archived_ratio')
+
+
+def _remark(rng, topics, n):
+    return f"{rng.choice(APPRECIATIONS)} {rng.choice(topics).lower()}. Séance {n}."
+
+
+def seed_dataset(app, volumes, seed_value=2025, chunk_size=20000, history_days=730):
+    """Remplit une base vide selon `volumes`, séances sur `history_days` jours. Retourne le décompte par table."""
+    from app.catalogue import MATHS_2BAC_PROGRAMME, get_catalogue, invalidate_catalogue, seed_catalogue
+    from app.counters import refresh_session_counters
+    from app.models import db, Student, Session, ProgrammeSelection
+
+    rng = random.Random(seed_value)
+    topics = [title for _, titles in MATHS_2BAC_PROGRAMME for title in titles]
+    today = date.today()
+    with app.app_context():
+        seed_catalogue()
+        db.session.commit()
+        invalidate_catalogue()
+        subchapter_ids = sorted(get_catalogue().subchapter_ids)
+
+        insert_in_chunks(Student, [
+            {
+                "name": f"Élève {i:05d}",
+                "school_name": rng.choice(SCHOOLS),
+                "phone_number": f"06{rng.randrange(10 ** 8):08d}",
+                "is_archived": rng.random() < volumes.archived_ratio,
+            }
+            for i in range(volumes.students)
+        ], chunk_size)
+        db.session.commit()
+        student_ids = db.session.execute(db.select(Student.id).order_by(Student.id)).scalars().all()
+
+        # Séances réparties de façon inégale (quelques élèves très suivis, beaucoup peu)
+        if student_ids:
+            weights = [rng.paretovariate(1.5) for _ in student_ids]
+            for start in range(0, volumes.sessions, chunk_size):
+                count = min(chunk_size, volumes.sessions - start)
+                owners = rng.choices(student_ids, weights, k=count)
+                db.session.execute(db.insert(Session), [
+                    {
+                        "student_id": owner,
+                        "remark": _remark(rng, topics, start + n),
+                        "date": today - timedelta(days=rng.randint(0, history_days)),
+                        "selected": rng.random() < 0.7,
+                    }
+                    for n, owner in enumerate(owners)
+                ])
+                db.session.commit()
+
+        # Couples (élève, sous-chapitre) tirés sans remise
+        pairs = len(student_ids) * len(subchapter_ids)
+        picked = sorted(rng.sample(range(pairs), min(volumes.selections, pairs)))
+        insert_in_chunks(ProgrammeSelection, [
+            {
+                "student_id": student_ids[index // len(subchapter_ids)],
+                "subchapter_id": subchapter_ids[index % len(subchapter_ids)],
+            }
+            for index in picked
+        ], chunk_size)
+
+        refresh_session_counters()
+        db.session.commit()
+        return table_counts()
+
+
+def table_counts():
+    """Nombre de lignes des tables principales (empreinte du jeu de données)."""
+    from app.models import db, Student, Session, ProgrammeSelection
+
+    return {
+        model.__tablename__: db.session.execute(db.select(db.func.count()).select_from(model)).scalar()
+        for model in (Student, Session, ProgrammeSelection)
+    }
+
+
+def add_volume_arguments(parser):
+    """Options de volumes communes au générateur et à la suite de benchmarks."""
+    parser.add_argument("--students", type=int, default=5000)
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--selections", type=int, default=100_000, help="couples élève/sous-chapitre cochés")
+    parser.add_argument("--archived-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=2025, help="graine du générateur")
+
+
+def volumes_from_args(args):
+    return Volumes(args.students, args.sessions, args.selections, args.archived_ratio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("benchmark_suite.db"))
+    add_volume_arguments(parser)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, reset=True)
+    started = time.perf_counter()
+    counts = seed_dataset(app, volumes_from_args(args), seed_value=args.seed)
+    print(json.dumps({"rows": counts, "seconds": round(time.perf_counter() - started, 1)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
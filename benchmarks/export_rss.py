@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Export en flux des remarques : mémoire résidente (RSS) du worker pendant l'export.
+
+Insère N séances synthétiques (par paquets, dans un processus séparé pour ne
+pas fausser la mesure), puis lit /export/remarks.<format> en flux et échoue
+(code 1) si le RSS dépasse la mémoire de départ de plus de --rss-ceiling-mb.
+
+    python -m benchmarks.export_rss --rows 1000000
+    python -m benchmarks.export_rss --database-url postgresql://localhost/bench --format ndjson
+"""
+
+import argparse
+import gc
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_app, sqlite_url
+
+
+def current_rss_mb():
+    """RSS courant du processus en Mio (Linux : /proc/self/statm)."""
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def seed_rows(database_url, rows, students, chunk_size=20000):
+    """Insère `rows` séances réparties sur `students` élèves, sans tout garder en mémoire."""
+    app = make_app(database_url, reset=True)
+    from app.models import db, Student, Session
+    from app.counters import refresh_session_counters
+
+    today = date.today()
+    with app.app_context():
+        db.session.execute(db.insert(Student), [{"name": f"Élève {i:05d}"} for i in range(students)])
+        student_ids = db.session.execute(db.select(Student.id)).scalars().all()
+        for start in range(0, rows, chunk_size):
+            db.session.execute(db.insert(Session), [
+                {
+                    "student_id": student_ids[n % students],
+                    "remark": f"Séance {n} : exercices de révision, méthode « pas à pas »",
+                    "date": today - timedelta(days=n % 700),
+                    "selected": n % 3 != 0,
+                }
+                for n in range(start, min(rows, start + chunk_size))
+            ])
+            db.session.commit()
+        refresh_session_counters()
+        db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("export_rss.db"))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--format", choices=("csv", "ndjson"), default="csv")
+    parser.add_argument("--rss-ceiling-mb", type=float, default=64.0,
+                        help="croissance maximale tolérée du RSS pendant l'export")
+    parser.add_argument("--skip-seed", action="store_true", help="réutilise les données déjà insérées")
+    parser.add_argument("--seed-only", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.seed_only:
+        seed_rows(args.database_url, args.rows, args.students)
+        return
+
+    if not args.skip_seed:
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.export_rss", "--seed-only", "--database-url", args.database_url,
+             "--rows", str(args.rows), "--students", str(args.students)],
+            check=True,
+        )
+        print(f"Données insérées en {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+    app = make_app(args.database_url, reset=False)
+    client = app.test_client()
+    client.get(f"/export/remarks.{args.format}?student_id=1").close()  # chauffe (imports, pool)
+    gc.collect()
+
+    baseline = peak = current_rss_mb()
+    exported_bytes = lines = 0
+    started = time.perf_counter()
+    response = client.get(f"/export/remarks.{args.format}", buffered=False)
+    for chunk in response.response:
+        exported_bytes += len(chunk)
+        lines += chunk.count(b"\n") if isinstance(chunk, bytes) else chunk.count("\n")
+        peak = max(peak, current_rss_mb())
+    response.close()
+    seconds = time.perf_counter() - started
+
+    growth = peak - baseline
+    report = {
+        "format": args.format,
+        "rows": args.rows,
+        "exported_mb": round(exported_bytes / (1024 * 1024), 1),
+        "lines": lines,
+        "seconds": round(seconds, 2),
+        "rows_per_second": round(args.rows / seconds) if seconds else None,
+        "rss_baseline_mb": round(baseline, 1),
+        "rss_peak_mb": round(peak, 1),
+        "rss_growth_mb": round(growth, 1),
+        "rss_ceiling_mb": args.rss_ceiling_mb,
+    }
+    print(json.dumps(report, indent=2))
+    if growth > args.rss_ceiling_mb:
+        print("ÉCHEC : la mémoire du worker a dépassé le plafond pendant l'export.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Élagage des partitions de `sessions` par année scolaire (Postgres).
+
+Une base est remplie avec --years années d'historique (table `sessions`
+ordinaire, telle que créée par create_all), puis la migration de
+partitionnement (a9d4e2b7c615) est appliquée : elle déplace les lignes
+existantes, et sa durée est mesurée. Avant et après, chaque requête est
+exécutée --repeat fois et son plan (EXPLAIN) donne les tables lues :
+
+    remarques (année)  /remarks/<id>               une seule partition (année en cours par défaut)
+    remarques (toutes) /remarks/<id>?school_year=all  toutes les partitions (index par partition)
+    export semaine     /export/remarks.csv?start=  une seule partition
+    tableau de bord    /students                   aucune : compteurs dénormalisés, pas de lecture de sessions
+
+La commande échoue (code 1) si une requête limitée à une année lit plus
+d'une partition, ou si le tableau de bord lit la table sessions.
+
+    python -m benchmarks.partition_bench --database-url postgresql://localhost/bench
+    python -m benchmarks.partition_bench --database-url postgresql://localhost/bench --sessions 2000000 --years 6
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from benchmarks.common import make_app
+from benchmarks.dataset import Volumes, seed_dataset
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations")
+BEFORE_PARTITIONING = "f2c8d4b6a913"
+
+
+def _relations(plan):
+    """Tables lues par un plan EXPLAIN (FORMAT JSON), récursivement."""
+    found = set()
+    if "Relation Name" in plan:
+        found.add(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found |= _relations(child)
+    return found
+
+
+def queries(student_ids, school_year):
+    """Requêtes mesurées : `nom -> (fabrique de requête, lecture limitée à une année ?)`."""
+    from app.exporter import export_query
+    from app.queries import session_group_query, student_summaries_query
+
+    today = date.today()
+    return {
+        "remarks_school_year": (
+            lambda rng: session_group_query(rng.choice(student_ids), False, limit=51, school_year=school_year), True),
+        "remarks_all_years": (lambda rng: session_group_query(rng.choice(student_ids), False, limit=51), False),
+        "export_week": (lambda rng: export_query(start=today - timedelta(days=7), end=today), True),
+        "dashboard": (lambda rng: student_summaries_query(archived=False), None),
+    }
+
+
+def measure(app, student_ids, school_year, repeat, seed_value):
+    from app.models import db
+
+    report = {}
+    with app.app_context():
+        dialect = db.engine.dialect
+        for name, (build, _) in queries(student_ids, school_year).items():
+            rng = random.Random(seed_value)
+            statement = build(rng)
+            sql = str(statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+            plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()[0]["Plan"]
+            timings = []
+            for _ in range(repeat):
+                statement = build(rng)
+                started = time.perf_counter()
+                db.session.execute(statement).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            relations = sorted(_relations(plan))
+            report[name] = {
+                "p50_ms": round(statistics.median(timings), 2),
+                "max_ms": round(max(timings), 2),
+                "sessions_relations": [relation for relation in relations if relation.startswith("sessions")],
+            }
+        db.session.rollback()
+    return report
+
+
+def partition(app):
+    """Applique la migration de partitionnement sur la base créée par create_all ; retourne sa durée."""
+    from flask_migrate import Migrate, stamp, upgrade
+    from app.models import db
+
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        db.session.remove()
+        stamp(revision=BEFORE_PARTITIONING)
+        started = time.perf_counter()
+        upgrade(revision="a9d4e2b7c615")
+        return round(time.perf_counter() - started, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True, help="base Postgres jetable (elle est vidée)")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=500_000)
+    parser.add_argument("--years", type=int, default=5, help="années d'historique des séances")
+    parser.add_argument("--repeat", type=int, default=50, help="exécutions mesurées par requête")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+    if not args.database_url.startswith("postgresql"):
+        parser.error("le partitionnement natif n'existe que sur Postgres "
+                     "(SQLite : `flask detach-school-year` archive les années dans des bases attachées)")
+
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from app.models import db, Student
+    from app.partitions import school_year_of
+
+    app = make_app(args.database_url, reset=True, METRICS_ENABLED="false", FRAGMENT_CACHE="off")
+    started = time.perf_counter()
+    counts = seed_dataset(app, Volumes(args.students, args.sessions, 0, 0.1), seed_value=args.seed,
+                          history_days=365 * args.years)
+    seed_seconds = round(time.perf_counter() - started, 1)
+    with app.app_context():
+        db.session.execute(text("ANALYZE"))
+        db.session.commit()
+        student_ids = db.session.execute(
+            db.select(Student.id).where(Student.is_archived.is_(False), Student.unrecorded_count > 0)
+        ).scalars().all()
+
+    school_year = school_year_of(date.today())
+    before = measure(app, student_ids, school_year, args.repeat, args.seed)
+    migration_seconds = partition(app)
+    after = measure(app, student_ids, school_year, args.repeat, args.seed)
+
+    failures = []
+    for name, (_, single_year) in queries(student_ids, school_year).items():
+        touched = after[name]["sessions_relations"]
+        if single_year and len(touched) != 1:
+            failures.append(f"{name} lit {len(touched)} partition(s) : {', '.join(touched)}")
+        if single_year is None and touched:
+            failures.append(f"{name} lit la table sessions : {', '.join(touched)}")
+
+    print(json.dumps({
+        "volumes": counts,
+        "years": args.years,
+        "school_year": school_year,
+        "seed_seconds": seed_seconds,
+        "migration_seconds": migration_seconds,
+        "queries": {name: {"unpartitioned": before[name], "partitioned": after[name]} for name in before},
+    }, indent=2))
+    for failure in failures:
+        print(f"ÉCHEC {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""Test de charge des réglages du pool de connexions.
+
+Exécute les pages /students et /remarks/<id> depuis plusieurs threads pour
+chaque configuration de pool et affiche le débit obtenu. Sur SQLite les
+réglages de pool sont ignorés (voir app/engine_options.py) : les écarts ne
+sont significatifs que sur Postgres.
+
+    python -m benchmarks.pool_load                      # SQLite jetable
+    python -m benchmarks.pool_load --database-url postgresql://localhost/bench
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+
+from benchmarks.common import make_app, percentile, seed, sqlite_url
+
+# Chaque réglage est un jeu de variables d'environnement lues par engine_options_from_env
+SETTINGS = {
+    "queue-2": {"DB_POOL_MODE": "queue", "DB_POOL_SIZE": 2, "DB_MAX_OVERFLOW": 0},
+    "queue-5+5": {"DB_POOL_MODE": "queue", "DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 5},
+    "queue-5+5-no-pre-ping": {"DB_POOL_MODE": "queue", "DB_POOL_SIZE": 5, "DB_MAX_OVERFLOW": 5,
+                              "DB_POOL_PRE_PING": "false"},
+    "queue-10": {"DB_POOL_MODE": "queue", "DB_POOL_SIZE": 10, "DB_MAX_OVERFLOW": 0},
+    "null": {"DB_POOL_MODE": "null"},
+}
+
+
+def run_setting(database_url, environ, threads, duration, student_ids):
+    app = make_app(database_url, reset=False, **environ)
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        rng = random.Random(worker_id)
+        client = app.test_client()
+        local = []
+        while time.perf_counter() < deadline:
+            url = "/students" if rng.random() < 0.5 else f"/remarks/{rng.choice(student_ids)}"
+            started = time.perf_counter()
+            response = client.get(url)
+            local.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(local)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+
+    with app.app_context():
+        from app.models import db
+        db.engine.dispose()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("pool_load.db"))
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0, help="secondes par réglage")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--settings", nargs="*", default=list(SETTINGS), choices=list(SETTINGS))
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, reset=True)
+    student_ids = seed(app, students=args.students)
+    with app.app_context():
+        from app.models import db
+        db.engine.dispose()
+
+    results = {}
+    for name in args.settings:
+        results[name] = run_setting(args.database_url, SETTINGS[name], args.threads, args.duration, student_ids)
+        print(f"{name:24s} {results[name]}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Vérifie l'aiguillage des lectures vers la réplique (DATABASE_READ_URL).
+
+La réplique est simulée par une seconde base, copie du primaire au moment
+du remplissage et jamais mise à jour ensuite : elle a un « retard » infini,
+ce qui rend visible la base lue par chaque page. Scénario (client de test
+Flask, un navigateur = un cookie de session) :
+
+    1. A lit /students                    -> réplique
+    2. A ajoute un élève (POST /students) -> primaire
+    3. A suit la redirection              -> primaire (fenêtre de lecture), l'élève est affiché
+    4. B lit /students                    -> réplique, l'élève n'y est pas encore
+    5. A relit /students après la fenêtre -> réplique de nouveau
+
+Les requêtes SQL sont comptées par moteur. La commande échoue (code 1) si
+une étape lit la mauvaise base, en particulier si A ne voit pas sa propre
+écriture (étape 3).
+
+    python -m benchmarks.replica_check
+    python -m benchmarks.replica_check --database-url postgresql://localhost/bench \\
+        --read-url postgresql://localhost/bench_replica
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import time
+from collections import Counter
+
+from sqlalchemy import event
+
+from benchmarks.common import make_app, seed, sqlite_url
+
+
+def _sqlite_path(url):
+    return url[len("sqlite:///"):]
+
+
+def make_replica(database_url, read_url, app):
+    """Recopie le primaire dans la réplique (fichier SQLite, ou pg_dump/psql pour Postgres)."""
+    from app.models import db
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    if database_url.startswith("sqlite"):
+        shutil.copyfile(_sqlite_path(database_url), _sqlite_path(read_url))
+        return
+    import subprocess
+    dump = subprocess.run(["pg_dump", "--clean", "--if-exists", "--no-owner", "--dbname", database_url],
+                          check=True, capture_output=True).stdout
+    subprocess.run(["psql", "--quiet", "--dbname", read_url], input=dump, check=True, capture_output=True)
+
+
+def count_statements(app):
+    """Compte les requêtes SQL exécutées par chaque moteur (clé de bind, None pour le primaire)."""
+    from app.models import db
+
+    counts = Counter()
+    with app.app_context():
+        engines = dict(db.engines)
+    for key, engine in engines.items():
+        event.listen(engine, "before_cursor_execute",
+                     lambda *args, key=key or "primary": counts.update((key,)))
+    return counts
+
+
+def step(counts, client, method, path, **kwargs):
+    """Exécute une requête et retourne `(réponse, requêtes SQL par moteur)`."""
+    before = dict(counts)
+    response = client.open(path, method=method, **kwargs)
+    return response, {key: counts[key] - before.get(key, 0) for key in counts if counts[key] != before.get(key, 0)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("replica_primary.db"),
+                        help="base primaire jetable (elle est vidée)")
+    parser.add_argument("--read-url", default=sqlite_url("replica_copy.db"),
+                        help="base réplique jetable (écrasée par une copie du primaire)")
+    parser.add_argument("--students", type=int, default=50)
+    parser.add_argument("--window", type=float, default=1.0, help="READ_AFTER_WRITE_SECONDS")
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    app = make_app(args.database_url, reset=True, DATABASE_READ_URL=args.read_url,
+                   READ_AFTER_WRITE_SECONDS=args.window, FRAGMENT_CACHE="off", METRICS_ENABLED="false")
+    seed(app, students=args.students, sessions_per_student=3)
+    make_replica(args.database_url, args.read_url, app)
+    counts = count_statements(app)
+
+    name = f"Élève réplique {time.time_ns()}"
+    alice, bob = app.test_client(), app.test_client()
+    report, failures = {}, []
+
+    def check(label, response, used, expected, visible=None):
+        report[label] = {"status": response.status_code, "statements": used}
+        if set(used) != {expected}:
+            failures.append(f"{label} : requêtes sur {sorted(used)}, attendu {expected}")
+        if visible is not None and (name in response.get_data(as_text=True)) != visible:
+            failures.append(f"{label} : élève ajouté {'absent' if visible else 'présent'}")
+
+    check("1_read", *step(counts, alice, "GET", "/students"), "replica", visible=False)
+    response, used = step(counts, alice, "POST", "/students", data={"name": name})
+    check("2_write", response, used, "primary")
+    check("3_read_own_write", *step(counts, alice, "GET", "/students"), "primary", visible=True)
+    check("4_other_client", *step(counts, bob, "GET", "/students"), "replica", visible=False)
+    time.sleep(args.window + 0.1)
+    check("5_after_window", *step(counts, alice, "GET", "/students"), "replica", visible=False)
+
+    print(json.dumps({"window_seconds": args.window, "steps": report}, indent=2, ensure_ascii=False))
+    for failure in failures:
+        print(f"ÉCHEC {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
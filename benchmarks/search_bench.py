@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""Benchmark de la recherche plein texte dans les remarques (/search.json).
+
+Les remarques synthétiques combinent des titres du programme de maths et des
+appréciations, ce qui donne des requêtes plus ou moins sélectives.
+
+    python -m benchmarks.search_bench --rows 1000000
+    python -m benchmarks.search_bench --database-url postgresql://localhost/bench
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import date, timedelta
+
+from benchmarks.common import make_app, percentile, sqlite_url
+
+APPRECIATIONS = (
+    "Bonne compréhension", "Difficultés avec", "À revoir :", "Exercices réussis sur", "Erreurs de calcul en",
+    "Méthode maîtrisée pour", "Confusion persistante dans", "Progrès nets en",
+)
+QUERIES = ("intégration par parties", "theoreme valeurs intermediaires", "suite géométrique",
+           "\"nombres complexes\"", "dérivée seconde", "difficultes")
+
+
+def seed_remarks(app, rows, students, chunk_size=20000, seed_value=3):
+    from app.catalogue import MATHS_2BAC_PROGRAMME
+    from app.models import db, Student, Session
+
+    rng = random.Random(seed_value)
+    topics = [title for _, titles in MATHS_2BAC_PROGRAMME for title in titles]
+    today = date.today()
+    with app.app_context():
+        db.session.execute(db.insert(Student), [{"name": f"Élève {i:05d}"} for i in range(students)])
+        student_ids = db.session.execute(db.select(Student.id)).scalars().all()
+        for start in range(0, rows, chunk_size):
+            db.session.execute(db.insert(Session), [
+                {
+                    "student_id": rng.choice(student_ids),
+                    "remark": f"{rng.choice(APPRECIATIONS)} {rng.choice(topics).lower()}. Séance {n}.",
+                    "date": today - timedelta(days=rng.randint(0, 700)),
+                    "selected": rng.random() < 0.7,
+                }
+                for n in range(start, min(rows, start + chunk_size))
+            ])
+            db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("search_bench.db"))
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true", help="réutilise les données déjà insérées")
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, reset=not args.skip_seed)
+    if not args.skip_seed:
+        started = time.perf_counter()
+        seed_remarks(app, args.rows, args.students)
+        with app.app_context():
+            from app.models import db
+            from app.search import rebuild_search_index
+            rebuild_search_index()
+            db.session.commit()
+        print(f"{args.rows} remarques insérées et indexées en {time.perf_counter() - started:.1f} s")
+
+    client = app.test_client()
+    report = {}
+    for query in QUERIES:
+        times = []
+        for page in (1, 2) * (args.repeat // 2):
+            started = time.perf_counter()
+            response = client.get("/search.json", query_string={"q": query, "page": page})
+            times.append((time.perf_counter() - started) * 1000)
+            assert response.status_code == 200, response.data
+        times.sort()
+        report[query] = {
+            "results_page_1": len(client.get("/search.json", query_string={"q": query}).get_json()["results"]),
+            "p50_ms": round(percentile(times, 50), 2),
+            "p95_ms": round(percentile(times, 95), 2),
+        }
+    print(json.dumps({"rows": args.rows, "queries": report}, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
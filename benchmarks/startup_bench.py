@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Temps de démarrage à froid : import, create_app(), première requête.
+
+Chaque mesure lance un interpréteur neuf (comme un conteneur Cloud Run qui
+démarre) et chronomètre :
+  - interpreter : démarrage de Python jusqu'à la première ligne du script ;
+  - import      : `import app` ;
+  - factory     : create_app() ;
+  - first       : première requête (connexion, compilation des gabarits et des requêtes) ;
+  - total       : du lancement du processus à la fin de la première requête.
+La médiane des --runs mesures est comparée au budget : la commande échoue
+(code 1) si --budget-ms (total) est dépassé, ou si un module réservé aux
+commandes ou à la construction (Alembic, Pillow, bibliothèques de données...)
+est chargé pendant le service des requêtes.
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --budget-ms 800 --runs 10
+    python -m benchmarks.startup_bench --profile      # modules les plus coûteux à l'import
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import make_app, seed, sqlite_url
+
+PHASES = ("interpreter", "import", "factory", "first", "total")
+# Modules qui ne doivent pas être chargés pour servir une requête
+FORBIDDEN_MODULES = ("alembic", "flask_migrate", "PIL", "brotli", "starlette", "redis",
+                     "pandas", "numpy", "sklearn", "scipy", "matplotlib", "django")
+
+
+def child(path):
+    """Exécuté dans l'interpréteur neuf : mesure les phases et les imprime en JSON."""
+    started = time.perf_counter()
+    import app as package
+    imported = time.perf_counter()
+    flask_app = package.create_app()
+    created = time.perf_counter()
+    response = flask_app.test_client().get(path)
+    served = time.perf_counter()
+    print(json.dumps({
+        "import": (imported - started) * 1000,
+        "factory": (created - imported) * 1000,
+        "first": (served - created) * 1000,
+        "status": response.status_code,
+        "forbidden": sorted(name for name in FORBIDDEN_MODULES if name in sys.modules),
+        "modules": len(sys.modules),
+    }))
+
+
+def run_once(environ, path):
+    launched = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_bench", "--child", path],
+        env=environ, capture_output=True, text=True, check=True,
+    ).stdout
+    total = (time.perf_counter() - launched) * 1000
+    result = json.loads(output.strip().splitlines()[-1])
+    # La fin du processus (ramasse-miettes, fermeture) est comptée dans `total` : négligeable ici
+    result["total"] = total
+    result["interpreter"] = total - result["import"] - result["factory"] - result["first"]
+    return result
+
+
+def import_profile(environ, top=15):
+    """Modules les plus coûteux (temps cumulé) d'après `python -X importtime`."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"], env=environ,
+                            capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, _, cumulative, name = (part.strip() for part in line.replace("import time:", "|").split("|"))
+        depth = (len(line.rsplit("|", 1)[1]) - len(line.rsplit("|", 1)[1].lstrip())) // 2
+        if depth <= 1:
+            rows.append((int(cumulative) / 1000, name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--child", metavar="PATH", help=argparse.SUPPRESS)
+    parser.add_argument("--database-url", default=sqlite_url("startup_bench.db"))
+    parser.add_argument("--path", default="/students", help="URL de la première requête")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="budget du démarrage complet (médiane)")
+    parser.add_argument("--profile", action="store_true", help="affiche les imports les plus coûteux")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    app = make_app(args.database_url, reset=True)
+    seed(app, students=50, sessions_per_student=10)
+    environ = {**os.environ, "DATABASE_URL": args.database_url, "SECRET_KEY": "benchmark"}
+
+    runs = [run_once(environ, args.path) for _ in range(args.runs)]
+    report = {
+        "runs": args.runs,
+        "path": args.path,
+        "status": sorted({run["status"] for run in runs}),
+        "median_ms": {phase: round(statistics.median(run[phase] for run in runs), 1) for phase in PHASES},
+        "max_ms": {phase: round(max(run[phase] for run in runs), 1) for phase in PHASES},
+        "modules_loaded": runs[0]["modules"],
+        "forbidden_modules": runs[0]["forbidden"],
+        "budget_ms": args.budget_ms,
+    }
+    if args.profile:
+        report["import_profile_ms"] = [[name, cumulative] for cumulative, name in import_profile(environ)]
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    if report["median_ms"]["total"] > args.budget_ms:
+        failures.append(f"démarrage à froid {report['median_ms']['total']} ms > budget {args.budget_ms} ms")
+    if report["forbidden_modules"]:
+        failures.append(f"modules chargés au démarrage : {', '.join(report['forbidden_modules'])}")
+    if any(status >= 400 for status in report["status"]):
+        failures.append(f"première requête en erreur : {report['status']}")
+    for failure in failures:
+        print(f"ÉCHEC {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+# -*- coding: utf-8 -*-
+"""Suite de benchmarks de toutes les routes de app/routes.py.
+
+1. Génère un jeu de données reproductible (benchmarks/dataset.py).
+2. Phase séquentielle : chaque scénario (une route, un type de requête) est
+   exécuté --requests fois via le client de test Flask, après --warmup
+   requêtes non mesurées. Les lectures passent avant les écritures.
+3. Phase concurrente : --threads clients exécutent pendant --duration
+   secondes un mélange pondéré de tous les scénarios (lectures majoritaires).
+
+Le rapport JSON donne, par scénario, les latences p50/p95/p99, le débit et le
+nombre de requêtes SQL par requête HTTP, plus les conditions de la mesure
+(volumes, graine, base, version). Avec --compare, il est confronté à une
+référence : la commande échoue (code 1) si une latence p95 ou un débit se
+dégrade au-delà de --tolerance, ou si une route exécute plus de requêtes SQL.
+Deux rapports ne sont comparables que sur la même machine, avec les mêmes
+volumes et la même graine.
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --compare baseline.json
+    python -m benchmarks.suite --students 500 --sessions 20000 --selections 5000 --requests 20
+    python -m benchmarks.suite --database-url postgresql://localhost/bench --threads 16
+"""
+
+import argparse
+import io
+import json
+import logging
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks.common import make_app, percentile, sqlite_url
+from benchmarks.dataset import add_volume_arguments, seed_dataset, table_counts, volumes_from_args
+
+SEARCH_QUERIES = ("intégration par parties", "suite géométrique", "\"nombres complexes\"", "dérivée seconde")
+READ_WEIGHT, WRITE_WEIGHT = 10, 1
+
+
+# --- DONNÉES UTILISÉES PAR LES SCÉNARIOS ---
+
+class Fixtures:
+    """Identifiants tirés de la base avant la mesure (et réserves consommées par les suppressions)."""
+
+    def __init__(self, app, seed_value, reserve):
+        from app.catalogue import get_catalogue
+        from app.models import db, Student, Session
+
+        rng = random.Random(seed_value)
+        self._lock = threading.Lock()
+        with app.app_context():
+            self.student_ids = db.session.execute(
+                db.select(Student.id).where(Student.is_archived.is_(False)).order_by(Student.id)
+            ).scalars().all()
+            self.subchapter_ids = sorted(get_catalogue().subchapter_ids)
+            # Tirage d'identifiants (les séances générées sont numérotées sans trou)
+            max_session_id = db.session.execute(db.select(db.func.max(Session.id))).scalar() or 0
+            wanted = rng.sample(range(1, max_session_id + 1), min(max_session_id, 2 * reserve + 1000))
+            found = {}
+            for start in range(0, len(wanted), 500):
+                found.update(db.session.execute(
+                    db.select(Session.id, Session.student_id).where(Session.id.in_(wanted[start:start + 500]))
+                ).tuples().all())
+            sessions = [(session_id, found[session_id]) for session_id in wanted if session_id in found]
+            # Séances modifiées (édition, sélection) et séances réservées aux suppressions
+            self.sessions = [tuple(row) for row in sessions[:1000]]
+            self.disposable_sessions = [tuple(row) for row in sessions[1000:]]
+
+            # Élèves jetables (avec quelques séances) pour /delete_student
+            first = db.session.execute(db.select(db.func.max(Student.id))).scalar() or 0
+            db.session.execute(db.insert(Student), [{"name": f"Jetable {i}"} for i in range(reserve)])
+            self.disposable_students = db.session.execute(
+                db.select(Student.id).where(Student.id > first).order_by(Student.id)
+            ).scalars().all()
+            db.session.execute(db.insert(Session), [
+                {"student_id": student_id, "remark": f"Séance jetable {n}", "selected": n % 2 == 0}
+                for student_id in self.disposable_students for n in range(10)
+            ])
+            from app.counters import refresh_session_counters
+            refresh_session_counters(self.disposable_students)
+            db.session.commit()
+        # Élèves alternativement archivés et restaurés
+        self.archive_ids = rng.sample(self.student_ids, min(len(self.student_ids), 100))
+        self.etags = {}
+        self._import_batch = 0
+
+    def pop(self, pool):
+        with self._lock:
+            return pool.pop() if pool else None
+
+    def next_import_batch(self):
+        with self._lock:
+            self._import_batch += 1
+            return self._import_batch
+
+
+def _import_csv(batch, students=20, sessions=5):
+    out = io.StringIO()
+    out.write("student_ref,name,school_name,birth_date,phone_number,date,remark,selected\n")
+    for s in range(students):
+        for n in range(sessions):
+            out.write(f"bench-{batch}-{s},Import {batch}-{s},,,,{date.today().isoformat()},Séance importée {n},{n % 2}\n")
+    return out.getvalue().encode("utf-8")
+
+
+# --- SCÉNARIOS ---
+# Chaque scénario retourne (méthode, URL, arguments du client de test) ou None
+# s'il n'a plus de données à consommer.
+
+def _get(url, **kwargs):
+    return "GET", url, kwargs
+
+
+def _post(url, **kwargs):
+    return "POST", url, kwargs
+
+
+def _conditional(fx, url):
+    etag = fx.etags.get(url)
+    return _get(url, headers={"If-None-Match": etag} if etag else {})
+
+
+def _delete_remark(rng, fx):
+    row = fx.pop(fx.disposable_sessions)
+    return row and _post(f"/delete_remark/{row[1]}/{row[0]}")
+
+
+def _delete_student(rng, fx):
+    student_id = fx.pop(fx.disposable_students)
+    return student_id and _post(f"/delete_student/{student_id}")
+
+
+def _sync_selection(rng, fx):
+    """Case cochée ou décochée sur la page des remarques : une opération set_selected envoyée à /sync."""
+    session_id, student_id = rng.choice(fx.sessions)
+    return _post("/sync", json={"operations": [{
+        "op_id": f"bench-{rng.getrandbits(64):016x}", "type": "set_selected", "student_id": student_id,
+        "session_id": session_id, "selected": rng.random() < 0.5,
+    }]})
+
+
+def _save_programme(rng, fx):
+    chosen = rng.sample(fx.subchapter_ids, rng.randint(0, len(fx.subchapter_ids)))
+    return _post("/save_programme_selections", json={"student_id": rng.choice(fx.student_ids), "selections": chosen})
+
+
+def _export_window(rng, fx):
+    end = date.today() - timedelta(days=rng.randint(0, 700))
+    return _get(f"/export/remarks.ndjson?start={(end - timedelta(days=7)).isoformat()}&end={end.isoformat()}")
+
+
+def _sync_batch(rng, fx, size=10):
+    """Lot /sync mêlant ajouts, modifications, sélections et informations (plusieurs élèves)."""
+    operations = []
+    for n in range(size):
+        op_id = f"bench-{rng.getrandbits(64):016x}"
+        kind = n % 4
+        if kind == 0:
+            operations.append({"op_id": op_id, "type": "add_remark", "student_id": rng.choice(fx.student_ids),
+                               "remark": "Remarque hors ligne du benchmark"})
+        elif kind == 3:
+            operations.append({"op_id": op_id, "type": "update_info", "student_id": rng.choice(fx.student_ids),
+                               "school_name": "Lycée du benchmark"})
+        else:
+            session_id, student_id = rng.choice(fx.sessions)
+            operation = {"op_id": op_id, "student_id": student_id, "session_id": session_id}
+            if kind == 1:
+                operation.update(type="edit_remark", remark=f"Modifiée hors ligne {rng.random()}")
+            else:
+                operation.update(type="set_selected", selected=rng.random() < 0.5)
+            operations.append(operation)
+    return _post("/sync", json={"operations": operations})
+
+
+def _import(rng, fx):
+    return _post("/import?format=csv", data=_import_csv(fx.next_import_batch()), content_type="text/csv")
+
+
+SCENARIOS = (
+    # (nom, écriture ?, générateur de requête)
+    ("ping", False, lambda rng, fx: _get("/ping")),
+    ("home", False, lambda rng, fx: _get("/")),
+    ("students", False, lambda rng, fx: _get("/students")),
+    ("students_not_modified", False, lambda rng, fx: _conditional(fx, "/students")),
+    ("archived_students", False, lambda rng, fx: _get("/archived_students")),
+    ("remarks", False, lambda rng, fx: _get(f"/remarks/{rng.choice(fx.student_ids)}")),
+    ("remarks_not_modified", False, lambda rng, fx: _conditional(fx, f"/remarks/{fx.student_ids[0]}")),
+    ("remarks_sessions_page", False, lambda rng, fx: _get(f"/remarks/{rng.choice(fx.student_ids)}/sessions")),
+    ("programme_maths", False, lambda rng, fx: _get(f"/programme_maths/{rng.choice(fx.student_ids)}")),
+    ("coverage", False, lambda rng, fx: _get("/coverage")),
+    ("coverage_json", False, lambda rng, fx: _get("/coverage.json")),
+    ("search", False, lambda rng, fx: _get("/search", query_string={"q": rng.choice(SEARCH_QUERIES)})),
+    ("search_json", False, lambda rng, fx: _get("/search.json", query_string={"q": rng.choice(SEARCH_QUERIES)})),
+    ("export_student_csv", False,
+     lambda rng, fx: _get(f"/export/remarks.csv?student_id={rng.choice(fx.student_ids)}")),
+    ("export_week_ndjson", False, _export_window),
+    ("add_student", True, lambda rng, fx: _post("/students", data={"name": f"Nouvel élève {rng.randrange(10 ** 6)}"})),
+    ("add_remark", True,
+     lambda rng, fx: _post(f"/remarks/{rng.choice(fx.student_ids)}", data={"remark": "Remarque du benchmark"})),
+    ("edit_remark", True, lambda rng, fx: _post(
+        "/edit_remark/{1}/{0}".format(*rng.choice(fx.sessions)), data={"remark": f"Modifiée {rng.random()}"})),
+    ("delete_remark", True, _delete_remark),
+    ("update_info", True, lambda rng, fx: _post(f"/update_info/{rng.choice(fx.student_ids)}", data={
+        "school_name": "Lycée du benchmark", "birth_date": "2007-05-04", "phone_number": "0600000000"})),
+    ("sync_selection", True, _sync_selection),
+    ("save_programme_selections", True, _save_programme),
+    ("archive_student", True, lambda rng, fx: _post(f"/archive_student/{rng.choice(fx.archive_ids)}")),
+    ("unarchive_student", True, lambda rng, fx: _post(f"/unarchive_student/{rng.choice(fx.archive_ids)}")),
+    ("archive_students_preview", False, lambda rng, fx: _post(
+        "/archive_students", json={"inactive_days": 365, "dry_run": True})),
+    ("archive_students_bulk", True, lambda rng, fx: _post(
+        "/archive_students", json={"student_ids": rng.sample(fx.archive_ids, min(3, len(fx.archive_ids)))})),
+    ("sync_batch", True, _sync_batch),
+    ("delete_student", True, _delete_student),
+    ("import_csv", True, _import),
+)
+
+
+# --- MESURE ---
+
+class StatementCounter:
+    """Compte les requêtes SQL exécutées par le thread courant."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self._local = threading.local()
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self._local.count = getattr(self._local, "count", 0) + 1
+
+    def reset(self):
+        self._local.count = 0
+
+    @property
+    def count(self):
+        return getattr(self._local, "count", 0)
+
+
+def _send(client, counter, request):
+    method, url, kwargs = request
+    counter.reset()
+    started = time.perf_counter()
+    response = client.open(url, method=method, **kwargs)
+    response.get_data()  # consomme les réponses en flux (exports)
+    elapsed = time.perf_counter() - started
+    return elapsed, counter.count, response.status_code
+
+
+def _summary(latencies, statements, errors, seconds):
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "sql_per_request": round(sum(statements) / len(statements), 2) if statements else 0.0,
+        "sql_max": max(statements, default=0),
+    }
+
+
+def run_sequential(app, counter, fx, scenarios, requests, warmup, seed_value):
+    client = app.test_client()
+    # Jetons des pages gardées par GET conditionnel (scénarios *_not_modified)
+    for url in ("/students", f"/remarks/{fx.student_ids[0]}"):
+        fx.etags[url] = client.get(url).headers.get("ETag")
+
+    report = {}
+    for name, _, build in scenarios:
+        rng = random.Random(f"{seed_value}:{name}")
+        latencies, statements, errors = [], [], 0
+        total = 0.0
+        for index in range(warmup + requests):
+            request = build(rng, fx)
+            if request is None:
+                break
+            elapsed, count, status = _send(client, counter, request)
+            if index < warmup:
+                continue
+            total += elapsed
+            latencies.append(elapsed)
+            statements.append(count)
+            errors += status >= 400
+        report[name] = _summary(latencies, statements, errors, total)
+        print(f"{name:28s} p50 {report[name]['p50_ms']:8.2f} ms  p95 {report[name]['p95_ms']:8.2f} ms  "
+              f"{report[name]['sql_per_request']:6.2f} SQL/req", file=sys.stderr)
+    return report
+
+
+def run_concurrent(app, counter, fx, scenarios, threads, duration, seed_value):
+    weights = [WRITE_WEIGHT if write else READ_WEIGHT for _, write, _ in scenarios]
+    results = {name: ([], [], [0]) for name, _, _ in scenarios}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        rng = random.Random(f"{seed_value}:worker:{worker_id}")
+        client = app.test_client()
+        local = {name: ([], [], [0]) for name, _, _ in scenarios}
+        while time.perf_counter() < deadline:
+            name, _, build = rng.choices(scenarios, weights)[0]
+            request = build(rng, fx)
+            if request is None:
+                continue
+            elapsed, count, status = _send(client, counter, request)
+            latencies, statements, errors = local[name]
+            latencies.append(elapsed)
+            statements.append(count)
+            errors[0] += status >= 400
+        with lock:
+            for name, (latencies, statements, errors) in local.items():
+                results[name][0].extend(latencies)
+                results[name][1].extend(statements)
+                results[name][2][0] += errors[0]
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    routes = {
+        name: _summary(latencies, statements, errors[0], elapsed)
+        for name, (latencies, statements, errors) in results.items() if latencies
+    }
+    overall = _summary(
+        [value for latencies, _, _ in results.values() for value in latencies],
+        [value for _, statements, _ in results.values() for value in statements],
+        sum(errors[0] for _, _, errors in results.values()),
+        elapsed,
+    )
+    return {"threads": threads, "duration_s": round(elapsed, 2), "overall": overall, "routes": routes}
+
+
+# --- COMPARAISON AVEC UNE RÉFÉRENCE ---
+
+def compare(current, baseline, tolerance, min_delta_ms):
+    """Liste des régressions de `current` par rapport à `baseline`."""
+    regressions = []
+
+    def check(label, now, before):
+        if now is None or before is None:
+            return
+        if now["p95_ms"] > before["p95_ms"] * (1 + tolerance) and now["p95_ms"] - before["p95_ms"] > min_delta_ms:
+            regressions.append(f"{label} : p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+        # Le nombre de requêtes SQL est déterministe : toute hausse est une régression
+        if now["sql_per_request"] > before["sql_per_request"] + 0.5:
+            regressions.append(f"{label} : {before['sql_per_request']} -> {now['sql_per_request']} requêtes SQL")
+        if now["errors"] > before["errors"]:
+            regressions.append(f"{label} : {before['errors']} -> {now['errors']} erreurs")
+
+    for name, now in current["sequential"].items():
+        check(name, now, baseline["sequential"].get(name))
+    if current.get("concurrent") and baseline.get("concurrent"):
+        now, before = current["concurrent"]["overall"], baseline["concurrent"]["overall"]
+        check("concurrent", now, before)
+        if now["rps"] < before["rps"] * (1 - tolerance):
+            regressions.append(f"concurrent : débit {before['rps']} -> {now['rps']} req/s")
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("benchmark_suite.db"))
+    add_volume_arguments(parser)
+    parser.add_argument("--requests", type=int, default=50, help="requêtes mesurées par scénario")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=8, help="0 = pas de phase concurrente")
+    parser.add_argument("--duration", type=float, default=10.0, help="durée de la phase concurrente (s)")
+    parser.add_argument("--only", nargs="*", choices=[name for name, _, _ in SCENARIOS], help="scénarios retenus")
+    parser.add_argument("--output", help="écrit le rapport JSON dans ce fichier")
+    parser.add_argument("--compare", help="rapport de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="dégradation relative admise (0.25 = 25 %%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="écart absolu de p95 ignoré (bruit)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    app = make_app(args.database_url, reset=True)
+    # Seuls les avertissements sont utiles pendant la mesure
+    logging.getLogger().setLevel(logging.WARNING)
+    volumes = volumes_from_args(args)
+    started = time.perf_counter()
+    rows = seed_dataset(app, volumes, seed_value=args.seed)
+    print(f"Jeu de données {rows} généré en {time.perf_counter() - started:.1f} s", file=sys.stderr)
+
+    scenarios = [scenario for scenario in SCENARIOS if not args.only or scenario[0] in args.only]
+    # Les lectures sont mesurées avant que les écritures ne modifient les données
+    scenarios.sort(key=lambda scenario: scenario[1])
+    reserve = (args.warmup + args.requests) + (args.threads and int(args.duration * 50))
+    fx = Fixtures(app, args.seed, reserve)
+    with app.app_context():
+        from app.models import db
+        counter = StatementCounter(db.engine)
+        dialect = db.engine.dialect.name
+
+    report = {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dialect": dialect,
+            "volumes": volumes._asdict(),
+            "seed": args.seed,
+            "rows": rows,
+            "requests": args.requests,
+            "warmup": args.warmup,
+        },
+        "sequential": run_sequential(app, counter, fx, scenarios, args.requests, args.warmup, args.seed),
+    }
+    if args.threads:
+        report["concurrent"] = run_concurrent(app, counter, fx, scenarios, args.threads, args.duration, args.seed)
+    with app.app_context():
+        report["meta"]["rows_after"] = table_counts()
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if baseline is not None:
+        keys = ("dialect", "volumes", "seed", "requests")
+        mismatched = [key for key in keys if baseline["meta"].get(key) != report["meta"][key]]
+        if mismatched:
+            print(f"Référence non comparable (paramètres différents : {', '.join(mismatched)})", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(report, baseline, args.tolerance, args.min_delta_ms)
+        for line in regressions:
+            print(f"RÉGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+        print("Aucune régression par rapport à la référence.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
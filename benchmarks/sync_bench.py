@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""Coût d'une série de modifications : requêtes unitaires contre lots /sync.
+
+Un même jeu de --operations modifications (ajouts de séances, corrections de
+remarques, sélections, informations d'élèves, répartis sur plusieurs élèves)
+est appliqué de deux façons :
+
+    unitaire  un formulaire par modification (/remarks/<id>, /edit_remark,
+              /update_info), redirection et rechargement de la page compris,
+              comme dans le navigateur sans file hors ligne ; une sélection,
+              qui n'a pas de formulaire, est un lot /sync d'une opération ;
+    lots      la file de la page des remarques : lots de --batch-size
+              opérations envoyés à /sync.
+
+Pour chaque mode : requêtes HTTP, requêtes SQL, durée mesurée, et durée
+estimée sur un réseau lent (durée + requêtes HTTP x --rtt-ms). Les lots sont
+ensuite renvoyés tels quels (rejeu après une coupure) : aucune séance ne doit
+être créée une seconde fois. La commande échoue (code 1) si le rejeu modifie
+la base ou si les lots exécutent plus de requêtes SQL que le mode unitaire.
+
+    python -m benchmarks.sync_bench
+    python -m benchmarks.sync_bench --operations 1000 --batch-size 100 --rtt-ms 300
+    python -m benchmarks.sync_bench --database-url postgresql://localhost/bench
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from sqlalchemy import event
+
+from benchmarks.common import make_app, seed, sqlite_url
+
+
+def make_operations(rng, sessions, student_ids, count):
+    """Opérations /sync tirées au hasard (un quart de chaque type)."""
+    operations = []
+    for n in range(count):
+        op_id = f"bench-{n}-{rng.getrandbits(48):012x}"
+        kind = n % 4
+        if kind == 0:
+            operations.append({"op_id": op_id, "type": "add_remark", "student_id": rng.choice(student_ids),
+                               "remark": f"Séance hors ligne {n}"})
+        elif kind == 3:
+            operations.append({"op_id": op_id, "type": "update_info", "student_id": rng.choice(student_ids),
+                               "school_name": f"Lycée {n}", "birth_date": "2007-05-04", "phone_number": "0600000000"})
+        else:
+            session_id, student_id = rng.choice(sessions)
+            operation = {"op_id": op_id, "student_id": student_id, "session_id": session_id}
+            if kind == 1:
+                operation.update(type="edit_remark", remark=f"Correction {n}")
+            else:
+                operation.update(type="set_selected", selected=bool(n % 2))
+            operations.append(operation)
+    return operations
+
+
+def unit_request(client, operation):
+    """Requête unitaire équivalente à une opération (redirection suivie)."""
+    op_type, student_id = operation['type'], operation['student_id']
+    if op_type == 'add_remark':
+        return client.post(f"/remarks/{student_id}", data={"remark": operation['remark']}, follow_redirects=True)
+    if op_type == 'edit_remark':
+        return client.post(f"/edit_remark/{student_id}/{operation['session_id']}",
+                           data={"remark": operation['remark']}, follow_redirects=True)
+    if op_type == 'set_selected':
+        return client.post("/sync", json={"operations": [operation]})
+    fields = {field: operation[field] for field in ('school_name', 'birth_date', 'phone_number')}
+    return client.post(f"/update_info/{student_id}", data=fields, follow_redirects=True)
+
+
+def measure(statements, send):
+    """Exécute `send()` ; retourne `(requêtes HTTP, requêtes SQL, secondes)`."""
+    before = statements[0]
+    started = time.perf_counter()
+    requests = send()
+    return requests, statements[0] - before, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=sqlite_url("sync_bench.db"), help="base jetable (elle est vidée)")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--sessions-per-student", type=int, default=20)
+    parser.add_argument("--operations", type=int, default=400)
+    parser.add_argument("--batch-size", type=int, default=100, help="opérations par lot /sync (file de la page)")
+    parser.add_argument("--rtt-ms", type=float, default=200.0, help="aller-retour réseau simulé par requête HTTP")
+    parser.add_argument("--seed", type=int, default=2025)
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger().setLevel(logging.WARNING)
+
+    from app.models import db, Session, SyncOperation
+
+    app = make_app(args.database_url, reset=True, METRICS_ENABLED="false", FRAGMENT_CACHE="off",
+                   SYNC_MAX_OPERATIONS=max(args.batch_size, 500))
+    student_ids = seed(app, students=args.students, sessions_per_student=args.sessions_per_student,
+                       seed_value=args.seed)
+    with app.app_context():
+        sessions = db.session.execute(db.select(Session.id, Session.student_id)).tuples().all()
+        engine = db.engine
+    statements = [0]
+    event.listen(engine, "before_cursor_execute", lambda *_: statements.__setitem__(0, statements[0] + 1))
+
+    rng = random.Random(args.seed)
+    unit_operations = make_operations(rng, sessions, student_ids, args.operations)
+    batch_operations = make_operations(rng, sessions, student_ids, args.operations)
+    batches = [batch_operations[start:start + args.batch_size]
+               for start in range(0, len(batch_operations), args.batch_size)]
+    client = app.test_client()
+    failures = []
+
+    def send_units():
+        requests = 0
+        for operation in unit_operations:
+            response = unit_request(client, operation)
+            requests += 1 + len(response.history)
+        return requests
+
+    def send_batches():
+        for batch in batches:
+            response = client.post("/sync", json={"operations": batch})
+            if response.status_code != 200:
+                failures.append(f"/sync a répondu {response.status_code} : {response.get_json()}")
+        return len(batches)
+
+    def state():
+        with app.app_context():
+            return (db.session.execute(db.select(db.func.count(Session.id))).scalar(),
+                    db.session.execute(db.select(db.func.count(SyncOperation.op_id))).scalar())
+
+    report = {}
+    for name, send in (("unit", send_units), ("batched", send_batches)):
+        requests, sql, seconds = measure(statements, send)
+        report[name] = {
+            "http_requests": requests,
+            "sql_statements": sql,
+            "sql_per_operation": round(sql / args.operations, 2),
+            "seconds": round(seconds, 3),
+            "seconds_at_rtt": round(seconds + requests * args.rtt_ms / 1000, 2),
+        }
+
+    before_replay = state()
+    _, replay_sql, replay_seconds = measure(statements, send_batches)
+    report["replay"] = {"sql_statements": replay_sql, "seconds": round(replay_seconds, 3)}
+    if state() != before_replay:
+        failures.append(f"le rejeu des lots a modifié la base : {before_replay} -> {state()}")
+    if report["batched"]["sql_statements"] > report["unit"]["sql_statements"]:
+        failures.append("les lots exécutent plus de requêtes SQL que les requêtes unitaires")
+
+    print(json.dumps({
+        "operations": args.operations,
+        "batch_size": args.batch_size,
+        "rtt_ms": args.rtt_ms,
+        "modes": report,
+    }, indent=2))
+    for failure in failures:
+        print(f"ÉCHEC {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
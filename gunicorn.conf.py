@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+# Configuration gunicorn (chargée automatiquement par `gunicorn run:app`)
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 8080)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+
+# Pas de preload : chaque worker crée son propre pool SQLAlchemy après le fork.
+# Connexions max. vers la base = workers × (DB_POOL_SIZE + DB_MAX_OVERFLOW) ;
+# garder threads <= DB_POOL_SIZE + DB_MAX_OVERFLOW pour éviter l'attente du pool.
+preload_app = False
@@ -0,0 +1,49 @@
+"""Add composite and partial indexes for hot session/selection lookups
+
+Revision ID: 5d1f0c9b7e42
+Revises: a3c2f52ca6ef
+Create Date: 2026-10-18 09:12:41.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f0c9b7e42'
+down_revision = 'a3c2f52ca6ef'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_sessions_student_selected_id',
+                              ['student_id', 'selected', sa.text('id DESC')], unique=False)
+
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.create_index('ix_selections_maths_2bac_student_id', ['student_id'], unique=False)
+
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.create_index('ix_students_active_created_at', ['created_at', 'id'], unique=False,
+                              postgresql_where=sa.text('is_archived = false'),
+                              sqlite_where=sa.text('is_archived = 0'))
+        batch_op.create_index('ix_students_active_name', ['name'], unique=False,
+                              postgresql_where=sa.text('is_archived = false'),
+                              sqlite_where=sa.text('is_archived = 0'))
+        batch_op.create_index('ix_students_archived_name', ['name'], unique=False,
+                              postgresql_where=sa.text('is_archived = true'),
+                              sqlite_where=sa.text('is_archived = 1'))
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_index('ix_students_archived_name')
+        batch_op.drop_index('ix_students_active_name')
+        batch_op.drop_index('ix_students_active_created_at')
+
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.drop_index('ix_selections_maths_2bac_student_id')
+
+    with op.batch_alter_table('sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_sessions_student_selected_id')
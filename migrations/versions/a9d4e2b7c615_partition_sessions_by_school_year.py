@@ -0,0 +1,105 @@
+"""Partition sessions by school year (Postgres)
+
+Revision ID: a9d4e2b7c615
+Revises: f2c8d4b6a913
+Create Date: 2026-10-18 18:41:09.572113
+
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d4e2b7c615'
+down_revision = 'f2c8d4b6a913'
+branch_labels = None
+depends_on = None
+
+
+# Copie figée de la table de désaccentuation (app/search.py)
+ACCENTED = "àâäáãåçéèêëíìîïñóòôöõúùûüýÿÀÂÄÁÃÅÇÉÈÊËÍÌÎÏÑÓÒÔÖÕÚÙÛÜÝŸ"
+UNACCENTED = "aaaaaaceeeeiiiinooooouuuuyyAAAAAACEEEEIIIINOOOOOUUUUYY"
+REMARK_TSV = (
+    "remark_tsv tsvector GENERATED ALWAYS AS (to_tsvector('french'::regconfig, "
+    f"translate(coalesce(remark, ''), '{ACCENTED}', '{UNACCENTED}'))) STORED"
+)
+COLUMNS = "id, student_id, remark, date, selected, updated_at"
+# Une année scolaire commence le 1er septembre (copie figée de app/partitions.py)
+SCHOOL_YEAR_START_MONTH = 9
+
+
+def _school_year(day):
+    return day.year if day.month >= SCHOOL_YEAR_START_MONTH else day.year - 1
+
+
+def _create_table(sequence, partitioned):
+    op.execute(
+        "CREATE TABLE sessions ("
+        f"id integer NOT NULL DEFAULT nextval('{sequence}'::regclass), "
+        "student_id integer NOT NULL, "
+        "remark text, "
+        "date date NOT NULL DEFAULT CURRENT_DATE, "
+        "selected boolean NOT NULL DEFAULT false, "
+        "updated_at timestamp without time zone NOT NULL DEFAULT now(), "
+        f"{REMARK_TSV}, "
+        f"CONSTRAINT sessions_pkey PRIMARY KEY ({'id, date' if partitioned else 'id'}), "
+        "CONSTRAINT sessions_student_id_fkey FOREIGN KEY (student_id) REFERENCES students (id)"
+        f"){' PARTITION BY RANGE (date)' if partitioned else ''}"
+    )
+
+
+def _replace_table(partitioned, create_partitions=None):
+    """Recrée sessions (partitionnée ou non) et y recopie les lignes existantes."""
+    bind = op.get_bind()
+    sequence = bind.execute(sa.text("SELECT pg_get_serial_sequence('sessions', 'id')")).scalar()
+
+    # Les noms d'index et de contraintes sont uniques dans le schéma : on libère ceux de l'ancienne table
+    op.execute("DROP INDEX IF EXISTS ix_sessions_student_selected_id")
+    op.execute("DROP INDEX IF EXISTS ix_sessions_remark_tsv")
+    op.execute("ALTER TABLE sessions RENAME CONSTRAINT sessions_pkey TO sessions_old_pkey")
+    op.execute("ALTER TABLE sessions RENAME CONSTRAINT sessions_student_id_fkey TO sessions_old_student_id_fkey")
+    op.execute("ALTER TABLE sessions RENAME TO sessions_old")
+
+    _create_table(sequence, partitioned)
+    if create_partitions is not None:
+        create_partitions(bind)
+    # Copie avant la création des index (plus rapide) ; remark_tsv est recalculée
+    op.execute(f"INSERT INTO sessions ({COLUMNS}) SELECT {COLUMNS} FROM sessions_old")
+    op.execute("CREATE INDEX ix_sessions_student_selected_id ON sessions (student_id, selected, id DESC)")
+    op.execute("CREATE INDEX ix_sessions_remark_tsv ON sessions USING gin (remark_tsv)")
+
+    # La séquence des identifiants change de propriétaire avant la suppression de l'ancienne table
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY sessions.id")
+    op.execute("DROP TABLE sessions_old")
+    op.execute("ANALYZE sessions")
+
+
+def _create_school_year_partitions(bind):
+    first, last = bind.execute(sa.text("SELECT min(date), max(date) FROM sessions_old")).one()
+    current = _school_year(date.today())
+    # Années présentes dans les données, l'année en cours et la suivante
+    start = min(_school_year(first), current) if first else current
+    end = max(_school_year(last), current + 1) if last else current + 1
+    for year in range(start, end + 1):
+        op.execute(
+            f"CREATE TABLE sessions_sy{year} PARTITION OF sessions "
+            f"FOR VALUES FROM ('{year}-09-01') TO ('{year + 1}-09-01')"
+        )
+    # Lignes hors des années créées (création en retard de `flask ensure-session-partitions`)
+    op.execute("CREATE TABLE sessions_default PARTITION OF sessions DEFAULT")
+
+
+def upgrade():
+    # SQLite : pas de partitionnement natif, les années anciennes sont
+    # archivées dans des bases attachées (`flask detach-school-year`)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _replace_table(partitioned=True, create_partitions=_create_school_year_partitions)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Les partitions détachées (archives) ne sont pas réintégrées
+    _replace_table(partitioned=False)
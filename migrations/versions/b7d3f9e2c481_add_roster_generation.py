@@ -0,0 +1,57 @@
+"""Add roster_generation (version of the student list bumped by trigger)
+
+Revision ID: b7d3f9e2c481
+Revises: c6e1f8a3d250
+Create Date: 2026-10-18 23:12:45.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3f9e2c481'
+down_revision = 'c6e1f8a3d250'
+branch_labels = None
+depends_on = None
+
+
+# Copie figée des déclencheurs (app/versions.py)
+EVENTS = ('insert', 'update', 'delete')
+
+
+def upgrade():
+    op.create_table(
+        'roster_generation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('value', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO roster_generation (id, value) VALUES (1, 0)")
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE OR REPLACE FUNCTION bump_roster_generation() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            "BEGIN UPDATE roster_generation SET value = value + 1; RETURN NULL; END $$"
+        )
+        op.execute(
+            "CREATE TRIGGER students_roster_generation AFTER INSERT OR UPDATE OR DELETE ON students "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_roster_generation()"
+        )
+    elif dialect == 'sqlite':
+        for event in EVENTS:
+            op.execute(
+                f"CREATE TRIGGER students_roster_generation_{event} AFTER {event.upper()} ON students "
+                "BEGIN UPDATE roster_generation SET value = value + 1; END"
+            )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS students_roster_generation ON students")
+        op.execute("DROP FUNCTION IF EXISTS bump_roster_generation()")
+    elif dialect == 'sqlite':
+        for event in EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS students_roster_generation_{event}")
+    op.drop_table('roster_generation')
@@ -0,0 +1,39 @@
+"""Add denormalized session counters to Student
+
+Revision ID: b7e2a4c19d05
+Revises: 5d1f0c9b7e42
+Create Date: 2026-10-18 10:03:17.552910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2a4c19d05'
+down_revision = '5d1f0c9b7e42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('recorded_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('unrecorded_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Initialisation des compteurs à partir de l'historique existant
+    op.execute(
+        """
+        UPDATE students SET
+            recorded_count = (SELECT count(*) FROM sessions
+                              WHERE sessions.student_id = students.id AND sessions.selected = true),
+            unrecorded_count = (SELECT count(*) FROM sessions
+                                WHERE sessions.student_id = students.id AND sessions.selected = false)
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('students', schema=None) as batch_op:
+        batch_op.drop_column('unrecorded_count')
+        batch_op.drop_column('recorded_count')
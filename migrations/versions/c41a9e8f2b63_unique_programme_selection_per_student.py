@@ -0,0 +1,40 @@
+"""Unique programme selection per student and chapter
+
+Revision ID: c41a9e8f2b63
+Revises: b7e2a4c19d05
+Create Date: 2026-10-18 11:26:05.904117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41a9e8f2b63'
+down_revision = 'b7e2a4c19d05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Suppression des doublons hérités de l'ancien « tout effacer puis réinsérer »
+    op.execute(
+        """
+        DELETE FROM selections_maths_2bac
+        WHERE id NOT IN (
+            SELECT min(id) FROM selections_maths_2bac GROUP BY student_id, chapter_name
+        )
+        """
+    )
+
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        # L'index sur student_id est couvert par la contrainte unique (même préfixe)
+        batch_op.drop_index('ix_selections_maths_2bac_student_id')
+        batch_op.create_unique_constraint('uq_selections_maths_2bac_student_chapter',
+                                          ['student_id', 'chapter_name'])
+
+
+def downgrade():
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_selections_maths_2bac_student_chapter', type_='unique')
+        batch_op.create_index('ix_selections_maths_2bac_student_id', ['student_id'], unique=False)
@@ -0,0 +1,35 @@
+"""Add sync_operations (idempotent offline batch sync)
+
+Revision ID: c6e1f8a3d250
+Revises: a9d4e2b7c615
+Create Date: 2026-10-18 21:07:32.640518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e1f8a3d250'
+down_revision = 'a9d4e2b7c615'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Pas de clé étrangère vers students : un rejeu après suppression de l'élève reste idempotent
+    op.create_table(
+        'sync_operations',
+        sa.Column('op_id', sa.String(length=64), nullable=False),
+        sa.Column('op_type', sa.String(length=20), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('op_id'),
+    )
+    op.create_index('ix_sync_operations_created_at', 'sync_operations', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_sync_operations_created_at', table_name='sync_operations')
+    op.drop_table('sync_operations')
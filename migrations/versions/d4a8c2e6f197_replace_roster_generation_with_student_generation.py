@@ -0,0 +1,96 @@
+"""Replace roster_generation with a per-row students.generation
+
+Revision ID: d4a8c2e6f197
+Revises: b7d3f9e2c481
+Create Date: 2026-10-19 09:41:27.550913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a8c2e6f197'
+down_revision = 'b7d3f9e2c481'
+branch_labels = None
+depends_on = None
+
+
+# Copie figée des déclencheurs (app/versions.py)
+NEXT_GENERATION = "(SELECT coalesce(max(generation), 0) + 1 FROM students)"
+
+
+def _drop_roster_generation(dialect):
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS students_roster_generation ON students")
+        op.execute("DROP FUNCTION IF EXISTS bump_roster_generation()")
+    elif dialect == 'sqlite':
+        for event in ('insert', 'update', 'delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS students_roster_generation_{event}")
+    op.drop_table('roster_generation')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    # La ligne unique de roster_generation sérialisait toutes les écritures sur students
+    _drop_roster_generation(dialect)
+    op.add_column('students', sa.Column('generation', sa.BigInteger(), server_default='0', nullable=False))
+    if dialect == 'postgresql':
+        op.execute("CREATE SEQUENCE students_generation_seq")
+        op.execute("UPDATE students SET generation = nextval('students_generation_seq')")
+        op.execute(
+            "CREATE OR REPLACE FUNCTION next_student_generation() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            "BEGIN NEW.generation := nextval('students_generation_seq'); RETURN NEW; END $$"
+        )
+        op.execute(
+            "CREATE TRIGGER students_generation BEFORE INSERT OR UPDATE ON students "
+            "FOR EACH ROW EXECUTE FUNCTION next_student_generation()"
+        )
+    elif dialect == 'sqlite':
+        op.execute("UPDATE students SET generation = id")
+        op.execute(
+            "CREATE TRIGGER students_generation_ai AFTER INSERT ON students BEGIN "
+            f"UPDATE students SET generation = {NEXT_GENERATION} WHERE id = NEW.id; END"
+        )
+        op.execute(
+            "CREATE TRIGGER students_generation_au AFTER UPDATE ON students "
+            "WHEN NEW.generation IS OLD.generation BEGIN "
+            f"UPDATE students SET generation = {NEXT_GENERATION} WHERE id = NEW.id; END"
+        )
+    op.create_index('ix_students_generation', 'students', ['generation'], unique=False)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    op.drop_index('ix_students_generation', table_name='students')
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS students_generation ON students")
+        op.execute("DROP FUNCTION IF EXISTS next_student_generation()")
+        op.execute("DROP SEQUENCE IF EXISTS students_generation_seq")
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS students_generation_ai")
+        op.execute("DROP TRIGGER IF EXISTS students_generation_au")
+    # SQLite >= 3.35 : DROP COLUMN sans recréer la table (les déclencheurs FTS5 de sessions restent)
+    op.drop_column('students', 'generation')
+    op.create_table(
+        'roster_generation',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('value', sa.BigInteger(), server_default='0', nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute("INSERT INTO roster_generation (id, value) VALUES (1, 0)")
+    if dialect == 'postgresql':
+        op.execute(
+            "CREATE OR REPLACE FUNCTION bump_roster_generation() RETURNS trigger LANGUAGE plpgsql AS $$ "
+            "BEGIN UPDATE roster_generation SET value = value + 1; RETURN NULL; END $$"
+        )
+        op.execute(
+            "CREATE TRIGGER students_roster_generation AFTER INSERT OR UPDATE OR DELETE ON students "
+            "FOR EACH STATEMENT EXECUTE FUNCTION bump_roster_generation()"
+        )
+    elif dialect == 'sqlite':
+        for event in ('insert', 'update', 'delete'):
+            op.execute(
+                f"CREATE TRIGGER students_roster_generation_{event} AFTER {event.upper()} ON students "
+                "BEGIN UPDATE roster_generation SET value = value + 1; END"
+            )
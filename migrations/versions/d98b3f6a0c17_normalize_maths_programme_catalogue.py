@@ -0,0 +1,122 @@
+"""Normalize the maths programme into chapters/subchapters tables
+
+Revision ID: d98b3f6a0c17
+Revises: c41a9e8f2b63
+Create Date: 2026-10-18 12:48:33.610274
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd98b3f6a0c17'
+down_revision = 'c41a9e8f2b63'
+branch_labels = None
+depends_on = None
+
+
+# Copie figée du programme au moment de la migration (identifiants explicites)
+PROGRAMME = (
+    ("1. Limites et Continuité", ("Continuité en un point- continuité à droite - continuité à gauche", "Continuité sur un intervalle", "Image d’un intervalle", "Théorème des valeurs intermédiaires (T.V.I) et dichotomie", "Fonction réciproque", "Racine N-ième")),
+    ("2. Dérivabilité et Étude des Fonctions", ("Dérivabilité en un point", "Interprétation géométrique du nombre dérivé", "Dérivabilité sur un intervalle", "Calcul de la dérivée", "Dérivée et variations", "Extremums d’une fonction", "Concavité et dérivée seconde", "Les branches infinies", "Axe de symétrie - Centre de symétrie- Fonction paire – impaire", "Position relative d’une courbe et d’une droite")),
+    ("3. Fonctions Primitives", ("Les primitives", "Intégrale", "Intégration par parties", "Application – Aire et Volume")),
+    ("4. Fonction Logarithme", ("Définition et propriétés (Df et Equation/Inéquation)", "Limites usuelles", "La dérivée", "Logarithmes de base a")),
+    ("5. Fonction Exponentielle", ("Définition et propriétés (Df et Equation/Inéquation)", "Limites usuelles", "La dérivée", "Exponentielle de base a")),
+    ("6. Suites Numériques", ("Monotonie d’une suite numérique", "Suite majorée – Suite minorée – Suite bornée (Récurrence)", "Suite arithmétique", "Suite géométrique", "Limite d’une suite numérique (Convergence)")),
+    ("7. Nombres Complexes", ("Notion et propriétés", "Représentation géométrique", "Equations du second degré", "Forme trigonométrique", "Interprétation géométrique (Alignement, type du triangle, points circulaires)", "Notation exponentielle", "Transformations (Translation-Homothétie-Rotation)")),
+    ("8. Géométrie dans l’espace", ("Produit scalaire et propriétés", "Equation d’une droite et distance", "Equation cartésienne d’une sphère", "Produit vectoriel", "Positions relatives d’une droite et d’une sphère")),
+    ("9. Équations Différentielles", ("Equation Différentielle Linéaire du 1er ordre", "Equation Différentielle Linéaire du 2nd ordre")),
+    ("10. Probabilités et Statistiques", ("Introduction Cardinal - principe fondamental de dénombrement - Types de tirages", "Probabilité d’un événement - Probabilité conditionnelle", "Variables aléatoires - Loi Binomiale")),
+)
+
+
+def upgrade():
+    chapters = op.create_table(
+        'chapters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    subchapters = op.create_table(
+        'subchapters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('chapter_id', sa.Integer(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(['chapter_id'], ['chapters.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_subchapters_chapter_position', 'subchapters', ['chapter_id', 'position'], unique=False)
+
+    chapter_rows, subchapter_rows = [], []
+    for chapter_id, (chapter_title, titles) in enumerate(PROGRAMME, start=1):
+        chapter_rows.append({'id': chapter_id, 'position': chapter_id, 'title': chapter_title})
+        for position, title in enumerate(titles, start=1):
+            subchapter_rows.append({'id': len(subchapter_rows) + 1, 'chapter_id': chapter_id,
+                                    'position': position, 'title': title})
+    op.bulk_insert(chapters, chapter_rows)
+    op.bulk_insert(subchapters, subchapter_rows)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("SELECT setval(pg_get_serial_sequence('chapters', 'id'), (SELECT max(id) FROM chapters))")
+        op.execute("SELECT setval(pg_get_serial_sequence('subchapters', 'id'), (SELECT max(id) FROM subchapters))")
+
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_selections_maths_2bac_student_chapter', type_='unique')
+        batch_op.add_column(sa.Column('subchapter_id', sa.Integer(), nullable=True))
+
+    # Conversion des sélections textuelles : un titre partagé par plusieurs chapitres
+    # (« La dérivée », « Limites usuelles »...) cochait toutes ses occurrences, on les conserve.
+    op.execute(
+        """
+        INSERT INTO selections_maths_2bac (student_id, chapter_name, subchapter_id)
+        SELECT DISTINCT s.student_id, s.chapter_name, sc.id
+        FROM selections_maths_2bac s
+        JOIN subchapters sc ON sc.title = s.chapter_name
+        WHERE s.subchapter_id IS NULL
+        """
+    )
+    # Les lignes d'origine, et les textes absents du programme, sont supprimés
+    op.execute("DELETE FROM selections_maths_2bac WHERE subchapter_id IS NULL")
+
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.alter_column('subchapter_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('selections_maths_2bac_subchapter_id_fkey', 'subchapters',
+                                    ['subchapter_id'], ['id'])
+        batch_op.create_unique_constraint('uq_selections_maths_2bac_student_subchapter',
+                                          ['student_id', 'subchapter_id'])
+        batch_op.drop_column('chapter_name')
+
+
+def downgrade():
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('chapter_name', sa.String(length=255), nullable=True))
+
+    op.execute(
+        """
+        UPDATE selections_maths_2bac SET chapter_name =
+            (SELECT title FROM subchapters WHERE subchapters.id = selections_maths_2bac.subchapter_id)
+        """
+    )
+    # Un même titre peut provenir de plusieurs sous-chapitres : une seule ligne par titre
+    op.execute(
+        """
+        DELETE FROM selections_maths_2bac
+        WHERE id NOT IN (
+            SELECT min(id) FROM selections_maths_2bac GROUP BY student_id, chapter_name
+        )
+        """
+    )
+
+    with op.batch_alter_table('selections_maths_2bac', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_selections_maths_2bac_student_subchapter', type_='unique')
+        batch_op.drop_constraint('selections_maths_2bac_subchapter_id_fkey', type_='foreignkey')
+        batch_op.drop_column('subchapter_id')
+        batch_op.alter_column('chapter_name', existing_type=sa.String(length=255), nullable=False)
+        batch_op.create_unique_constraint('uq_selections_maths_2bac_student_chapter',
+                                          ['student_id', 'chapter_name'])
+
+    op.drop_index('ix_subchapters_chapter_position', table_name='subchapters')
+    op.drop_table('subchapters')
+    op.drop_table('chapters')
@@ -0,0 +1,64 @@
+"""Add full-text search over session remarks
+
+Revision ID: e5a7c3d91b28
+Revises: d98b3f6a0c17
+Create Date: 2026-10-18 14:05:12.402318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a7c3d91b28'
+down_revision = 'd98b3f6a0c17'
+branch_labels = None
+depends_on = None
+
+
+# Copie figée de la table de désaccentuation (app/search.py)
+ACCENTED = "àâäáãåçéèêëíìîïñóòôöõúùûüýÿÀÂÄÁÃÅÇÉÈÊËÍÌÎÏÑÓÒÔÖÕÚÙÛÜÝŸ"
+UNACCENTED = "aaaaaaceeeeiiiinooooouuuuyyAAAAAACEEEEIIIINOOOOOUUUUYY"
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Colonne générée : tenue à jour par Postgres à chaque INSERT/UPDATE (y compris COPY)
+        op.execute(
+            "ALTER TABLE sessions ADD COLUMN remark_tsv tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('french'::regconfig, "
+            f"translate(coalesce(remark, ''), '{ACCENTED}', '{UNACCENTED}'))) STORED"
+        )
+        op.execute("CREATE INDEX ix_sessions_remark_tsv ON sessions USING gin (remark_tsv)")
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE sessions_fts USING fts5(remark, content='sessions', "
+            "content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        op.execute(
+            "CREATE TRIGGER sessions_fts_ai AFTER INSERT ON sessions BEGIN "
+            "INSERT INTO sessions_fts(rowid, remark) VALUES (new.id, new.remark); END"
+        )
+        op.execute(
+            "CREATE TRIGGER sessions_fts_ad AFTER DELETE ON sessions BEGIN "
+            "INSERT INTO sessions_fts(sessions_fts, rowid, remark) VALUES ('delete', old.id, old.remark); END"
+        )
+        op.execute(
+            "CREATE TRIGGER sessions_fts_au AFTER UPDATE OF remark ON sessions BEGIN "
+            "INSERT INTO sessions_fts(sessions_fts, rowid, remark) VALUES ('delete', old.id, old.remark); "
+            "INSERT INTO sessions_fts(rowid, remark) VALUES (new.id, new.remark); END"
+        )
+        # Indexation des remarques existantes
+        op.execute("INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_sessions_remark_tsv")
+        op.execute("ALTER TABLE sessions DROP COLUMN IF EXISTS remark_tsv")
+    elif dialect == 'sqlite':
+        for trigger in ('sessions_fts_ai', 'sessions_fts_ad', 'sessions_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS sessions_fts")
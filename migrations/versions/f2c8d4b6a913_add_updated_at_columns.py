@@ -0,0 +1,57 @@
+"""Add updated_at to students, sessions and programme selections
+
+Revision ID: f2c8d4b6a913
+Revises: e5a7c3d91b28
+Create Date: 2026-10-18 15:22:47.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d4b6a913'
+down_revision = 'e5a7c3d91b28'
+branch_labels = None
+depends_on = None
+
+
+TABLES = ('students', 'sessions', 'selections_maths_2bac')
+
+# Copie figée des déclencheurs FTS5 de e5a7c3d91b28 (app/search.py)
+SEARCH_TRIGGERS = [
+    "CREATE TRIGGER IF NOT EXISTS sessions_fts_ai AFTER INSERT ON sessions BEGIN "
+    "INSERT INTO sessions_fts(rowid, remark) VALUES (new.id, new.remark); END",
+    "CREATE TRIGGER IF NOT EXISTS sessions_fts_ad AFTER DELETE ON sessions BEGIN "
+    "INSERT INTO sessions_fts(sessions_fts, rowid, remark) VALUES ('delete', old.id, old.remark); END",
+    "CREATE TRIGGER IF NOT EXISTS sessions_fts_au AFTER UPDATE OF remark ON sessions BEGIN "
+    "INSERT INTO sessions_fts(sessions_fts, rowid, remark) VALUES ('delete', old.id, old.remark); "
+    "INSERT INTO sessions_fts(rowid, remark) VALUES (new.id, new.remark); END",
+]
+
+
+def _restore_search_triggers():
+    # SQLite : batch_alter_table recrée la table sessions, ce qui supprime les
+    # déclencheurs FTS5 de e5a7c3d91b28 ; on les réinstalle et on réindexe
+    if op.get_bind().dialect.name == 'sqlite':
+        for statement in SEARCH_TRIGGERS:
+            op.execute(statement)
+        op.execute("INSERT INTO sessions_fts(sessions_fts) VALUES ('rebuild')")
+
+
+def upgrade():
+    # La valeur par défaut côté serveur remplit les lignes existantes et les
+    # insertions qui ne passent pas par l'ORM (COPY de l'import en masse)
+    for table in TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+    op.create_index('ix_students_updated_at', 'students', ['updated_at'], unique=False)
+    _restore_search_triggers()
+
+
+def downgrade():
+    op.drop_index('ix_students_updated_at', table_name='students')
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+    _restore_search_triggers()
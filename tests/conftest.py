@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import os
+import pytest
+from sqlalchemy import event
+
+
+# --- TESTS LENTS (OPT-IN) ---
+# Les tests marqués @pytest.mark.slow (volumes réalistes, un million de lignes)
+# ne tournent qu'avec `python -m pytest --run-slow`.
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', help="exécute aussi les tests marqués slow")
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', "slow: test long, exécuté seulement avec --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    skip = pytest.mark.skip(reason="test lent : relancer avec --run-slow")
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
+
+
+# --- APPLICATION DE TEST ---
+# Chaque test reçoit une base SQLite jetable (tmp_path) ; les caches en
+# mémoire (fragments) et les métriques sont désactivés sauf demande explicite.
+# Les tests propres à Postgres (COPY, recherche plein texte) utilisent la base
+# jetable TEST_POSTGRES_URL, vidée à chaque test, et sont ignorés sans elle.
+
+TEST_ENVIRON = {
+    'SECRET_KEY': 'tests',
+    'LOG_LEVEL': 'WARNING',
+    'METRICS_ENABLED': 'false',
+    'FRAGMENT_CACHE': 'off',
+    'ETAG_SALT': 'tests',
+}
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Fabrique d'applications sur une base SQLite jetable (variables d'environnement en option)."""
+    def factory(create_tables=True, **environ):
+        from app import create_app
+        from app.models import db
+
+        monkeypatch.setenv('DATABASE_URL', 'sqlite:///' + str(tmp_path / 'test.db'))
+        monkeypatch.delenv('DATABASE_READ_URL', raising=False)
+        for name, value in {**TEST_ENVIRON, **environ}.items():
+            monkeypatch.setenv(name, str(value))
+        app = create_app()
+        if create_tables:
+            with app.app_context():
+                db.create_all()
+        return app
+    return factory
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def postgres_app(make_app):
+    """Application sur la base Postgres jetable TEST_POSTGRES_URL (vidée) ; test ignoré sans elle."""
+    url = os.environ.get('TEST_POSTGRES_URL')
+    if not url:
+        pytest.skip("TEST_POSTGRES_URL non définie (base Postgres jetable)")
+    from app.models import db
+
+    app = make_app(create_tables=False, DATABASE_URL=url)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def count_statements():
+    """Compte les requêtes SQL exécutées par le moteur de l'application dans un bloc `with`."""
+    @contextlib.contextmanager
+    def counter(app):
+        from app.models import db
+
+        with app.app_context():
+            engine = db.engine
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, 'before_cursor_execute', listener)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, 'before_cursor_execute', listener)
+    return counter
+
+
+def seed_students(app, count, sessions_per_student=3):
+    """Ajoute `count` élèves avec leurs séances (une sur deux enregistrée) ; retourne leurs identifiants."""
+    from app.models import db, Student, Session
+    from app.counters import refresh_session_counters
+
+    with app.app_context():
+        first = db.session.execute(db.select(db.func.max(Student.id))).scalar() or 0
+        db.session.execute(db.insert(Student), [{"name": f"Élève {first + i}"} for i in range(count)])
+        student_ids = db.session.execute(db.select(Student.id).where(Student.id > first)).scalars().all()
+        if sessions_per_student:
+            db.session.execute(db.insert(Session), [
+                {"student_id": student_id, "remark": f"Séance {n}", "selected": n % 2 == 0}
+                for student_id in student_ids for n in range(sessions_per_student)
+            ])
+        refresh_session_counters(student_ids)
+        db.session.commit()
+        return student_ids
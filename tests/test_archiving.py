@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date, datetime, timedelta
+import pytest
+from sqlalchemy import insert, select
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def roster(app):
+    """Élèves actifs (récent, inactif, ancien sans séance, nouveau sans séance) et un élève déjà archivé."""
+    from app.models import db, Student, Session
+
+    long_ago = datetime.combine(TODAY - timedelta(days=800), datetime.min.time())
+    students = {
+        "récent": {"created_at": long_ago},
+        "inactif": {"created_at": long_ago},
+        "ancien": {"created_at": long_ago},
+        "nouveau": {},
+        "archivé": {"created_at": long_ago, "is_archived": True},
+    }
+    last_session = {"récent": TODAY - timedelta(days=10), "inactif": TODAY - timedelta(days=400),
+                    "archivé": TODAY - timedelta(days=400)}
+    with app.app_context():
+        ids = {}
+        for name, fields in students.items():
+            ids[name] = db.session.execute(
+                insert(Student).values(name=name, **fields).returning(Student.id)
+            ).scalar_one()
+        db.session.execute(insert(Session), [
+            {"student_id": ids[name], "remark": "Séance", "date": day, "selected": True}
+            for name, day in last_session.items()
+        ])
+        db.session.commit()
+    return ids
+
+
+def _archive(client, **params):
+    response = client.post('/archive_students', json=params)
+    return response.status_code, response.get_json()
+
+
+def _archived(app):
+    from app.models import db, Student
+
+    with app.app_context():
+        return set(db.session.execute(select(Student.name).where(Student.is_archived.is_(True))).scalars())
+
+
+def _names(report):
+    return sorted(student["name"] for student in report["sample"])
+
+
+def test_inactivity_uses_the_last_session_or_the_creation_date(app, client, roster):
+    status, report = _archive(client, inactive_days=365, dry_run=True)
+    assert status == 200 and report["dry_run"] is True
+    assert _names(report) == ["ancien", "inactif"]
+    assert _archived(app) == {"archivé"}
+
+
+def test_criteria_are_combined_with_and(app, client, roster):
+    _, report = _archive(client, inactive_days=365, created_before=str(TODAY - timedelta(days=30)),
+                         student_ids=[roster["inactif"], roster["nouveau"]], dry_run=True)
+    assert _names(report) == ["inactif"]
+    _, report = _archive(client, created_before=str(TODAY - timedelta(days=30)), dry_run=True)
+    assert _names(report) == ["ancien", "inactif", "récent"]
+
+
+def test_archiving_updates_the_rows_and_the_roster_version(app, client, roster):
+    etag = client.get('/students').headers['ETag']
+    status, report = _archive(client, inactive_days=365)
+    assert status == 200 and report["archived"] == report["count"] == 2
+    assert _archived(app) == {"archivé", "ancien", "inactif"}
+    assert client.get('/students', headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize('params', [{}, {"inactive_days": -1}, {"inactive_days": "jamais"},
+                                    {"created_before": "01/09/2025"}])
+def test_invalid_or_missing_criteria_are_refused(app, client, roster, params):
+    status, report = _archive(client, **params)
+    assert status == 400 and "error" in report
+    assert _archived(app) == {"archivé"}
+
+
+def test_cli_dry_run_lists_the_students_without_archiving(app, roster):
+    result = app.test_cli_runner().invoke(args=['archive-students', '--inactive-days', '365', '--dry-run'])
+    assert result.exit_code == 0, result.output
+    assert "2 élève(s) actif(s) concerné(s)." in result.output
+    assert _archived(app) == {"archivé"}
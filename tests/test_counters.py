@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import select, update
+from tests.conftest import seed_students
+
+
+def _corrupt(app, student_id, recorded, unrecorded):
+    from app.models import db, Student
+
+    with app.app_context():
+        db.session.execute(update(Student).where(Student.id == student_id)
+                           .values(recorded_count=recorded, unrecorded_count=unrecorded))
+        db.session.commit()
+
+
+def _drift(app):
+    from app.counters import counter_drift
+
+    with app.app_context():
+        return [(row.id, row.recorded_count, row.actual_recorded, row.unrecorded_count, row.actual_unrecorded)
+                for row in counter_drift()]
+
+
+def test_counter_drift_lists_only_diverging_students(app):
+    first, second = seed_students(app, 2, sessions_per_student=3)
+    assert _drift(app) == []
+    _corrupt(app, second, recorded=7, unrecorded=2)
+    # 3 séances : 2 enregistrées (n pair), 1 non enregistrée
+    assert _drift(app) == [(second, 7, 2, 2, 1)]
+
+
+def test_refresh_repairs_only_the_requested_students(app):
+    from app.counters import refresh_session_counters
+    from app.models import db
+
+    first, second = seed_students(app, 2, sessions_per_student=3)
+    _corrupt(app, first, 0, 0)
+    _corrupt(app, second, 0, 0)
+    with app.app_context():
+        assert refresh_session_counters([first]) == 1
+        db.session.commit()
+    assert [row[0] for row in _drift(app)] == [second]
+
+
+def test_write_routes_keep_the_counters_exact(app, client):
+    from app.models import db, Session
+
+    (student_id,) = seed_students(app, 1, sessions_per_student=2)
+    client.post(f'/remarks/{student_id}', data={"remark": "Nouvelle séance"})
+    with app.app_context():
+        session_ids = db.session.execute(select(Session.id).where(Session.student_id == student_id)).scalars().all()
+    client.post(f'/delete_remark/{student_id}/{session_ids[0]}')
+    assert _drift(app) == []
+
+
+def test_repair_counters_command(app):
+    (student_id,) = seed_students(app, 1, sessions_per_student=3)
+    _corrupt(app, student_id, 5, 5)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=['repair-counters', '--dry-run'])
+    assert result.exit_code == 0, result.output
+    assert "enregistrées 5 -> 2, non enregistrées 5 -> 1" in result.output
+    assert len(_drift(app)) == 1
+
+    result = runner.invoke(args=['repair-counters'])
+    assert result.exit_code == 0, result.output
+    assert "✅ Compteurs recalculés pour 1 élève(s)." in result.output
+    assert _drift(app) == []
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import gc
+import io
+import json
+import os
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+from tests.conftest import seed_students
+
+# Volume et plafond de croissance du RSS de l'export d'un million de lignes (--run-slow)
+EXPORT_RSS_ROWS = int(os.environ.get('EXPORT_RSS_ROWS', 1_000_000))
+EXPORT_RSS_CEILING_MB = float(os.environ.get('EXPORT_RSS_CEILING_MB', 64))
+
+
+def current_rss_mb():
+    """RSS courant du processus en Mio (Linux : /proc/self/statm)."""
+    with open("/proc/self/statm") as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+@pytest.mark.parametrize('fmt, content_type', [
+    ('csv', 'text/csv; charset=utf-8'),
+    ('ndjson', 'application/x-ndjson; charset=utf-8'),
+])
+def test_export_content_type_has_a_single_charset(client, app, fmt, content_type):
+    seed_students(app, 1)
+    response = client.get(f'/export/remarks.{fmt}')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == content_type
+
+
+def test_export_csv_streams_every_session(client, app):
+    seed_students(app, 4, sessions_per_student=3)
+    response = client.get('/export/remarks.csv?student_id=2', buffered=False)
+    rows = list(csv.DictReader(io.StringIO(b"".join(response.response).decode('utf-8'))))
+    response.close()
+    assert [row['student_ref'] for row in rows] == ['2'] * 3
+    assert [row['selected'] for row in rows] == ['1', '0', '1']
+
+
+def test_export_ndjson_rejects_unknown_format(client):
+    response = client.get('/export/remarks.xml')
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.get_data(as_text=True))
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'ndjson'])
+def test_export_reads_through_a_server_side_cursor_in_chunks(make_app, fmt):
+    # Garde-fou toujours actif (la mesure du RSS sur un million de lignes est réservée à --run-slow) :
+    # la requête d'export part avec stream_results/yield_per et le corps suit les paquets lus.
+    from sqlalchemy import event
+    from app.models import db
+
+    app = make_app(EXPORT_CHUNK_SIZE=4)
+    seed_students(app, 5, sessions_per_student=2)
+    with app.app_context():
+        engine = db.engine
+    options = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM sessions JOIN students' in statement:
+            options.append(context.execution_options)
+
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        response = app.test_client().get(f'/export/remarks.{fmt}', buffered=False)
+        chunks = [chunk for chunk in response.response if chunk]
+        response.close()
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+
+    assert len(options) == 1
+    assert options[0].get('stream_results') is True
+    assert options[0].get('yield_per') == 4
+    assert len(chunks) == 3  # 10 séances par paquets de 4
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.path.exists('/proc/self/statm'), reason="mesure du RSS réservée à Linux")
+def test_export_of_a_million_rows_keeps_rss_bounded(make_app, tmp_path):
+    app = make_app()
+    seed_students(app, 1, sessions_per_student=0)
+    # Insertion directe (générateur, sans passer par l'ORM) pour ne pas gonfler le RSS de départ
+    today = date.today()
+    with sqlite3.connect(tmp_path / 'test.db') as connection:
+        connection.executemany(
+            "INSERT INTO sessions (student_id, remark, date, selected, updated_at) "
+            "VALUES (1, ?, ?, ?, CURRENT_TIMESTAMP)",
+            ((f"Séance {n} : exercices de révision, méthode « pas à pas »",
+              (today - timedelta(days=n % 700)).isoformat(), n % 3 != 0) for n in range(EXPORT_RSS_ROWS)),
+        )
+
+    client = app.test_client()
+    client.get('/export/remarks.csv?student_id=0').close()  # chauffe (imports, pool)
+    gc.collect()
+    baseline = peak = current_rss_mb()
+    lines = 0
+    response = client.get('/export/remarks.csv', buffered=False)
+    for chunk in response.response:
+        lines += chunk.count(b"\n")
+        peak = max(peak, current_rss_mb())
+    response.close()
+
+    assert lines == EXPORT_RSS_ROWS + 1
+    assert peak - baseline < EXPORT_RSS_CEILING_MB
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+import io
+from sqlalchemy import func, select
+
+CSV = (
+    "student_ref,name,school_name,birth_date,phone_number,date,remark,selected\n"
+    "a,Alice,Lycée A,,,2025-10-01,Limites,oui\n"
+    "a,Alice,Lycée A,,,02/10/2025,Dérivées,\n"
+    "a,Alice,Lycée A,,,2025-10-03,Intégrales,x\n"
+    "b,Bruno,,,,2025-10-01,Suites,1\n"
+    "b,Bruno,,,,2025-10-02,Complexes,0\n"
+    "b,Bruno,,,,2025-10-03,Probabilités,\n"
+    "c,Chloé,,,,,,\n"
+)
+
+
+def _students(app):
+    from app.models import db, Student
+
+    with app.app_context():
+        return {name: (recorded, unrecorded) for name, recorded, unrecorded in db.session.execute(
+            select(Student.name, Student.recorded_count, Student.unrecorded_count).order_by(Student.name)
+        ).tuples()}
+
+
+def _session_count(app):
+    from app.models import db, Session
+
+    with app.app_context():
+        return db.session.execute(select(func.count(Session.id))).scalar_one()
+
+
+def test_csv_import_writes_one_transaction_per_batch(make_app, count_statements):
+    app = make_app(IMPORT_BATCH_SIZE=4)
+    with count_statements(app) as statements:
+        response = app.test_client().post('/import', data=CSV.encode('utf-8'), content_type='text/csv')
+    assert response.status_code == 200
+    report = response.get_json()
+    # Un élève et ses 3 séances par lot de 4 lignes, Chloé dans le dernier
+    assert (report["students"], report["sessions"], report["batches"]) == (3, 6, 3)
+    inserts = [statement for statement in statements if statement.startswith("INSERT INTO sessions")]
+    assert len(inserts) == 2
+    assert _students(app) == {"Alice": (2, 1), "Bruno": (1, 2), "Chloé": (0, 0)}
+
+
+def test_ndjson_import_through_multipart_upload(client, app):
+    body = (
+        '{"ref": "1", "name": "Alice", "sessions": [{"date": "2025-10-01", "remark": "Limites", "selected": true}]}\n'
+        '\n'
+        '{"ref": "2", "name": "Bruno"}\n'
+    )
+    response = client.post('/import', data={"file": (io.BytesIO(body.encode('utf-8')), "eleves.ndjson")})
+    assert response.status_code == 200
+    assert response.get_json()["sessions"] == 1
+    assert _students(app) == {"Alice": (1, 0), "Bruno": (0, 0)}
+
+
+def test_invalid_line_keeps_the_batches_already_committed(make_app):
+    app = make_app(IMPORT_BATCH_SIZE=4)
+    broken = CSV.replace("2025-10-02,Complexes", "2025-13-45,Complexes")
+    response = app.test_client().post('/import', data=broken.encode('utf-8'), content_type='text/csv')
+    assert response.status_code == 400
+    assert "Ligne 6" in response.get_json()["error"]
+    # Le lot d'Alice est validé, celui de Bruno annulé
+    assert _students(app) == {"Alice": (2, 1)}
+    assert _session_count(app) == 3
+
+
+def test_unknown_format_is_refused(client):
+    response = client.post('/import', data=b"x", content_type='application/octet-stream')
+    assert response.status_code == 400
+
+
+def test_postgres_import_loads_sessions_with_copy(postgres_app, count_statements):
+    postgres_app.config['IMPORT_BATCH_SIZE'] = 4
+    with count_statements(postgres_app) as statements:
+        response = postgres_app.test_client().post('/import', data=CSV.encode('utf-8'), content_type='text/csv')
+    assert response.status_code == 200
+    assert response.get_json()["batches"] == 3
+    # COPY passe par le curseur psycopg2 : aucun INSERT de séances
+    assert not [statement for statement in statements if statement.startswith("INSERT INTO sessions")]
+    assert _session_count(postgres_app) == 6
+    assert _students(postgres_app) == {"Alice": (2, 1), "Bruno": (1, 2), "Chloé": (0, 0)}
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+import json
+from sqlalchemy import func, select
+
+SNAPSHOT = {
+    "students": [{"id": 1, "name": "Alice"}, {"id": 2, "name": "Bruno"}],
+    "sessions": [{"id": 1, "student_id": 1, "remark": "Limites", "date": "01.10.2025"}],
+    "selected_sessions": {"1": [1]},
+    "_meta": {"seq": 3, "next_session_id": 2},
+}
+JOURNAL = [
+    {"op": "add_session", "session": {"id": 2, "student_id": 2, "remark": "Suites", "date": "02.10.2025"}, "seq": 4},
+]
+
+
+def _write(path, snapshot=SNAPSHOT, journal=JOURNAL, tail=b""):
+    path.write_text(json.dumps(snapshot), encoding="utf-8")
+    lines = b"".join(json.dumps(entry).encode("utf-8") + b"\n" for entry in journal) + tail
+    (path.parent / (path.name + ".journal")).write_bytes(lines)
+
+
+def _files(path):
+    return {file.name: file.read_bytes() for file in path.parent.iterdir() if file.name.startswith(path.name)}
+
+
+def _counts(app):
+    from app.models import db, Student, Session
+
+    with app.app_context():
+        return (db.session.execute(select(func.count(Student.id))).scalar_one(),
+                db.session.execute(select(func.count(Session.id))).scalar_one())
+
+
+def _migrate(app, path):
+    return app.test_cli_runner().invoke(args=['migrate-json-store', str(path)])
+
+
+def test_migration_reads_the_snapshot_and_journal_without_writing(app, tmp_path):
+    path = tmp_path / "store" / "data.json"
+    path.parent.mkdir()
+    # Dernière ligne du journal incomplète (écriture interrompue) : ignorée, pas tronquée
+    _write(path, tail=b'{"op": "add_student", "stu')
+    before = _files(path)
+
+    result = _migrate(app, path)
+    assert result.exit_code == 0, result.output
+    assert _counts(app) == (2, 2)
+    assert _files(path) == before
+
+
+def test_corrupt_store_aborts_and_is_left_untouched(app, tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"students": [{"id": 1, "name": "Ali', encoding="utf-8")
+    before = _files(path)
+
+    result = _migrate(app, path)
+    assert result.exit_code == 1
+    assert "illisible" in result.output and "Rien n'a été importé" in result.output
+    assert _files(path) == before
+    assert _counts(app) == (0, 0)
+
+
+def test_corrupt_journal_line_aborts(app, tmp_path):
+    path = tmp_path / "data.json"
+    _write(path, tail=b"pas du json\n")
+    result = _migrate(app, path)
+    assert result.exit_code == 1 and "data.json.journal est illisible (ligne 2)" in result.output
+    assert _counts(app) == (0, 0)
+
+
+def test_missing_store_aborts_without_creating_it(app, tmp_path):
+    path = tmp_path / "absent.json"
+    result = _migrate(app, path)
+    assert result.exit_code != 0
+    assert not path.exists()
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+from app import metrics
+
+
+def test_repeated_create_app_registers_the_session_listener_once(make_app):
+    from app.models import db
+
+    for _ in range(3):
+        app = make_app(METRICS_ENABLED='true')
+    with app.app_context():
+        listeners = list(db.session().dispatch.do_orm_execute)
+    assert listeners.count(metrics._do_orm_execute) == 1
+
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert b'db_pool_connections' in response.data
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+
+import pytest
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+SEARCH_TRIGGERS = ['sessions_fts_ad', 'sessions_fts_ai', 'sessions_fts_au']
+
+# Schéma SQLite figé à la révision d98b3f6a0c17 (avant la recherche plein texte).
+# La première migration ne s'applique pas sur SQLite (clé étrangère sans nom en
+# mode batch) : on part donc de cet état, estampillé, puis on monte jusqu'à head.
+BEFORE_SEARCH = "d98b3f6a0c17"
+SCHEMA_BEFORE_SEARCH = """
+CREATE TABLE students (
+    id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    school_name VARCHAR(150),
+    birth_date VARCHAR(10),
+    phone_number VARCHAR(20),
+    is_archived BOOLEAN NOT NULL DEFAULT 0,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    recorded_count INTEGER NOT NULL DEFAULT '0',
+    unrecorded_count INTEGER NOT NULL DEFAULT '0'
+);
+CREATE TABLE sessions (
+    id INTEGER NOT NULL PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES students (id),
+    remark TEXT,
+    date DATE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    selected BOOLEAN NOT NULL DEFAULT 0
+);
+CREATE INDEX ix_sessions_student_selected_id ON sessions (student_id, selected, id DESC);
+CREATE TABLE chapters (id INTEGER NOT NULL PRIMARY KEY, position INTEGER NOT NULL, title VARCHAR(255) NOT NULL);
+CREATE TABLE subchapters (
+    id INTEGER NOT NULL PRIMARY KEY,
+    chapter_id INTEGER NOT NULL REFERENCES chapters (id),
+    position INTEGER NOT NULL,
+    title VARCHAR(255) NOT NULL
+);
+CREATE TABLE selections_maths_2bac (
+    id INTEGER NOT NULL PRIMARY KEY,
+    student_id INTEGER NOT NULL REFERENCES students (id),
+    subchapter_id INTEGER NOT NULL REFERENCES subchapters (id),
+    CONSTRAINT uq_selections_maths_2bac_student_subchapter UNIQUE (student_id, subchapter_id)
+);
+INSERT INTO students (name) VALUES ('Élève historique');
+INSERT INTO sessions (student_id, remark, date, selected) VALUES (1, 'Intégration par parties', '2025-03-04', 1);
+"""
+
+
+@pytest.fixture
+def migrated_app(make_app, tmp_path):
+    """Application sur une base SQLite montée par les migrations jusqu'à head."""
+    from flask_migrate import Migrate, stamp, upgrade
+    from app.models import db
+
+    with sqlite3.connect(tmp_path / 'test.db') as connection:
+        connection.executescript(SCHEMA_BEFORE_SEARCH)
+    app = make_app(create_tables=False)
+    Migrate(app, db, directory=MIGRATIONS)
+    with app.app_context():
+        stamp(revision=BEFORE_SEARCH)
+        upgrade()
+    return app
+
+
+def _triggers(app):
+    from app.models import db
+
+    with app.app_context():
+        return sorted(db.session.execute(db.text(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'sessions'"
+        )).scalars())
+
+
+def _search(client, query):
+    return [hit['remark'] for hit in client.get('/search.json', query_string={'q': query}).get_json()['results']]
+
+
+def test_upgrade_to_head_keeps_search_triggers(migrated_app):
+    assert _triggers(migrated_app) == SEARCH_TRIGGERS
+
+
+def test_search_index_follows_writes_after_upgrade(migrated_app):
+    client = migrated_app.test_client()
+    # Remarque antérieure aux migrations : indexée par la reconstruction
+    assert _search(client, 'integration') == ['Intégration par parties']
+
+    client.post('/remarks/1', data={'remark': 'Suite géométrique'})
+    assert _search(client, 'geometrique') == ['Suite géométrique']
+
+    client.post('/edit_remark/1/2', data={'remark': 'Nombres complexes'})
+    assert _search(client, 'geometrique') == []
+    assert _search(client, 'complexes') == ['Nombres complexes']
+
+    client.post('/delete_remark/1/2')
+    assert _search(client, 'complexes') == []
+
+
+def test_downgrade_below_updated_at_keeps_search_triggers(migrated_app):
+    from flask_migrate import downgrade
+
+    with migrated_app.app_context():
+        downgrade(revision="e5a7c3d91b28")
+    assert _triggers(migrated_app) == SEARCH_TRIGGERS
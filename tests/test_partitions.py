@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+from datetime import date
+import pytest
+from sqlalchemy import insert
+from tests.conftest import seed_students
+
+
+def _add_sessions(app, student_id, remarks_by_day):
+    from app.models import db, Session
+    from app.counters import refresh_session_counters
+
+    with app.app_context():
+        db.session.execute(insert(Session), [
+            {"student_id": student_id, "remark": remark, "date": day, "selected": False}
+            for day, remark in remarks_by_day.items()
+        ])
+        refresh_session_counters([student_id])
+        db.session.commit()
+
+
+@pytest.fixture
+def history(app):
+    """Un élève avec une séance cette année et une séance il y a deux ans."""
+    from app.partitions import school_year_bounds, school_year_of
+
+    current = school_year_of(date.today())
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    _add_sessions(app, student_id, {
+        date.today(): "Séance de cette année",
+        school_year_bounds(current - 2)[0]: "Séance ancienne",
+    })
+    return student_id, current
+
+
+def test_requested_school_year_defaults_to_the_current_year():
+    from app.partitions import requested_school_year
+
+    assert requested_school_year(None, today=date(2026, 10, 18)) == 2026
+    assert requested_school_year(" ", today=date(2027, 3, 1)) == 2026
+    assert requested_school_year("all") is None
+    assert requested_school_year("2024-2025") == 2024
+    with pytest.raises(ValueError):
+        requested_school_year("2024-2026")
+
+
+def test_remarks_page_shows_the_current_school_year_by_default(app, client, history):
+    student_id, current = history
+    html = client.get(f'/remarks/{student_id}').get_data(as_text=True)
+    assert "Séance de cette année" in html
+    assert "Séance ancienne" not in html
+    assert f'<option value="{current}" selected>' in html
+
+    html = client.get(f'/remarks/{student_id}?school_year=all').get_data(as_text=True)
+    assert "Séance de cette année" in html and "Séance ancienne" in html
+    assert '<option value="all" selected>' in html
+
+
+def test_load_more_and_api_follow_the_same_default(app, client, history):
+    student_id, current = history
+    page = client.get(f'/remarks/{student_id}/sessions').get_json()
+    assert "Séance ancienne" not in page["html"]
+    page = client.get(f'/remarks/{student_id}/sessions?school_year=all').get_json()
+    assert "Séance ancienne" in page["html"]
+    assert client.get(f'/remarks/{student_id}/sessions?school_year=2024-2026').status_code == 400
+
+    pytest.importorskip('starlette')
+    pytest.importorskip('aiosqlite')
+    from starlette.testclient import TestClient
+    from app.api import create_api
+
+    with TestClient(create_api(app.config)) as api:
+        def remarks(query=''):
+            response = api.get(f'/students/{student_id}/remarks{query}')
+            return [remark["remark"] for remark in response.json()["remarks"]]
+
+        assert remarks() == ["Séance de cette année"]
+        assert sorted(remarks('?school_year=all')) == ["Séance ancienne", "Séance de cette année"]
+
+
+def test_remarks_etag_depends_on_the_displayed_school_year(app, client, history):
+    student_id, current = history
+    default = client.get(f'/remarks/{student_id}').headers['ETag']
+    assert client.get(f'/remarks/{student_id}?school_year={current}').headers['ETag'] == default
+    assert client.get(f'/remarks/{student_id}?school_year=all').headers['ETag'] != default
+
+
+def test_empty_school_year_is_reported_as_such_and_counts_are_all_time(app, client):
+    from app.partitions import school_year_bounds, school_year_label, school_year_of
+
+    current = school_year_of(date.today())
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    _add_sessions(app, student_id, {school_year_bounds(current - 1)[0]: "Séance de l'an dernier"})
+
+    html = client.get(f'/remarks/{student_id}').get_data(as_text=True)
+    assert f"Aucune séance pour l'année scolaire {school_year_label(current)}." in html
+    assert f'/remarks/{student_id}?school_year=all' in html
+    assert "Aucune séance enregistrée pour cet élève." not in html
+    assert 'non enregistrées (toutes années) : <span id="unrecorded-count">1</span>' in html
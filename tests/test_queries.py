@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+from tests.conftest import seed_students
+
+
+def _dashboard_statements(app, count_statements):
+    client = app.test_client()
+    with count_statements(app) as statements:
+        response = client.get('/students')
+    assert response.status_code == 200
+    return statements
+
+
+def test_dashboard_statement_count_does_not_depend_on_roster_size(app, count_statements):
+    seed_students(app, 3)
+    small = _dashboard_statements(app, count_statements)
+    seed_students(app, 27)
+    large = _dashboard_statements(app, count_statements)
+
+    # Jeton de version (ETag) + résumé groupé des élèves, quelle que soit la taille de la liste
+    assert len(small) == len(large) == 2
+
+
+def test_dashboard_badges_come_from_the_grouped_summary(app):
+    seed_students(app, 3, sessions_per_student=5)
+    html = app.test_client().get('/students').get_data(as_text=True)
+    # 5 séances par élève : 3 enregistrées (n pair) et 2 non enregistrées
+    assert html.count('<span class="recorded-badge">3</span>') == 3
+    assert html.count('<span class="notification-badge">2</span>') == 3
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from sqlalchemy import insert
+from tests.conftest import seed_students
+
+REMARKS = [
+    "Intégrales : intégrales doubles, intégrales triples",
+    "Révision des intégrales avant le contrôle de mathématiques",
+    "Dérivées et limites",
+    "Suites numériques",
+]
+
+
+@pytest.fixture(params=['app', 'postgres_app'])
+def search_app(request):
+    """La même recherche sur SQLite (FTS5) et sur Postgres (tsvector) si TEST_POSTGRES_URL est définie."""
+    app = request.getfixturevalue(request.param)
+    from app.models import db, Session
+
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    with app.app_context():
+        db.session.execute(insert(Session), [
+            {"student_id": student_id, "remark": remark, "selected": False} for remark in REMARKS
+        ])
+        db.session.commit()
+    return app
+
+
+def _search(app, query, **params):
+    response = app.test_client().get('/search.json', query_string={"q": query, **params})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_results_are_ranked_by_relevance(search_app):
+    results = _search(search_app, "intégrales")["results"]
+    assert [result["remark"] for result in results] == REMARKS[:2]
+    assert results[0]["rank"] >= results[1]["rank"]
+
+
+def test_search_ignores_accents_and_case(search_app):
+    assert [result["remark"] for result in _search(search_app, "DERIVEES")["results"]] == [REMARKS[2]]
+    assert [result["remark"] for result in _search(search_app, "numeriques")["results"]] == [REMARKS[3]]
+
+
+def test_results_are_paginated(search_app):
+    search_app.config['SEARCH_PAGE_SIZE'] = 1
+    first = _search(search_app, "intégrales")
+    second = _search(search_app, "intégrales", page=2)
+    assert first["has_next"] and not second["has_next"]
+    assert [first["results"][0]["remark"], second["results"][0]["remark"]] == REMARKS[:2]
+
+
+def test_query_without_words_returns_nothing(app):
+    assert _search(app, " !? ")["results"] == []
+
+
+def test_highlight_marks_matching_words_and_escapes_the_rest():
+    from app.search import highlight
+
+    html = highlight("<b>Intégrales</b> & dérivées", "integrale")
+    assert html == "&lt;b&gt;<mark>Intégrales</mark>&lt;/b&gt; &amp; dérivées"
+    assert highlight("Suites", "") == "Suites"
+
+
+def test_search_page_highlights_hits(search_app):
+    html = search_app.test_client().get('/search', query_string={"q": "limite"}).get_data(as_text=True)
+    assert "<mark>limites</mark>" in html
+    assert "Suites numériques" not in html
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+from sqlalchemy import func, select
+from tests.conftest import seed_students
+
+
+def _sync(client, *operations):
+    return client.post('/sync', json={"operations": list(operations)})
+
+
+def _state(app):
+    from app.models import db, Session, SyncOperation
+
+    with app.app_context():
+        return (db.session.execute(select(func.count(Session.id))).scalar_one(),
+                db.session.execute(select(func.count(SyncOperation.op_id))).scalar_one())
+
+
+def _remarks(app, student_id):
+    from app.models import db, Session
+
+    with app.app_context():
+        return sorted(db.session.execute(
+            select(Session.remark).where(Session.student_id == student_id)
+        ).scalars())
+
+
+def test_replayed_batch_returns_stored_results_without_writing_again(app, client):
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    batch = [
+        {"op_id": "a1", "type": "add_remark", "student_id": student_id, "remark": "Hors ligne"},
+        {"op_id": "a2", "type": "set_selected", "session_op": "a1", "selected": True},
+    ]
+    first = _sync(client, *batch).get_json()
+    assert [result["status"] for result in first["results"]] == ["applied", "applied"]
+    assert first["students"][str(student_id)] == {"recorded_count": 1, "unrecorded_count": 0}
+    before = _state(app)
+
+    replay = _sync(client, *batch).get_json()
+    assert [result.get("replayed") for result in replay["results"]] == [True, True]
+    assert replay["results"][0]["session_id"] == first["results"][0]["session_id"]
+    assert _state(app) == before
+
+
+def test_session_op_resolves_a_session_created_by_an_earlier_batch(app, client):
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    created = _sync(client, {"op_id": "b1", "type": "add_remark", "student_id": student_id,
+                             "remark": "Brouillon"}).get_json()["results"][0]
+
+    edited = _sync(client, {"op_id": "b2", "type": "edit_remark", "session_op": "b1",
+                            "remark": "Version finale"}).get_json()["results"][0]
+    assert edited == {"op_id": "b2", "status": "applied", "session_id": created["session_id"]}
+    assert _remarks(app, student_id) == ["Version finale"]
+
+    deleted = _sync(client, {"op_id": "b3", "type": "delete_remark", "session_op": "b1"}).get_json()
+    assert deleted["results"][0]["status"] == "applied"
+    assert _remarks(app, student_id) == []
+
+
+def test_invalid_operations_are_rejected_without_blocking_the_others(app, client):
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    response = _sync(
+        client,
+        {"op_id": "c1", "type": "add_remark", "student_id": student_id, "remark": "Valide"},
+        {"op_id": "c2", "type": "rename_student", "student_id": student_id},
+        {"op_id": "c3", "type": "add_remark", "student_id": student_id, "remark": "   "},
+        {"op_id": "c1", "type": "add_remark", "student_id": student_id, "remark": "Doublon"},
+        {"op_id": "c4", "type": "add_remark", "student_id": 999, "remark": "Élève inconnu"},
+    )
+    assert response.status_code == 200
+    statuses = [result["status"] for result in response.get_json()["results"]]
+    assert statuses == ["applied", "rejected", "rejected", "rejected", "not_found"]
+    assert _remarks(app, student_id) == ["Valide"]
+
+    # Une opération refusée n'est pas journalisée : corrigée, elle s'applique
+    fixed = _sync(client, {"op_id": "c3", "type": "add_remark", "student_id": student_id, "remark": "Corrigée"})
+    assert fixed.get_json()["results"][0]["status"] == "applied"
+
+
+def test_concurrent_replay_is_retried_after_the_integrity_error(app, client, monkeypatch):
+    from app import sync
+
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    batch = [{"op_id": "d1", "type": "add_remark", "student_id": student_id, "remark": "Une fois"}]
+    _sync(client, *batch)
+    before = _state(app)
+
+    # Premier essai : le journal est lu avant la validation du lot concurrent (op_id pas encore visible)
+    stored_results = sync._stored_results
+    calls = []
+
+    def journal_not_yet_committed(op_ids):
+        calls.append(op_ids)
+        return {} if len(calls) == 1 else stored_results(op_ids)
+
+    monkeypatch.setattr(sync, '_stored_results', journal_not_yet_committed)
+    response = _sync(client, *batch)
+    assert response.status_code == 200
+    assert response.get_json()["results"][0]["replayed"] is True
+    assert len(calls) == 2
+    assert _state(app) == before
+
+
+def test_persistent_conflict_answers_409(app, client, monkeypatch):
+    from app import sync
+
+    (student_id,) = seed_students(app, 1, sessions_per_student=0)
+    batch = [{"op_id": "e1", "type": "add_remark", "student_id": student_id, "remark": "Une fois"}]
+    _sync(client, *batch)
+    before = _state(app)
+
+    monkeypatch.setattr(sync, '_stored_results', lambda op_ids: {})
+    assert _sync(client, *batch).status_code == 409
+    assert _state(app) == before
+
+
+def test_batch_limits_and_payload_errors(make_app):
+    client = make_app(SYNC_MAX_OPERATIONS=2).test_client()
+    operations = [{"op_id": str(n), "type": "add_remark", "student_id": 1, "remark": "x"} for n in range(3)]
+    assert _sync(client, *operations).status_code == 413
+    assert client.post('/sync', json={"ops": []}).status_code == 400
+    assert client.post('/sync', data="operations").status_code == 415
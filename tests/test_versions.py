@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+from datetime import timedelta
+from sqlalchemy import func, select, update
+from tests.conftest import seed_students
+
+
+def _late_commit_of_an_earlier_write(app, student_id, name):
+    """Écriture dont la date (prise avant la validation) est antérieure au max(updated_at) déjà validé."""
+    from app.models import db, Student
+
+    with app.app_context():
+        latest = db.session.execute(select(func.max(Student.updated_at))).scalar_one()
+        db.session.execute(
+            update(Student).where(Student.id == student_id)
+            .values(name=name, updated_at=latest - timedelta(seconds=5))
+        )
+        db.session.commit()
+
+
+def test_roster_etag_changes_when_an_earlier_timestamp_commits_last(make_app):
+    app = make_app(FRAGMENT_CACHE='local')
+    first, second = seed_students(app, 2, sessions_per_student=0)
+    client = app.test_client()
+    client.post(f'/update_info/{second}', data={"school_name": "Lycée B"})
+    cached = client.get('/students')
+    etag = cached.headers['ETag']
+
+    # Requête A (date t1) validée après la requête B (date t2 > t1) : le max ne bouge pas
+    _late_commit_of_an_earlier_write(app, first, "Élève renommé")
+
+    response = client.get('/students', headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    # Le fragment de la grille (clé versionnée) est recalculé
+    assert "Élève renommé" in response.get_data(as_text=True)
+
+
+def test_every_write_gives_the_row_a_larger_generation(app):
+    from app.models import db, Student
+
+    first, second = seed_students(app, 2, sessions_per_student=0)
+    with app.app_context():
+        generations = dict(db.session.execute(select(Student.id, Student.generation)).tuples().all())
+        assert 0 < generations[first] < generations[second]
+        db.session.execute(update(Student).where(Student.id == first).values(name="Nouveau nom"))
+        db.session.commit()
+        assert db.session.get(Student, first).generation > generations[second]
+
+
+def test_app_instances_without_a_configured_salt_agree_on_the_etag(make_app, monkeypatch):
+    # Deux workers gunicorn : chacun crée son application, sans ETAG_SALT ni RENDER_GIT_COMMIT
+    monkeypatch.delenv('RENDER_GIT_COMMIT', raising=False)
+    first = make_app(ETAG_SALT='')
+    seed_students(first, 2, sessions_per_student=0)
+    second = make_app(create_tables=False, ETAG_SALT='')
+
+    assert first.config['ETAG_SALT'] == second.config['ETAG_SALT']
+    etag = first.test_client().get('/students').headers['ETag']
+    assert second.test_client().get('/students').headers['ETag'] == etag
+    assert second.test_client().get('/students', headers={"If-None-Match": etag}).status_code == 304